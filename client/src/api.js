@@ -12,15 +12,37 @@ const createContextualError = (error, context) => {
 
 //* Home & Dashboard Data
 
-export async function getHomeData(userId) {
+//~ fields: optional sparse fieldset e.g. ['welcome_message', 'top_songs.1_month']
+export async function getHomeData(userId, fields = null) {
     try {
-        const response = await apiClient.get(`/home/data?user_id=${userId}`);
+        const fieldsParam = fields ? `&fields=${encodeURIComponent(fields.join(','))}` : '';
+        const response = await apiClient.get(`/home/data?user_id=${userId}${fieldsParam}`);
         return response.data;
     } catch (error) {
         throw createContextualError(error, `Failed to fetch home data for user ${userId}`);
     }
 }
 
+//& progressive home data over SSE: onSection(name, data) fires per section as it lands
+//~ returns close fn; onDone gets { partial, timed_out, failed }
+export function streamHomeData(userId, onSection, onDone, onError) {
+    const url = `${apiClient.defaults.baseURL}/home/data/stream?user_id=${userId}`;
+    const source = new EventSource(url, { withCredentials: true });
+    const sections = ['welcome', 'top_songs', 'top_artists', 'streak', 'genres', 'percentile'];
+    sections.forEach(name => {
+        source.addEventListener(name, event => onSection(name, JSON.parse(event.data)));
+    });
+    source.addEventListener('done', event => {
+        source.close();
+        if (onDone) onDone(JSON.parse(event.data));
+    });
+    source.onerror = error => {
+        source.close();
+        if (onError) onError(createContextualError(error, `Failed to stream home data for user ${userId}`));
+    };
+    return () => source.close();
+}
+
 export async function getRecentlyPlayedTracks(userId, limit = 50) {
     try {
         const response = await apiClient.get(`/spotify/recently-played?user_id=${userId}&limit=${limit}`);
@@ -441,6 +441,8 @@ const _baseHex = color.startsWith("#") ? color.substring(1) : color;
     <option value="8">8 Artists</option>
     <option value="10">10 Artists</option>
     <option value="15">15 Artists</option>
+    <option value="25">25 Artists</option>
+    <option value="50">50 Artists</option>
     </select>
     <div className="absolute inset-y-0 right-0 flex items-center pr-2 pointer-events-none">
     <svg className="h-4 w-4 text-gray-400" fill="none" viewBox="0 0 24 24" stroke="currentColor">
@@ -51,10 +51,10 @@ export const getGenreDistribution = async (userId, timeRange = 'medium_term') =>
 };
 
 //& fetch artist-genre matrix data fr chord diagram
-export const getArtistGenreMatrix = async (userId, timeRange = 'medium_term', limit = 10) => {
+export const getArtistGenreMatrix = async (userId, timeRange = 'medium_term', limit = 10, mode = 'genre') => {
     try {
         const response = await apiClient.get(
-            `/analytics/user/artist-genre-matrix?user_id=${userId}&time_range=${timeRange}&limit=${limit}`
+            `/analytics/user/artist-genre-matrix?user_id=${userId}&time_range=${timeRange}&limit=${limit}&mode=${mode}`
         );
         return response.data;
     } catch (error) {
@@ -82,6 +82,20 @@ export const getTopListenersPercentile = async (userId) => {
     }
 };
 
+//& get several analytics sections in 1 request (computed frm single data load server-side)
+export const getAnalyticsBundle = async (userId, sections = [], options = {}) => {
+    try {
+        const params = new URLSearchParams({ user_id: userId, ...options });
+        if (sections.length) {
+            params.set('sections', sections.join(','));
+        }
+        const response = await apiClient.get(`/analytics/user/bundle?${params.toString()}`);
+        return response.data;
+    } catch (error) {
+        throw createContextualError(error, 'Failed to fetch analytics bundle');
+    }
+};
+
 //& helper fr contextual err handling
 const createContextualError = (error, context) => {
     const enhancedError = new Error(`${context}: ${error.message}`);
@@ -100,5 +114,6 @@ export default {
     getGenreDistribution,
     getArtistGenreMatrix,
     getLongestListeningStreak,
-    getTopListenersPercentile
+    getTopListenersPercentile,
+    getAnalyticsBundle
 };
\ No newline at end of file
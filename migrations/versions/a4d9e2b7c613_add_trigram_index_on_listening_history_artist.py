@@ -0,0 +1,25 @@
+"""Add trigram index on listening_history.artist
+
+Revision ID: a4d9e2b7c613
+Revises: 8c1f3a7d2e94
+Create Date: 2026-10-19 13:02:17.554810
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e2b7c613'
+down_revision = '8c1f3a7d2e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    #~ pg_trgm lets gin index serve ILIKE '%...%' lookups
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('idx_listening_history_artist_trgm', 'listening_history', ['artist'], unique=False, postgresql_using='gin', postgresql_ops={'artist': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('idx_listening_history_artist_trgm', table_name='listening_history', postgresql_using='gin')
@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+import hmac
 import os
 import logging
 from datetime import timedelta
@@ -9,8 +10,8 @@ debug = os.environ.get('FLASK_DEBUG', '0') == '1'
 env = 'production' if not debug else 'development'
 load_dotenv(dotenv_path=f".env.{env}")  #~ load appropriate .env file
 #* App factory (Flask app config)
-from flask import Flask, jsonify
-from server.redis_client import redis_client
+from flask import Flask, jsonify, request
+from server.redis_client import redis_client, redis_binary_client
 from server.config import DevelopmentConfig  #~ current app config class: can change based on environment
 
 #* Init Extensions
@@ -32,6 +33,8 @@ def create_app(config_class=DevelopmentConfig):
     app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production'
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)  #~ explicit session lifetime
+    #~ sessions are raw bytes, share binary client's pool (connects on 1st request, nt here)
+    app.config.setdefault('SESSION_REDIS', redis_binary_client)
     Session(app)
 
     #& CORS config fr cross-browser compatibility
@@ -84,11 +87,55 @@ def create_app(config_class=DevelopmentConfig):
         except Exception as e:
             return jsonify({'status': 'error', 'component': 'redis', 'error': str(e)}), 500
 
-        return jsonify({'status': 'ok'}), 200
+        #~ per-worker local cache counters, fr spotting creep / poor hit rates
+        from server.redis_client import local_cache
+        return jsonify({'status': 'ok', 'local_cache': local_cache.stats()}), 200
+
+    #& cache metrics endpoint: per-namespace hit rates, sizes & latency fr this worker
+    #~ off unless METRICS_TOKEN is set; callers send it as `Authorization: Bearer <token>`
+    #~ ?memory=1 adds a sampled MEMORY USAGE report (SCAN + pipelined MEMORY USAGE, nt free),
+    #~ so it is limited to 1 sample per METRICS_MEMORY_SAMPLE_INTERVAL across workers
+    @app.route('/metrics/cache')
+    def cache_metrics_report():
+        from server.redis_client import cache_metrics, local_cache
+        from server.cache_metrics import sample_memory_usage
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            return jsonify({'error': 'Not found'}), 404
+        auth = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth.encode(), f'Bearer {token}'.encode()):
+            return jsonify({'error': 'Unauthorized'}), 401
+        report = {
+            'pid': os.getpid(),
+            'namespaces': cache_metrics.snapshot(),
+            'local_cache': local_cache.stats()
+        }
+        if request.args.get('memory') == '1':
+            try:
+                sample = min(max(int(request.args.get('sample', 1000)), 1), 2000)
+            except ValueError:
+                return jsonify({'error': 'sample must be an integer'}), 400
+            interval = app.config.get('METRICS_MEMORY_SAMPLE_INTERVAL', 60)
+            try:
+                if not redis_client.set('metrics_memory_sample_lock', '1', nx=True, ex=interval):
+                    response = jsonify({'error': 'memory sample taken recently, try again later'})
+                    response.headers['Retry-After'] = str(max(redis_client.ttl('metrics_memory_sample_lock'), 1))
+                    return response, 429
+                report['memory'] = sample_memory_usage(redis_binary_client, max_keys=sample)
+            except Exception as e:
+                print(f"Error sampling redis memory usage: {e}")
+                return jsonify({'error': 'Failed to sample redis memory usage'}), 500
+        return jsonify(report), 200
 
     return app
 
-app = create_app()
+#& module-level app built on 1st access (`from server.app import app`), nt at import
+#~ so importing create_app / socketio (wsgi, celery, alembic) doesnt build a 2nd app
+def __getattr__(name):
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 @socketio.on('connect')
 def handle_connect():
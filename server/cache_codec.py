@@ -0,0 +1,82 @@
+import json
+import os
+import zlib
+
+import msgspec
+
+#& wire format fr cached values: 4-byte header + body
+#~ header = MAGIC, FORMAT_VERSION, codec id, compression id. legacy entries (plain json / raw
+#~ strings written bef this header existed) never start w a NUL byte so they still decode
+MAGIC = b'\x00'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+#& codecs: id -> (name, encode, decode); ids are persisted so never reuse one
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder()
+
+CODECS = {
+    1: ('msgpack', _msgpack_encoder.encode, _msgpack_decoder.decode),
+    2: ('json', _json_encoder.encode, _json_decoder.decode),
+}
+_CODEC_IDS = {name: codec_id for codec_id, (name, _, _) in CODECS.items()}
+
+#& compression: id -> (name, compress, decompress); 0 = stored as-is
+COMPRESSIONS = {
+    0: ('none', None, None),
+    1: ('zlib', lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+
+#~ writer codec is configurable; readers accept every registered codec
+CACHE_CODEC = os.environ.get('CACHE_CODEC', 'msgpack')
+#~ small payloads arent worth compressing (header + deflate overhead, cpu)
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get('CACHE_COMPRESS_MIN_BYTES', 1024))
+
+class CacheCodecError(ValueError):
+    """Cached payload has a header this build cant decode"""
+
+def encode(value, codec=None):
+    """
+    Serialize value fr redis.
+
+    Args:
+        value: Any msgpack / json compatible value
+        codec: Codec name, defaults to CACHE_CODEC
+
+    Returns:
+        Header + (compressed if >= CACHE_COMPRESS_MIN_BYTES) body bytes
+    """
+    codec_id = _CODEC_IDS[codec or CACHE_CODEC]
+    body = CODECS[codec_id][1](value)
+    compression_id = 0
+    if len(body) >= CACHE_COMPRESS_MIN_BYTES:
+        compressed = COMPRESSIONS[1][1](body)
+        #~ keep raw body if deflate didnt help (already dense / random data)
+        if len(compressed) < len(body):
+            body, compression_id = compressed, 1
+    return MAGIC + bytes((FORMAT_VERSION, codec_id, compression_id)) + body
+
+def _decode_legacy(data):
+    #~ pre-header entries: json text, or a raw string that was stored as-is
+    text = data.decode('utf-8') if isinstance(data, bytes) else data
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def decode(data):
+    """Inverse of encode; also reads legacy plain-json / raw-string entries"""
+    if not data or data[:1] != MAGIC:
+        return _decode_legacy(data)
+    if len(data) < HEADER_SIZE or data[1] != FORMAT_VERSION:
+        raise CacheCodecError(f"unsupported cache format {data[1:2]!r}")
+    codec_id, compression_id = data[2], data[3]
+    if codec_id not in CODECS or compression_id not in COMPRESSIONS:
+        raise CacheCodecError(f"unknown cache codec {codec_id} / compression {compression_id}")
+    body = data[HEADER_SIZE:]
+    decompress = COMPRESSIONS[compression_id][2]
+    if decompress:
+        body = decompress(body)
+    return CODECS[codec_id][2](body)
@@ -0,0 +1,102 @@
+import threading
+from collections import defaultdict
+
+#& per-namespace cache counters fr sizing redis plan & ttls
+#~ namespace = key prefix bef 1st ':' (artist_genre, analytics_trends, session, ...)
+#~ counters are per worker process, like local_cache.stats()
+COUNTERS = (
+    'local_hits', 'redis_hits', 'misses', 'sets', 'deletes',
+    'recomputes', 'stale_served', 'bytes_read', 'bytes_written'
+)
+
+def namespace_of(key):
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+    return key.split(':', 1)[0]
+
+def _new_namespace():
+    stats = dict.fromkeys(COUNTERS, 0)
+    stats.update({'round_trips': 0, 'latency_total_ms': 0.0, 'latency_max_ms': 0.0})
+    return stats
+
+class CacheMetrics:
+    """Thread-safe hit / miss / size / latency counters keyed by cache namespace"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces = defaultdict(_new_namespace)
+
+    def incr(self, key, counter, amount=1):
+        with self._lock:
+            self._namespaces[namespace_of(key)][counter] += amount
+
+    def record_latency(self, keys, seconds):
+        """1 redis round trip of seconds, counted once fr each namespace it served"""
+        ms = seconds * 1000
+        with self._lock:
+            for namespace in {namespace_of(key) for key in keys}:
+                stats = self._namespaces[namespace]
+                stats['round_trips'] += 1
+                stats['latency_total_ms'] += ms
+                stats['latency_max_ms'] = max(stats['latency_max_ms'], ms)
+
+    def snapshot(self):
+        """Counters per namespace + derived hit rates / avg sizes / avg latency"""
+        with self._lock:
+            namespaces = {namespace: dict(stats) for namespace, stats in self._namespaces.items()}
+        for stats in namespaces.values():
+            hits = stats['local_hits'] + stats['redis_hits']
+            lookups = hits + stats['misses']
+            stats['hit_rate'] = round(hits / lookups, 4) if lookups else None
+            stats['local_hit_rate'] = round(stats['local_hits'] / lookups, 4) if lookups else None
+            stats['avg_read_bytes'] = round(stats['bytes_read'] / stats['redis_hits']) if stats['redis_hits'] else None
+            stats['avg_write_bytes'] = round(stats['bytes_written'] / stats['sets']) if stats['sets'] else None
+            stats['latency_avg_ms'] = round(stats['latency_total_ms'] / stats['round_trips'], 3) if stats['round_trips'] else None
+            stats['latency_total_ms'] = round(stats['latency_total_ms'], 3)
+            stats['latency_max_ms'] = round(stats['latency_max_ms'], 3)
+        return namespaces
+
+    def reset(self):
+        with self._lock:
+            self._namespaces.clear()
+
+def sample_memory_usage(client, max_keys=1000, scan_count=500):
+    """
+    Estimate redis memory per namespace frm a SCAN sample.
+
+    Args:
+        client: Redis client (any decode mode)
+        max_keys: Max keys sampled w MEMORY USAGE (1 pipelined round trip per scan batch)
+        scan_count: SCAN COUNT hint
+
+    Returns:
+        Dict w dbsize, sampled_keys & per-namespace sampled_keys / sampled_bytes /
+        avg_bytes / estimated_keys / estimated_bytes (scaled to dbsize)
+    """
+    dbsize = client.dbsize()
+    namespaces = defaultdict(lambda: {'sampled_keys': 0, 'sampled_bytes': 0})
+    sampled = 0
+    cursor = 0
+    while sampled < max_keys:
+        cursor, keys = client.scan(cursor=cursor, count=scan_count)
+        keys = keys[:max_keys - sampled]
+        if keys:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key)
+            for key, usage in zip(keys, pipe.execute()):
+                if usage is None:
+                    continue  #~ expired between scan & memory usage
+                stats = namespaces[namespace_of(key)]
+                stats['sampled_keys'] += 1
+                stats['sampled_bytes'] += usage
+                sampled += 1
+        if cursor == 0:
+            break
+    #~ scale sample up to whole keyspace, assuming scan order is namespace-neutral
+    scale = dbsize / sampled if sampled else 0
+    for stats in namespaces.values():
+        stats['avg_bytes'] = round(stats['sampled_bytes'] / stats['sampled_keys'])
+        stats['estimated_keys'] = round(stats['sampled_keys'] * scale)
+        stats['estimated_bytes'] = round(stats['sampled_bytes'] * scale)
+    return {'dbsize': dbsize, 'sampled_keys': sampled, 'namespaces': dict(namespaces)}
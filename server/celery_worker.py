@@ -47,6 +47,11 @@ def make_celery(app):
         'update-event-statuses-daily': {
             'task': 'server.tasks.sync_tasks.update_event_statuses',
             'schedule': crontab(hour='0', minute='0')  #~ run daily @ midnight
+        },
+        'refresh-stale-artist-catalog': {
+            'task': 'server.tasks.sync_tasks.refresh_stale_artists_task',
+            'schedule': crontab(hour='*/6', minute='30'),  #~ every 6h, off the hourly sync peak
+            'options': {'priority': 9}  #~ lowest priority, never delay user syncs
         }
     }
 
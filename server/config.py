@@ -1,5 +1,4 @@
 import os
-import redis
 
 class Config(object):
     SECRET_KEY = os.environ.get('SECRET_KEY', 'default-secret-key')
@@ -18,45 +17,13 @@ class Config(object):
 
     #& server-side sesh settings
     SESSION_USE_SIGNER = True
-    #& if redis url provided (prod), use it; else fallback dev settings
-    redis_url = os.environ.get('REDIS_URL')
-    if redis_url:
-        #~ general redis connection w decode_responses fr normal operations
-        connection_kwargs = {'decode_responses': True}
-        
-        #~ separate connection kwargs fr session mgmt (no decoding)
-        session_connection_kwargs = {}
-        
-        #~ if ssl settings specified, apply to both connection types
-        if 'ssl_cert_reqs=CERT_NONE' in redis_url:
-            import ssl
-            session_connection_kwargs['ssl_cert_reqs'] = ssl.CERT_NONE
-        
-        #~ handle ssl cert requirements fr redis connection
-        if redis_url.startswith('rediss://'):
-            import ssl
-            
-            #~ extract ssl params frm url if present
-            if 'ssl_cert_reqs=CERT_NONE' in redis_url:
-                #~ remove frm url & set explicitly
-                redis_url = redis_url.replace('ssl_cert_reqs=CERT_NONE', '')
-                redis_url = redis_url.replace('&&', '&').rstrip('&?')
-                connection_kwargs['ssl_cert_reqs'] = ssl.CERT_NONE
-            elif 'ssl_cert_reqs=CERT_REQUIRED' in redis_url:
-                #~ remove frm url & set explicitly
-                redis_url = redis_url.replace('ssl_cert_reqs=CERT_REQUIRED', '')
-                redis_url = redis_url.replace('&&', '&').rstrip('&?')
-                connection_kwargs['ssl_cert_reqs'] = ssl.CERT_REQUIRED
-        
-        #~ use session_connection_kwargs w/o decode_responses fr session data
-        SESSION_REDIS = redis.Redis.from_url(redis_url, **session_connection_kwargs)
-    else:
-        SESSION_REDIS = redis.Redis(
-            host=os.environ.get('REDIS_HOST', 'localhost'),
-            port=int(os.environ.get('REDIS_PORT', 6379)),
-            db=int(os.environ.get('REDIS_DB', 0)),
-            password=os.environ.get('REDIS_PASSWORD', None)
-        )
+    #~ SESSION_REDIS set in create_app frm shared lazy pool (see redis_client), so defining
+    #~ config classes opens no connections
+
+    #& /metrics/cache bearer token; unset => endpoint disabled (404)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    #~ min secs between ?memory=1 samples, across all workers
+    METRICS_MEMORY_SAMPLE_INTERVAL = int(os.environ.get('METRICS_MEMORY_SAMPLE_INTERVAL', 60))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,106 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+#& in-process cache tier in front of redis
+#~ bounded by entry count & approx bytes; expired entries dropped on access or as LRU victims
+_MISSING = object()
+
+class LocalCache:
+    """
+    Thread-safe TTL + LRU cache w hit / miss / eviction counters.
+
+    Args:
+        max_entries: Max number of keys held
+        max_bytes: Approx max payload bytes held (sizes are caller-supplied or estimated)
+        max_ttl: Upper bound on any entry's lifetime, secs
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, max_ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  #~ key -> (value, expires_at, size), oldest use 1st
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None, count=True):
+        """Value fr key if present & unexpired (marks it recently used), else default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl, size=None):
+        """Store value fr min(ttl, max_ttl) secs; size in bytes if known (e.g. len of serialized form)"""
+        ttl = min(ttl, self.max_ttl)
+        if size is None:
+            size = sys.getsizeof(value)
+        with self._lock:
+            #~ old value goes even when the new one isnt kept, so it cant outlive the write
+            if key in self._entries:
+                self._drop(key)
+            if ttl <= 0 or size > self.max_bytes:
+                return  #~ never worth evicting everything fr 1 entry
+            self._entries[key] = (value, time.time() + ttl, size)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        #~ pop least recently used until within bounds; expired ones popped count as expirations
+        now = time.time()
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, expires_at, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            if expires_at <= now:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -67,11 +67,32 @@ class ListeningHistory(db.Model):
     #& db-level unique constraint to prevent duplicate entries
     __table_args__ = (
         db.UniqueConstraint('user_id', 'track_id', 'played_at', name='uix_user_track_played_at'),
+        #~ trigram index so cross-user `artist ILIKE '%name%'` lookups dont seq scan
+        db.Index('idx_listening_history_artist_trgm', 'artist', postgresql_using='gin', postgresql_ops={'artist': 'gin_trgm_ops'}),
     )
     
     def __repr__(self):
         return f'<ListeningHistory user:{self.user_id} track:{self.track_id}>'
 
+#& artist catalog schema: local copy of spotify artist metadata, redis only hot-caches genres in front of it
+class Artist(db.Model):
+    __tablename__ = 'artist'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    spotify_id = db.Column(db.String(128), unique=True, nullable=False)
+    name = db.Column(db.String(256))
+    genres = db.Column(JSONB)  #~ genre list as returned by spotify, empty list if none
+    image_url = db.Column(db.String(512))
+    popularity = db.Column(db.Integer)
+    refreshed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    #~ index so stale-entry refresh job can scan oldest 1st
+    __table_args__ = (
+        db.Index('idx_artist_refreshed_at', 'refreshed_at'),
+    )
+    
+    def __repr__(self):
+        return f'<Artist {self.name} ({self.spotify_id})>'
+
 #& aggregated stats schema: to store processed metrics etc top tracks/artists, genre distribution...
 class AggregatedStats(db.Model):
     __tablename__ = 'aggregated_stats'
@@ -86,6 +107,18 @@ class AggregatedStats(db.Model):
     def __repr__(self):
         return f'<AggregatedStats user:{self.user_id}>'
     
+#& monthly genre rollup: listening secs per user / month / genre, kept current at ingest fr stream graph
+class UserGenreMonthly(db.Model):
+    __tablename__ = 'user_genre_monthly'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  #~ 'YYYY-MM' (utc)
+    genre = db.Column(db.String(128), primary_key=True)  #~ listening_history.genre, 'unknown' when missing
+    seconds = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<UserGenreMonthly user:{self.user_id} {self.month} {self.genre}>'
+    
 #& concert event schema: store details of events & concerts
 class Event(db.Model):
     __tablename__ = 'event'
@@ -6,8 +6,14 @@ import logging
 import ssl
 import json
 import time
+import hashlib
+import threading
+import socket
 from functools import wraps
 from datetime import timedelta
+from server.local_cache import LocalCache
+from server import cache_codec
+from server.cache_metrics import CacheMetrics
 
 logging.basicConfig(level=logging.INFO)
 
@@ -52,36 +58,21 @@ elif redis_url and "ssl_cert_reqs=CERT_NONE" in redis_url:
     os.environ['REDIS_URL'] = redis_url
     logging.info("Set SSL certificate requirements to CERT_NONE")
 
-#& if redis url provided (prod), use it; else fallback dev settings
-if redis_url:
-    try:
-        connection_kwargs = {
-            'decode_responses': True,
-            'socket_timeout': 5,
-            'socket_connect_timeout': 5
-        }
-        
-        #~ ssl is required fr valkey/aiven redis, check if url starts w rediss://
-        if redis_url and redis_url.startswith('rediss://'):
-            ssl_cert_reqs = ssl.CERT_REQUIRED
-        
-        #& only add ssl params if need
-        if ssl_cert_reqs is not None:
-            connection_kwargs['ssl_cert_reqs'] = ssl_cert_reqs
-            
-        redis_client = redis.Redis.from_url(
-            redis_url,
-            **connection_kwargs
-        )
-        redis_client.ping()
-        logging.info("Redis connection successful.")
-    except redis.ConnectionError as e:
-        logging.error("Redis connection failed: %s", e)
-        raise
-    except Exception as e:
-        logging.error("Unexpected error while connecting to Redis: %s", e)
-        raise
-else:
+#& connection settings; nothing here touches the network
+#~ clients share 1 pool per decode mode & only connect on their 1st command, so importing
+#~ this module (tests, alembic, celery boot) needs no reachable redis; /health pings it
+connection_kwargs = {
+    'socket_timeout': 5,
+    'socket_connect_timeout': 5
+}
+#~ ssl is required fr valkey/aiven redis, check if url starts w rediss://
+if redis_url and redis_url.startswith('rediss://'):
+    ssl_cert_reqs = ssl.CERT_REQUIRED
+#& only add ssl params if need
+if redis_url and ssl_cert_reqs is not None:
+    connection_kwargs['ssl_cert_reqs'] = ssl_cert_reqs
+
+if not redis_url:
     #~ get redis host frm env / use CI host if CI env detected
     if os.environ.get('CI') == 'true':
         REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
@@ -90,47 +81,143 @@ else:
     
     REDIS_PORT = os.environ.get('REDIS_PORT', 6379)
     REDIS_DB = os.environ.get('REDIS_DB', 0)
-    
-    #~ in ci/cd env use service name 'redis' instead of localhost
-    redis_client = redis.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        db=REDIS_DB,
-        decode_responses=True  #~ auto decode strings to UTF-8
-    )
-
-#& in-memory cache reduce redis commands
-_local_cache = {}
-_local_cache_expiry = {}
+    connection_kwargs.update({
+        'host': REDIS_HOST,
+        'port': int(REDIS_PORT),
+        'db': int(REDIS_DB),
+        'password': os.environ.get('REDIS_PASSWORD')
+    })
+
+def _connection_pool(decode_responses):
+    #~ if redis url provided (prod), use it; else fallback dev settings
+    if redis_url:
+        return redis.ConnectionPool.from_url(redis_url, decode_responses=decode_responses, **connection_kwargs)
+    return redis.ConnectionPool(decode_responses=decode_responses, **connection_kwargs)
+
+#& str client fr normal ops (auto decode utf-8) & raw-bytes client fr binary payloads
+#~ (encoded cache values, numpy snapshots, flask sessions)
+redis_client = redis.Redis(connection_pool=_connection_pool(decode_responses=True))
+redis_binary_client = redis.Redis(connection_pool=_connection_pool(decode_responses=False))
+
+#& in-memory cache reduce redis commands; bounded so long-lived workers dont creep
+#~ long local TTL is safe only while invalidations are arriving; w/o listener keep entries short
+LOCAL_CACHE_MAX_TTL = int(os.environ.get('LOCAL_CACHE_MAX_TTL', 6 * 3600))
+LOCAL_CACHE_UNSUBSCRIBED_TTL = 60
+local_cache = LocalCache(
+    max_entries=int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', 10000)),
+    max_bytes=int(os.environ.get('LOCAL_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    max_ttl=LOCAL_CACHE_MAX_TTL
+)
+_MISSING = object()
+#~ per-namespace hit / size / latency counters, served by /metrics/cache
+cache_metrics = CacheMetrics()
+
+#& cross-worker invalidation: writers publish "<origin> <key>", every worker's listener drops key locally
+INVALIDATION_CHANNEL = 'cache_invalidation'
+_listener_state = {'pid': None, 'connected': False}
+_listener_lock = threading.Lock()
+
+def _origin():
+    #~ per process, so forked workers sharing module state still tell each other apart
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _listen_for_invalidations():
+    backoff = 1
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            _listener_state['connected'] = True
+            backoff = 1
+            logging.info("cache invalidation listener subscribed (pid %s)", os.getpid())
+            origin = _origin()
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if not message:
+                    continue
+                sender, _, key = message['data'].partition(' ')
+                if sender != origin:
+                    local_cache.delete(key)
+        except Exception as e:
+            if _listener_state['connected']:
+                logging.warning("cache invalidation listener lost: %s", e)
+                #~ invalidations may have been missed while down
+                local_cache.clear()
+            _listener_state['connected'] = False
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+def _ensure_invalidation_listener():
+    #~ started lazily per process so it survives gunicorn preload + fork
+    if _listener_state['pid'] == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_state['pid'] == os.getpid():
+            return
+        _listener_state['pid'] = os.getpid()
+        _listener_state['connected'] = False
+        threading.Thread(target=_listen_for_invalidations, name='cache-invalidation', daemon=True).start()
+
+def _local_ttl(ttl):
+    """Local tier TTL fr an entry redis keeps fr ttl secs"""
+    _ensure_invalidation_listener()
+    return min(ttl, LOCAL_CACHE_MAX_TTL if _listener_state['connected'] else LOCAL_CACHE_UNSUBSCRIBED_TTL)
+
+#& negative-cache sentinel: marks key as looked up w nothing there (e.g. artist w no genres)
+#~ stored as-is so a known-empty result is a hit, nt a miss that triggers another upstream call
+NEGATIVE_CACHE_SENTINEL = '__negative__'
+NEGATIVE_CACHE_TTL = timedelta(hours=12)
+
+def is_negative_cached(value):
+    """True if value returned by get_cached / batch_get is the negative-cache sentinel"""
+    return value == NEGATIVE_CACHE_SENTINEL
+
+def _parse_cached(key, raw):
+    #~ undecodable entries (e.g. written by a newer format version) are treated as misses
+    try:
+        return cache_codec.decode(raw)
+    except (cache_codec.CacheCodecError, ValueError) as e:
+        logging.warning("cannot decode cached %s: %s", key, e)
+        return _MISSING
 
 #& utility to get frm local cache first, then redis
 def get_cached(key, default=None):
     """Get value from local cache first, then redis if not found"""
     #~ check local cache first
-    if key in _local_cache and _local_cache_expiry.get(key, 0) > time.time():
-        return _local_cache[key]
+    value = local_cache.get(key, _MISSING)
+    if value is not _MISSING:
+        cache_metrics.incr(key, 'local_hits')
+        return value
     
-    #~ if nt in local cache, check redis
-    value = redis_client.get(key)
-    if value:
-        try:
-            parsed = json.loads(value)
-            #~ cache locally w TTL, but slightly shorter to account fr clock drift
-            ttl = redis_client.ttl(key)
-            if ttl > 0:
-                _local_cache[key] = parsed
-                _local_cache_expiry[key] = time.time() + min(ttl, 3600)  #~ max 1 hr local caching
-            return parsed
-        except:
-            return value
-    return default
+    #~ if nt in local cache, check redis; value & ttl in 1 round trip
+    #~ binary client: payloads are encoded bytes (see cache_codec)
+    pipe = redis_binary_client.pipeline(transaction=False)
+    pipe.get(key)
+    pipe.ttl(key)
+    started = time.perf_counter()
+    value, ttl = pipe.execute()
+    cache_metrics.record_latency([key], time.perf_counter() - started)
+    #~ empty strings & sentinel are real hits
+    if value is None:
+        cache_metrics.incr(key, 'misses')
+        return default
+    parsed = _parse_cached(key, value)
+    if parsed is _MISSING:
+        cache_metrics.incr(key, 'misses')
+        return default
+    cache_metrics.incr(key, 'redis_hits')
+    cache_metrics.incr(key, 'bytes_read', len(value))
+    #~ cache locally fr no longer than redis keeps it
+    if ttl > 0:
+        local_cache.set(key, parsed, _local_ttl(ttl), size=len(value))
+    return parsed
 
 #& utility set in local cache & redis w single op
 def set_cached(key, value, ex=None):
-    """Set value in both local cache and redis"""
-    #~ set in local cache
-    serialized = json.dumps(value) if not isinstance(value, str) else value
+    """Set value in both local cache and redis, & tell other workers to drop their copy"""
+    serialized = cache_codec.encode(value)
     
+    pipe = redis_binary_client.pipeline(transaction=False)
     if ex:
         #~ convert timedelta to seconds if need
         if isinstance(ex, timedelta):
@@ -138,16 +225,37 @@ def set_cached(key, value, ex=None):
         else:
             seconds = ex
             
-        _local_cache[key] = value
-        _local_cache_expiry[key] = time.time() + seconds
-        redis_client.setex(key, seconds, serialized)
+        local_cache.set(key, value, _local_ttl(seconds), size=len(serialized))
+        pipe.setex(key, seconds, serialized)
     else:
-        _local_cache[key] = value
-        _local_cache_expiry[key] = time.time() + 3600  #~ default 1 hr
-        redis_client.set(key, serialized)
+        local_cache.set(key, value, _local_ttl(LOCAL_CACHE_MAX_TTL), size=len(serialized))
+        pipe.set(key, serialized)
+    pipe.publish(INVALIDATION_CHANNEL, f"{_origin()} {key}")
+    started = time.perf_counter()
+    pipe.execute()
+    cache_metrics.record_latency([key], time.perf_counter() - started)
+    cache_metrics.incr(key, 'sets')
+    cache_metrics.incr(key, 'bytes_written', len(serialized))
     
     return True
 
+#& utility delete frm local cache & redis everywhere
+def delete_cached(key):
+    """Delete key frm redis & every worker's local cache"""
+    local_cache.delete(key)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(key)
+    pipe.publish(INVALIDATION_CHANNEL, f"{_origin()} {key}")
+    started = time.perf_counter()
+    pipe.execute()
+    cache_metrics.record_latency([key], time.perf_counter() - started)
+    cache_metrics.incr(key, 'deletes')
+
+#& utility mark key as negatively cached, w its own (shorter) TTL
+def set_negative_cached(key, ex=NEGATIVE_CACHE_TTL):
+    """Record that key was looked up and has no value"""
+    return set_cached(key, NEGATIVE_CACHE_SENTINEL, ex=ex)
+
 #& utility batch get operations & reduce commands
 def batch_get(keys):
     """Get multiple keys at once, using local cache where possible"""
@@ -159,53 +267,211 @@ def batch_get(keys):
     result = [None] * len(keys)
     
     for i, key in enumerate(keys):
-        if key in _local_cache and _local_cache_expiry.get(key, 0) > time.time():
-            result[i] = _local_cache[key]
+        value = local_cache.get(key, _MISSING)
+        if value is not _MISSING:
+            cache_metrics.incr(key, 'local_hits')
+            result[i] = value
         else:
             redis_keys.append((i, key))
     
-    #~ if have keys to get frm redis, batch them
+    #~ if have keys to get frm redis, batch them: mget + every ttl in 1 round trip
     if redis_keys:
-        idx_map = {key: i for i, (idx, key) in enumerate(redis_keys)}
-        r_values = redis_client.mget([k for _, k in redis_keys])
+        pipe = redis_binary_client.pipeline(transaction=False)
+        pipe.mget([k for _, k in redis_keys])
+        for _, k in redis_keys:
+            pipe.ttl(k)
+        started = time.perf_counter()
+        r_values, *ttls = pipe.execute()
+        cache_metrics.record_latency([k for _, k in redis_keys], time.perf_counter() - started)
         
         for i, val in enumerate(r_values):
             orig_idx = redis_keys[i][0]
             orig_key = redis_keys[i][1]
             
-            if val:
-                try:
-                    parsed = json.loads(val)
-                    result[orig_idx] = parsed
-                    ttl = redis_client.ttl(orig_key)
-                    if ttl > 0:
-                        _local_cache[orig_key] = parsed
-                        _local_cache_expiry[orig_key] = time.time() + min(ttl, 3600)
-                except:
-                    result[orig_idx] = val
+            parsed = _MISSING if val is None else _parse_cached(orig_key, val)
+            if parsed is _MISSING:
+                cache_metrics.incr(orig_key, 'misses')
+            else:
+                cache_metrics.incr(orig_key, 'redis_hits')
+                cache_metrics.incr(orig_key, 'bytes_read', len(val))
+                result[orig_idx] = parsed
+                ttl = ttls[i]
+                if ttl > 0:
+                    local_cache.set(orig_key, parsed, _local_ttl(ttl), size=len(val))
     
     return result
 
+def _stable_args_hash(args, kwargs):
+    #~ sha1 of canonical json; unlike hash() it's identical across processes & restarts
+    payload = json.dumps([list(args), sorted(kwargs.items())], default=str, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def _run_in_background(fn):
+    #~ carry flask app context into thread if caller had one (cached fns often hit db)
+    try:
+        from flask import current_app, has_app_context
+        app = current_app._get_current_object() if has_app_context() else None
+    except ImportError:
+        app = None
+    def target():
+        if app is None:
+            return fn()
+        with app.app_context():
+            return fn()
+    threading.Thread(target=target, daemon=True).start()
+
 #& decorator fr caching function results
-def redis_cache(prefix, ttl=3600):
-    """Decorator to cache function results in Redis"""
+def redis_cache(prefix, ttl=3600, stale_ttl=0, lock_timeout=30, wait_timeout=5):
+    """
+    Decorator to cache function results in Redis, shared by all workers.
+
+    Only 1 worker recomputes a missing / expired entry (redis lock); others wait fr its
+    result up to wait_timeout secs, then compute themselves.
+
+    Args:
+        prefix: Key namespace
+        ttl: Secs a result is fresh
+        stale_ttl: If > 0, secs past ttl a stale result is still served while 1 worker
+                   refreshes it in the background (stale-while-revalidate)
+        lock_timeout: Secs before a recompute lock is considered abandoned
+        wait_timeout: Max secs to wait on another worker's recompute
+    """
     def decorator(func):
+        def cache_key(*args, **kwargs):
+            return f"{prefix}:{func.__name__}:{_stable_args_hash(args, kwargs)}"
+
+        def recompute(key, args, kwargs):
+            cache_metrics.incr(key, 'recomputes')
+            result = func(*args, **kwargs)
+            #~ envelope records freshness so stale entries can still be served
+            set_cached(key, {'value': result, 'fresh_until': time.time() + ttl}, ex=ttl + stale_ttl)
+            return result
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            #~ create cache key frm function name & args
-            key = f"{prefix}:{func.__name__}:{hash(str(args)+str(sorted(kwargs.items())))}"
-            
-            #~ try get frm cache 1st
+            key = cache_key(*args, **kwargs)
+            lock = redis_client.lock(f"{key}:lock", timeout=lock_timeout, blocking=False, thread_local=False)
+
+            cached = get_cached(key)
+            if isinstance(cached, dict) and cached.get('fresh_until', 0) <= time.time():
+                #~ local copy aged out, another worker may already have refreshed redis
+                local_cache.delete(key)
+                cached = get_cached(key)
+            if isinstance(cached, dict) and 'fresh_until' in cached:
+                if cached['fresh_until'] > time.time():
+                    return cached['value']
+                if stale_ttl:
+                    #~ serve stale, exactly 1 worker refreshes in bg
+                    if lock.acquire():
+                        def refresh():
+                            try:
+                                recompute(key, args, kwargs)
+                            except Exception as e:
+                                logging.warning("background refresh of %s failed: %s", key, e)
+                            finally:
+                                _release(lock)
+                        _run_in_background(refresh)
+                    cache_metrics.incr(key, 'stale_served')
+                    return cached['value']
+
+            #~ single-flight: lock holder recomputes, others poll fr its result
+            if lock.acquire():
+                try:
+                    return recompute(key, args, kwargs)
+                finally:
+                    _release(lock)
+            deadline = time.time() + wait_timeout
+            while time.time() < deadline:
+                time.sleep(0.05)
+                local_cache.delete(key)  #~ only redis can show the other worker's fresh result
+                cached = get_cached(key)
+                if isinstance(cached, dict) and cached.get('fresh_until', 0) > time.time():
+                    return cached['value']
+            return recompute(key, args, kwargs)
+
+        wrapper.cache_key = cache_key
+        return wrapper
+    return decorator
+
+def _release(lock):
+    try:
+        lock.release()
+    except redis.exceptions.LockError:
+        pass  #~ expired & possibly taken by another worker; nothing to release
+
+#& per-user data version: bumped on every ingest that lands new plays
+#~ results keyed on it stay valid until next sync; TTL only garbage-collects superseded versions
+VERSIONED_CACHE_GC_TTL = timedelta(days=7)
+
+def data_version_key(user_id):
+    return f"user_data_version:{user_id}"
+
+def _seed_data_version(pipe, key):
+    #~ counter only lives in redis, so it can be evicted / flushed; a missing one restarts frm
+    #~ the ms clock (nt 0), above any version handed out bef unless it was bumped more than
+    #~ once per ms since, so old versioned entries & snapshot files are never valid again
+    now = time.time()
+    pipe.hsetnx(key, 'version', int(now * 1000))
+    pipe.hsetnx(key, 'updated_at', int(now))
+
+def get_data_version(user_id):
+    """Current data version fr user (always read frm redis, never local cache)"""
+    key = data_version_key(user_id)
+    pipe = redis_client.pipeline()
+    _seed_data_version(pipe, key)
+    pipe.hget(key, 'version')
+    return int(pipe.execute()[-1])
+
+def get_data_version_info(user_id):
+    """(version, updated_at epoch secs) fr user in 1 round trip"""
+    key = data_version_key(user_id)
+    pipe = redis_client.pipeline()
+    _seed_data_version(pipe, key)
+    pipe.hmget(key, 'version', 'updated_at')
+    version, updated_at = pipe.execute()[-1]
+    return int(version), int(updated_at)
+
+def bump_data_version(user_id):
+    """Increment user data version & record when; call after new plays are committed"""
+    key = data_version_key(user_id)
+    pipe = redis_client.pipeline()
+    _seed_data_version(pipe, key)
+    pipe.hincrby(key, 'version', 1)
+    pipe.hset(key, 'updated_at', int(time.time()))
+    version = pipe.execute()[2]
+    return version
+
+def versioned_key(namespace, user_id, *parts, version=None):
+    """Cache key tied to user data version, e.g. analytics_trends:42:v17:daily:30"""
+    if version is None:
+        version = get_data_version(user_id)
+    suffix = ':'.join(str(part) for part in parts)
+    key = f"{namespace}:{user_id}:v{version}"
+    return f"{key}:{suffix}" if suffix else key
+
+def versioned_cache(namespace, per_day=False):
+    """
+    Decorator caching f(user_id, *args, **kwargs) until user's data version changes.
+    per_day=True also keys on current utc date, fr results w windows relative to now.
+    """
+    def decorator(func):
+        def cache_key(user_id, *args, version=None, **kwargs):
+            parts = list(args) + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+            if per_day:
+                parts.append(time.strftime('%Y%m%d', time.gmtime()))
+            return versioned_key(namespace, user_id, *parts, version=version)
+
+        @wraps(func)
+        def wrapper(user_id, *args, **kwargs):
+            key = cache_key(user_id, *args, **kwargs)
             cached_result = get_cached(key)
             if cached_result is not None:
                 return cached_result
-            
-            #~ if not in cache, call function
-            result = func(*args, **kwargs)
-            
-            #~ cache result
-            set_cached(key, result, ex=ttl)
-            
+            result = func(user_id, *args, **kwargs)
+            set_cached(key, result, ex=VERSIONED_CACHE_GC_TTL)
             return result
+        #~ exposed so callers computing in bulk (e.g. analytics bundle) share same entries
+        wrapper.cache_key = cache_key
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
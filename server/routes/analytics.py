@@ -3,16 +3,25 @@ from server.services.analytics_service import (
     get_listening_trends, 
     get_listening_heatmap,
     get_genre_distribution,
-    get_artist_genre_matrix
+    get_artist_genre_matrix,
+    get_analytics_bundle,
+    BUNDLE_SECTIONS
 )
-from server.routes.home import get_longest_listening_streak, get_top_listeners_percentile
-from server.extensions import db
-from server.model import ListeningHistory
-from sqlalchemy import func
+from server.services.listening_snapshot import load_snapshot
+from server.services.artist_listeners import get_leaderboard, get_listener_rank, count_listeners
+from datetime import datetime
+from server.http_cache import conditional_get, HOURLY, DAILY
+from server.sparse_fields import parse_fields, unknown_fields, prune, wants
+from server.services.listening_streak import STREAK_RESULT_FIELDS
+from server.routes.home import get_longest_listening_streak, get_top_listeners_percentile, is_percentile_provisional
 
 analytics_bp = Blueprint('analytics', __name__)
 
+#~ keys of the cached listening summary part of the streak payload
+STREAK_SUMMARY_FIELDS = ('total_minutes', 'biggest_listening_day', 'total_tracks', 'monthly_hours')
+
 @analytics_bp.route('/user/listening-trends', methods=['GET'])
+@conditional_get(DAILY)
 def listening_trends_endpoint():
     """
     Get listening trends data for visualization.
@@ -44,6 +53,7 @@ def listening_trends_endpoint():
         return jsonify({'error': 'Failed to fetch listening trends'}), 500
 
 @analytics_bp.route('/user/listening-heatmap', methods=['GET'])
+@conditional_get(DAILY)
 def listening_heatmap_endpoint():
     """
     Get listening heatmap data showing activity by day of week and hour.
@@ -70,6 +80,7 @@ def listening_heatmap_endpoint():
         return jsonify({'error': 'Failed to fetch listening heatmap'}), 500
     
 @analytics_bp.route('/user/genre-distribution', methods=['GET'])
+@conditional_get(DAILY)
 def genre_distribution_endpoint():
     """
     Get genre distribution data for visualization.
@@ -96,17 +107,20 @@ def genre_distribution_endpoint():
         return jsonify({'error': 'Failed to fetch genre distribution'}), 500
 
 @analytics_bp.route('/user/artist-genre-matrix', methods=['GET'])
+@conditional_get(DAILY)
 def artist_genre_matrix_endpoint():
     """
     Get artist-genre matrix data for chord diagram visualization.
     Query params:
         user_id: User ID
         time_range: 'short_term', 'medium_term', or 'long_term' (default 'medium_term')
-        limit: Number of artists to include (default 10)
+        limit: Number of artists to include (default 10, max 50)
+        mode: 'genre' (artist-genre edges) or 'colistening' (artist-artist edges) (default 'genre')
     """
     user_id = request.args.get('user_id')
     time_range = request.args.get('time_range', 'medium_term')
     limit = request.args.get('limit', 10, type=int)
+    mode = request.args.get('mode', 'genre')
     
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
@@ -116,20 +130,28 @@ def artist_genre_matrix_endpoint():
     except ValueError:
         return jsonify({'error': 'Invalid user_id format'}), 400
     
+    if mode not in ['genre', 'colistening']:
+        return jsonify({'error': 'Invalid mode. Must be genre or colistening'}), 400
+    #~ spotify top artists page caps at 50
+    limit = max(1, min(limit, 50))
+    
     try:
-        matrix_data = get_artist_genre_matrix(user_id, time_range, limit)
+        matrix_data = get_artist_genre_matrix(user_id, time_range, limit, mode)
         return jsonify(matrix_data)
     except Exception as e:
         print(f"Error fetching artist-genre matrix: {str(e)}")
         return jsonify({'error': 'Failed to fetch artist-genre matrix'}), 500
     
 @analytics_bp.route('/user/listening-streak', methods=['GET'])
+@conditional_get(DAILY)
 def listening_streak_endpoint():
     """
     Get longest listening streak data including total minutes, biggest day,
     total tracks played, and monthly listening hours.
     Query params:
         user_id: User ID
+        fields: Optional comma-separated keys to return; summary / streak parts
+                not requested are skipped
     """
     user_id = request.args.get('user_id')
     
@@ -141,14 +163,24 @@ def listening_streak_endpoint():
     except ValueError:
         return jsonify({'error': 'Invalid user_id format'}), 400
         
+    fields = parse_fields(request.args.get('fields'))
+    invalid = unknown_fields(fields, STREAK_SUMMARY_FIELDS + STREAK_RESULT_FIELDS)
+    if invalid:
+        return jsonify({'error': f"Invalid fields: {', '.join(invalid)}"}), 400
+        
     try:
-        streak_data = get_longest_listening_streak(user_id)
-        return jsonify(streak_data)
+        streak_data = get_longest_listening_streak(
+            user_id,
+            include_summary=any(wants(fields, field) for field in STREAK_SUMMARY_FIELDS),
+            include_streak=any(wants(fields, field) for field in STREAK_RESULT_FIELDS)
+        )
+        return jsonify(prune(streak_data, fields))
     except Exception as e:
         print(f"Error fetching listening streak data: {str(e)}")
         return jsonify({'error': 'Failed to fetch listening streak data'}), 500
     
 @analytics_bp.route('/user/top-listeners-percentile', methods=['GET'])
+@conditional_get(HOURLY)
 def top_listeners_percentile_endpoint():
     """
     Get percentile ranking for user among listeners of favorite artist.
@@ -169,14 +201,93 @@ def top_listeners_percentile_endpoint():
         print(f"calling get_top_listeners_percentile with user_id={user_id}")
         result = get_top_listeners_percentile(user_id)
         print(f"result type: {type(result)}")
-        return jsonify(result)
+        response = jsonify(result)
+        if is_percentile_provisional(result):
+            #~ fallback / still-backfilling payload must not be revalidated fr the rest of the hour
+            response.headers['Cache-Control'] = 'no-store'
+        return response
     except Exception as e:
         import traceback
         print(f"error fetching top listeners percentile data: {str(e)}")
         print(traceback.format_exc())
         return jsonify({'error': 'failed to fetch top listeners percentile data'}), 500
     
+@analytics_bp.route('/artist/leaderboard', methods=['GET'])
+def artist_leaderboard_endpoint():
+    """
+    Get top listeners of an artist, plus requesting user's standing.
+    Query params:
+        artist: Artist name
+        limit: Number of leaders (default 10, max 100)
+        user_id: Optional user ID to include their rank & percentile
+    """
+    artist = (request.args.get('artist') or '').strip()
+    limit = request.args.get('limit', 10, type=int)
+    user_id = request.args.get('user_id')
+    
+    if not artist:
+        return jsonify({'error': 'artist is required'}), 400
+    limit = max(1, min(limit, 100))
+    if user_id:
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid user_id format'}), 400
+    
+    try:
+        result = get_leaderboard(artist, limit)
+        result['artist'] = artist
+        if user_id:
+            standing = get_listener_rank(artist, user_id)
+            total = standing['total_listeners']
+            result['user'] = {
+                'listens': standing['listens'],
+                'rank': standing['rank'],
+                'percentile': round(standing['below'] / total * 100) if standing['listens'] and total else 0
+            }
+        return jsonify(result)
+    except Exception as e:
+        print(f"Error fetching artist leaderboard: {str(e)}")
+        return jsonify({'error': 'Failed to fetch artist leaderboard'}), 500
+
+@analytics_bp.route('/artist/listeners', methods=['GET'])
+def artist_listeners_endpoint():
+    """
+    Get approximate distinct listener count fr an artist.
+    Query params:
+        artist: Artist name
+        start, end: Optional inclusive month range as YYYY-MM (max 10 years); omit fr all-time
+    """
+    artist = (request.args.get('artist') or '').strip()
+    start = request.args.get('start')
+    end = request.args.get('end')
+    
+    if not artist:
+        return jsonify({'error': 'artist is required'}), 400
+    try:
+        start_date = datetime.strptime(start, '%Y-%m') if start else None
+        end_date = datetime.strptime(end, '%Y-%m') if end else None
+    except ValueError:
+        return jsonify({'error': 'Invalid month format. Use YYYY-MM'}), 400
+    if start_date and end_date:
+        span = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month
+        if span < 0 or span >= 120:
+            return jsonify({'error': 'Invalid range. end must be after start & within 10 years'}), 400
+    
+    try:
+        return jsonify({
+            'artist': artist,
+            'start': start,
+            'end': end,
+            'listeners': count_listeners(artist, start, end),
+            'approximate': True
+        })
+    except Exception as e:
+        print(f"Error fetching artist listener count: {str(e)}")
+        return jsonify({'error': 'Failed to fetch artist listener count'}), 500
+
 @analytics_bp.route('/user/earliest-listening-date', methods=['GET'])
+@conditional_get()
 def earliest_listening_date_endpoint():
     """
     Get the earliest date from user's listening history.
@@ -194,12 +305,8 @@ def earliest_listening_date_endpoint():
         return jsonify({'error': 'Invalid user_id format'}), 400
     
     try:
-        #~ earliest played_at date query
-        earliest_record = db.session.query(
-            func.min(ListeningHistory.played_at)
-        ).filter(
-            ListeningHistory.user_id == user_id
-        ).scalar()
+        #~ snapshot is sorted by played_at, earliest is 1st row
+        earliest_record = load_snapshot(user_id).earliest_played_at()
         
         if earliest_record:
             return jsonify({
@@ -211,4 +318,71 @@ def earliest_listening_date_endpoint():
             })
     except Exception as e:
         print(f"Error fetching earliest listening date: {str(e)}")
-        return jsonify({'error': 'Failed to fetch earliest listening date'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to fetch earliest listening date'}), 500
+
+@analytics_bp.route('/user/bundle', methods=['GET'])
+@conditional_get(HOURLY)
+def analytics_bundle_endpoint():
+    """
+    Get several analytics sections in one response, computed frm a single data load.
+    Query params:
+        user_id: User ID
+        sections: Comma-separated list of trends, heatmap, genres, matrix, streak,
+                  percentile, earliest (default all)
+        time_frame, days: Options fr trends (default 'daily', 30)
+        heatmap_days: Option fr heatmap (default 90)
+        time_range: Option fr genres & matrix (default 'medium_term')
+        limit, mode: Options fr matrix (default 10, 'genre')
+        fields: Optional sparse fieldset, e.g. streak.total_minutes,percentile;
+                overrides sections (top-level names pick the sections)
+    """
+    user_id = request.args.get('user_id')
+    sections_param = request.args.get('sections')
+    fields = parse_fields(request.args.get('fields'))
+    time_frame = request.args.get('time_frame', 'daily')
+    days = request.args.get('days', 30, type=int)
+    heatmap_days = request.args.get('heatmap_days', 90, type=int)
+    time_range = request.args.get('time_range', 'medium_term')
+    limit = request.args.get('limit', 10, type=int)
+    mode = request.args.get('mode', 'genre')
+    
+    if not user_id:
+        return jsonify({'error': 'user_id is required'}), 400
+        
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid user_id format'}), 400
+    
+    if fields is not None:
+        sections = list(fields)
+    elif sections_param:
+        sections = [s.strip() for s in sections_param.split(',') if s.strip()]
+    else:
+        sections = list(BUNDLE_SECTIONS)
+    invalid = [s for s in sections if s not in BUNDLE_SECTIONS]
+    if invalid:
+        return jsonify({'error': f"Invalid sections: {', '.join(invalid)}"}), 400
+    if time_frame not in ['daily', 'weekly', 'monthly']:
+        return jsonify({'error': 'Invalid time_frame. Must be daily, weekly, or monthly'}), 400
+    if mode not in ['genre', 'colistening']:
+        return jsonify({'error': 'Invalid mode. Must be genre or colistening'}), 400
+    limit = max(1, min(limit, 50))
+    
+    try:
+        bundle = get_analytics_bundle(
+            user_id, sections,
+            time_frame=time_frame, days=days, heatmap_days=heatmap_days,
+            time_range=time_range, limit=limit, mode=mode
+        )
+        if 'percentile' in sections:
+            bundle['percentile'] = get_top_listeners_percentile(user_id)
+        response = jsonify(prune(bundle, fields, always=('errors',)))
+        if bundle.get('errors') or is_percentile_provisional(bundle.get('percentile')):
+            #~ failed sections must not be revalidated as if complete (same as partial home data)
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        print(f"Error fetching analytics bundle: {str(e)}")
+        return jsonify({'error': 'Failed to fetch analytics bundle'}), 500
+
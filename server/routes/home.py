@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from server.services.analytics_service import (
     get_listening_trends,
     get_listening_heatmap,
@@ -7,183 +7,161 @@ from server.services.analytics_service import (
 )
 from server.extensions import db
 from server.model import ListeningHistory, SavedEvent, Event, User
-from sqlalchemy import func, desc, and_
+from sqlalchemy import func, or_
 from datetime import datetime, timedelta, timezone
 import json
-from server.redis_client import redis_client, get_cached, set_cached, redis_cache, batch_get
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
+from server.redis_client import (
+    redis_client,
+    redis_cache,
+    batch_get,
+    versioned_cache
+)
+from server.services.listening_snapshot import load_snapshot
+from server.http_cache import conditional_get, HOURLY
+from server.sparse_fields import parse_fields, unknown_fields, prune, wants
+from server.services.artist_listeners import get_listener_rank, split_artists
+from server.services.listening_streak import get_streak
+from server.services.genre_rollup import get_genre_evolution
+from server.services.top_buckets import (
+    get_window_top_data,
+    is_primed as top_buckets_primed,
+    schedule_prime as schedule_top_buckets_prime
+)
 
 home_bp = Blueprint('home', __name__)
 
-def get_time_frame_data(user_id, days):
+#& home page time frames (days)
+TIME_FRAMES = {
+    '1_month': 30,
+    '3_months': 90,
+    '6_months': 180,
+    '1_year': 365
+}
+
+def _ranked_windows(group_columns, user_id, starts, limit):
     """
-    Returns top songs and top artists for a given time frame (in days)
+    Count plays per group fr every window in 1 scan & rank within each window.
+    Uses count(*) FILTER (WHERE played_at >= start) per window + row_number() per window.
+
+    Returns:
+        (rows, count_labels, rank_labels) where rows carry group columns + per-window counts & ranks
     """
-    #& time frame start date
-    start_date = datetime.now(timezone.utc) - timedelta(days=days)
-
-    #& top songs query: track grouping (track_id, track_name, artist, artwork_url)
-    top_songs_query = (
-        db.session.query(
-            ListeningHistory.track_id,
-            ListeningHistory.track_name,
-            ListeningHistory.artist,
-            ListeningHistory.artwork_url,
-            func.count(ListeningHistory.id).label('play_count')
-        )
-        .filter(ListeningHistory.user_id == user_id, ListeningHistory.played_at >= start_date)
-        .group_by(ListeningHistory.track_id, ListeningHistory.track_name, ListeningHistory.artist, ListeningHistory.artwork_url)
-        .order_by(func.count(ListeningHistory.id).desc())
-        .limit(10)
-        .all()
+    count_labels = [f'count_{i}' for i in range(len(starts))]
+    rank_labels = [f'rank_{i}' for i in range(len(starts))]
+    window_counts = [
+        func.count(ListeningHistory.id).filter(ListeningHistory.played_at >= start).label(label)
+        for start, label in zip(starts, count_labels)
+    ]
+    #~ single scan over widest window
+    counts = (
+        db.session.query(*group_columns, *window_counts)
+        .filter(ListeningHistory.user_id == user_id, ListeningHistory.played_at >= min(starts))
+        .group_by(*group_columns)
+        .subquery()
     )
-    top_songs = [
-        {
-            'track_id': row.track_id,
-            'track_name': row.track_name,
-            'artist': row.artist,
-            'artwork_url': row.artwork_url,
-            'play_count': row.play_count
-        }
-        for row in top_songs_query
+    window_ranks = [
+        func.row_number().over(order_by=counts.c[count_label].desc()).label(rank_label)
+        for count_label, rank_label in zip(count_labels, rank_labels)
     ]
-
-    #& top artists query: artist grouping
-    top_artists_query = (
-        db.session.query(
-            ListeningHistory.artist,
-            func.count(ListeningHistory.id).label('play_count')
-        )
-        .filter(ListeningHistory.user_id == user_id, ListeningHistory.played_at >= start_date)
-        .group_by(ListeningHistory.artist)
-        .order_by(func.count(ListeningHistory.id).desc())
-        .limit(10)
+    ranked = db.session.query(counts, *window_ranks).subquery()
+    rows = (
+        db.session.query(ranked)
+        .filter(or_(*[ranked.c[rank_label] <= limit for rank_label in rank_labels]))
         .all()
     )
-    top_artists = [
-        {
-            'artist': row.artist,
-            'play_count': row.play_count
-        }
-        for row in top_artists_query
-    ]
-    return top_songs, top_artists
+    return rows, count_labels, rank_labels
+
+def _split_windows(rows, labels, count_labels, rank_labels, limit, to_dict):
+    #~ rebuild per-window top lists frm combined rows
+    #~ rows ranked <= limit in any window come back, so each window keeps only its own top ranks
+    result = {}
+    for label, count_label, rank_label in zip(labels, count_labels, rank_labels):
+        window_rows = [row for row in rows if getattr(row, count_label) and getattr(row, rank_label) <= limit]
+        window_rows.sort(key=lambda row: getattr(row, rank_label))
+        result[label] = [to_dict(row, getattr(row, count_label)) for row in window_rows]
+    return result
 
-def get_longest_listening_streak(user_id):
+def get_multi_window_top_data(user_id, time_frames=TIME_FRAMES, limit=10):
     """
-    Compute longest listening streak data for the user.
-    Total minutes listened, biggest listening day, total tracks played, monthly hours listened.
+    Returns top songs and top artists for every time frame (label -> days) w 2 queries total
     """
-    #& total mins listened + total tracks played (over all time)
-    total_duration = db.session.query(func.sum(ListeningHistory.duration))\
-        .filter(ListeningHistory.user_id == user_id).scalar() or 0
-    total_tracks = db.session.query(func.count(ListeningHistory.id))\
-        .filter(ListeningHistory.user_id == user_id).scalar() or 0
-    total_minutes = total_duration // 60
-
-    #& biggest listening day: group by date (ignore time) and sum durations, then pick max
-    biggest_day = (
-        db.session.query(
-            func.date(ListeningHistory.played_at).label('play_date'),
-            func.sum(ListeningHistory.duration).label('total_duration')
-        )
-        .filter(ListeningHistory.user_id == user_id)
-        .group_by(func.date(ListeningHistory.played_at))
-        .order_by(func.sum(ListeningHistory.duration).desc())
-        .first()
+    #& window start dates
+    now = datetime.now(timezone.utc)
+    labels = list(time_frames)
+    starts = [now - timedelta(days=time_frames[label]) for label in labels]
+
+    #& top songs: track grouping (track_id, track_name, artist, artwork_url)
+    song_rows, count_labels, rank_labels = _ranked_windows(
+        [ListeningHistory.track_id, ListeningHistory.track_name, ListeningHistory.artist, ListeningHistory.artwork_url],
+        user_id, starts, limit
     )
-    biggest_listening_day = biggest_day.play_date.isoformat() if biggest_day else None
-
-    #& monthly hours listened: group by year-month
-    #~ store to_char expression in variable & use in both SELECT & GROUP BY
-    month_expr = func.to_char(ListeningHistory.played_at, 'YYYY-MM')
-    monthly_hours_query = (
-        db.session.query(
-            month_expr.label('month'),
-            func.sum(ListeningHistory.duration).label('total_duration')
-        )
-        .filter(ListeningHistory.user_id == user_id)
-        .group_by(month_expr)
-        .order_by('month')
-        .all()
+    top_songs = _split_windows(song_rows, labels, count_labels, rank_labels, limit, lambda row, play_count: {
+        'track_id': row.track_id,
+        'track_name': row.track_name,
+        'artist': row.artist,
+        'artwork_url': row.artwork_url,
+        'play_count': play_count
+    })
+
+    #& top artists: artist grouping
+    artist_rows, count_labels, rank_labels = _ranked_windows(
+        [ListeningHistory.artist], user_id, starts, limit
     )
-    monthly_hours = {row.month: round(row.total_duration / 3600, 2) for row in monthly_hours_query}
+    top_artists = _split_windows(artist_rows, labels, count_labels, rank_labels, limit, lambda row, play_count: {
+        'artist': row.artist,
+        'play_count': play_count
+    })
+    return top_songs, top_artists
 
-    return {
-        'total_minutes': total_minutes,
-        'biggest_listening_day': biggest_listening_day,
-        'total_tracks': total_tracks,
-        'monthly_hours': monthly_hours
-    }
+@versioned_cache('streak')
+def get_listening_summary(user_id):
+    """
+    Total minutes listened, biggest listening day, total tracks played, monthly hours listened.
+    """
+    #~ vectorised over user's columnar snapshot; cached until next sync lands plays
+    return load_snapshot(user_id).listening_summary()
+
+def get_longest_listening_streak(user_id, include_summary=True, include_streak=True):
+    """
+    Compute longest listening streak data for the user.
+    Listening summary plus longest & current consecutive-day streaks (O(1) frm ingest-maintained state).
+    """
+    data = {}
+    if include_summary:
+        data.update(get_listening_summary(user_id))
+    if include_streak:
+        data.update(get_streak(user_id))
+    return data
 
 def get_favorite_genres_evolution(user_id):
     """
     Return data most suited for the stream graph (show user's most listened-to genres over time).
-    Grp by genre and by month.
+    Read frm monthly genre rollup (kept current at ingest), top genres per month + 'other'.
     """
-    #& grp by year-month genre, sum durations
-    #~ store month expression in variable so can be reused in GROUP BY
-    month_expr = func.to_char(ListeningHistory.played_at, 'YYYY-MM')
-    genre_data = (
-        db.session.query(
-            month_expr.label('month'),
-            ListeningHistory.genre,
-            func.sum(ListeningHistory.duration).label('total_duration')
-        )
-        .filter(ListeningHistory.user_id == user_id)
-        .group_by(month_expr, ListeningHistory.genre)
-        .order_by('month')
-        .all()
-    )
-    #& transform structure, ref: [{ month: '2025-01', genres: { Pop: hours, Rock: hours, ... } }, ...]
-    evolution = {}
-    for row in genre_data:
-        month = row.month
-        genre = row.genre
-        hours = round(row.total_duration / 3600, 2)
-        if month not in evolution:
-            evolution[month] = {}
-        evolution[month][genre] = hours
-    #& convert dict - list of obj for each month
-    evolution_list = [{"month": month, "genres": genres} for month, genres in evolution.items()]
-    return evolution_list
+    return get_genre_evolution(user_id)
+
+#~ percentile_confidence of the fallback payload returned when ranking fails
+PERCENTILE_ERROR = 'error'
 
 def get_top_listeners_percentile(user_id):
     """
-    Compute accurate percentile ranking for user among listeners of their favorite artist.
+    Compute percentile ranking for user among listeners of their favorite artist.
     
-    This production implementation:
-    1. Determines user's top artists with proper weighting for recency
-    2. Calculates actual percentile ranking against other users
-    3. Incorporates additional engagement signals beyond play counts
-    4. Implements caching for performance optimization
-    5. Handles edge cases and provides fallback values when needed
+    Favorite artist comes frm the user's listening snapshot; ranking is read frm the
+    artist's redis leaderboard (kept current at ingest), so result is always fresh
+    & costs O(log n) regardless of how many users listen to the artist.
     
     Returns:
         Dictionary containing percentile ranking, favorite artist info, and additional metrics
     """
     try:
-        #& check cache 1st - using local+redis caching system
-        cache_key = f"top_listener_percentile:{user_id}"
-        cached_result = get_cached(cache_key)
-        if cached_result:
-            return cached_result  #~ now handles json parsing internally
-        
-        now = datetime.now(timezone.utc)
-
-        #~ determine user's top artists based on listening history
-        artist_query = db.session.query(
-            ListeningHistory.artist,
-            func.count(ListeningHistory.id).label('total_listens'),
-            func.max(ListeningHistory.played_at).label('latest_listen')
-        ).filter(
-            ListeningHistory.user_id == user_id
-        ).group_by(
-            ListeningHistory.artist
-        ).order_by(
-            desc('total_listens')
-        ).limit(5).all()
-
-        if not artist_query:
+        artist_rows = load_snapshot(user_id).top_artists(limit=5)
+
+        if not artist_rows:
             return {
                 'percentile_ranking': 0,
                 'favorite_artist': "Unknown Artist",
@@ -191,120 +169,210 @@ def get_top_listeners_percentile(user_id):
                 'percentile_confidence': "low"
             }
 
-        favorite_artist_row = artist_query[0]
-        favorite_artist_full = favorite_artist_row.artist
-        if ',' in favorite_artist_full:
-            favorite_artist = favorite_artist_full.split(',')[0].strip()
-        else:
-            favorite_artist = favorite_artist_full
-        
-        #~ get user's raw listen count fr this artist
-        user_listen_count = favorite_artist_row.total_listens
+        favorite_artist = split_artists(artist_rows[0]['artist'])[0]
+        standing = get_listener_rank(favorite_artist, user_id)
+        total_listeners = standing['total_listeners']
 
-        #~ calculate saved tracks count fr this artist frm SavedEvent
+        #~ user's own saved events fr this artist
         saved_tracks_count = db.session.query(func.count(SavedEvent.id)).join(
             Event, SavedEvent.event_id == Event.id
         ).filter(
-            and_(
-                SavedEvent.user_id == user_id,
-                Event.target_artist_interest.ilike(f"%{favorite_artist}%")
-            )
+            SavedEvent.user_id == user_id,
+            Event.target_artist_interest.ilike(f"%{favorite_artist}%")
         ).scalar() or 0
 
-        #~ query all users who listened to this artist
-        all_listeners_query = db.session.query(
-            ListeningHistory.user_id,
-            func.count(ListeningHistory.id).label('listen_count')
-        ).filter(
-            ListeningHistory.artist.ilike(f"%{favorite_artist}%")
-        ).group_by(
-            ListeningHistory.user_id
-        ).all()
-
-        total_listeners = len(all_listeners_query)
-        
+        #~ rank = 1 + number of listeners strictly below user
+        user_rank = standing['below'] + 1
         if total_listeners < 10:
             confidence = "low"
             if total_listeners <= 1:
                 percentile = 99  #~ default high percentile if they only listener
             else:
-                listen_counts = [row.listen_count for row in all_listeners_query]
-                listen_counts.sort()
-                user_rank = listen_counts.index(user_listen_count) + 1
                 percentile = (user_rank / total_listeners) * 100
         else:
-            #~ calculate combined engagement score (listens + saved events)
-            engagement_scores = []
-            for listener in all_listeners_query:
-                other_user_id = listener.user_id
-                listens = listener.listen_count
-                
-                #~ get saved tracks fr this user/artist combination
-                other_saved = db.session.query(func.count(SavedEvent.id)).join(
-                    Event, SavedEvent.event_id == Event.id
-                ).filter(
-                    and_(
-                        SavedEvent.user_id == other_user_id,
-                        Event.target_artist_interest.ilike(f"%{favorite_artist}%")
-                    )
-                ).scalar() or 0
-                
-                #~ calculate combined score (listens + saved events w 2x weight)
-                score = listens + (other_saved * 2)
-                engagement_scores.append(score)
-            
-            #~ calculate user's own engagement score
-            user_score = user_listen_count + (saved_tracks_count * 2)
-            
-            #~ calculate percentile
-            engagement_scores.sort()
-            
-            if user_score in engagement_scores:
-                user_rank = engagement_scores.index(user_score) + 1
-            else:
-                #~ insert user score in sorted list
-                insertion_point = 0
-                for i, score in enumerate(engagement_scores):
-                    if user_score <= score:
-                        insertion_point = i
-                        break
-                    insertion_point = i + 1
-                user_rank = insertion_point + 1
-            percentile = round(((user_rank - 1) / len(engagement_scores)) * 100)
+            percentile = round(((user_rank - 1) / total_listeners) * 100)
             confidence = "high" if total_listeners > 50 else "medium"
+        if standing['building']:
+            #~ backfill pending: leaderboard only holds plays seen since ingest started counting
+            confidence = "low"
 
-        result = {
+        return {
             'percentile_ranking': percentile,
             'favorite_artist': favorite_artist,
-            'total_listens': user_listen_count,
+            'total_listens': standing['listens'],
             'saved_events': saved_tracks_count,
             'total_artist_listeners': total_listeners,
             'percentile_confidence': confidence,
+            'leaderboard_building': standing['building'],
             'additional_favorites': [
                 {
-                    'artist': row.artist.split(',')[0].strip() if ',' in row.artist else row.artist,
-                    'listens': row.total_listens
-                } for row in artist_query[1:5] if row
+                    'artist': split_artists(row['artist'])[0],
+                    'listens': row['play_count']
+                } for row in artist_rows[1:5]
             ]
         }
-
-        #& update redis cache only if result changed; use TTL 7 days
-        #~ use set_cached which handles both local & redis caching
-        set_cached(cache_key, result, ex=timedelta(days=7))
-        return result
     except Exception as e:
         print("exception in get_top_listeners_percentile:", e)
         return {
             'percentile_ranking': 0,
             'favorite_artist': "unknown (error occurred)",
             'total_listens': 0,
-            'percentile_confidence': "error"
+            'percentile_confidence': PERCENTILE_ERROR
         }
 
+def is_percentile_provisional(result):
+    """
+    True if get_top_listeners_percentile swallowed an error or read a leaderboard still being
+    backfilled; either way the payload must not be cached
+    """
+    return isinstance(result, dict) and (
+        result.get('percentile_confidence') == PERCENTILE_ERROR or bool(result.get('leaderboard_building'))
+    )
+
+def get_home_top_lists(user_id, time_frames=TIME_FRAMES):
+    """
+    Top songs & artists fr home time frames.
+    Served frm redis time buckets; until user's buckets are backfilled, 1 sql pass over all time frames.
+    """
+    try:
+        if top_buckets_primed(user_id):
+            return get_window_top_data(user_id, time_frames)
+        schedule_top_buckets_prime(user_id)
+    except Exception as e:
+        print(f"top buckets unavailable fr user {user_id}: {e}")
+    return get_multi_window_top_data(user_id, time_frames)
+
+#& home page sections: name -> (fn(user_id), deadline secs)
+HOME_SECTIONS = {
+    'top_lists': (get_home_top_lists, 3.0),
+    'longest_listening_streak': (get_longest_listening_streak, 3.0),
+    'favorite_genres_evolution': (get_favorite_genres_evolution, 3.0),
+    'top_listeners': (lambda user_id: {'percentile_ranking': get_top_listeners_percentile(user_id)}, 2.0)
+}
+#& /home/data payload field -> section computing it (None: no section needed)
+HOME_FIELD_SECTIONS = {
+    'top_songs': 'top_lists',
+    'top_artists': 'top_lists',
+    'longest_listening_streak': 'longest_listening_streak',
+    'favorite_genres_evolution': 'favorite_genres_evolution',
+    'top_listeners': 'top_listeners',
+    'welcome_message': None
+}
+
+def select_home_sections(fields):
+    """
+    Sections needed fr a parsed fields selection; top lists are narrowed to requested windows.
+
+    Raises:
+        ValueError: naming any unknown field / time frame
+    """
+    if fields is None:
+        return HOME_SECTIONS
+    invalid = unknown_fields(fields, HOME_FIELD_SECTIONS)
+    if invalid:
+        raise ValueError(f"Invalid fields: {', '.join(invalid)}")
+    sections = {
+        HOME_FIELD_SECTIONS[name]: HOME_SECTIONS[HOME_FIELD_SECTIONS[name]]
+        for name in fields if HOME_FIELD_SECTIONS[name]
+    }
+    if 'top_lists' in sections:
+        requested = [fields[name] for name in ('top_songs', 'top_artists') if name in fields]
+        frames = set(TIME_FRAMES) if None in requested else set().union(*requested)
+        invalid = sorted(frames - set(TIME_FRAMES))
+        if invalid:
+            raise ValueError(f"Invalid time frames: {', '.join(invalid)}")
+        time_frames = {label: days for label, days in TIME_FRAMES.items() if label in frames}
+        sections['top_lists'] = (
+            lambda user_id: get_home_top_lists(user_id, time_frames),
+            HOME_SECTIONS['top_lists'][1]
+        )
+    return sections
+
+#~ bounded so a burst of home loads cant open unbounded db connections
+HOME_SECTION_WORKERS = int(os.environ.get('HOME_SECTION_WORKERS', 8))
+#~ max sections queued or running at once (overrunning ones included); past it new sections
+#~ are shed & reported as timed out instead of queueing behind work nobody is waiting on
+HOME_SECTION_BACKLOG = int(os.environ.get('HOME_SECTION_BACKLOG', HOME_SECTION_WORKERS * 2))
+_section_executor = ThreadPoolExecutor(
+    max_workers=HOME_SECTION_WORKERS,
+    thread_name_prefix='home-section'
+)
+_section_slots = threading.BoundedSemaphore(HOME_SECTION_BACKLOG)
+
+def _release_section_slot(_future):
+    _section_slots.release()
+
+def _run_section(app, fn, user_id):
+    #~ own app context => own scoped db session, removed on context teardown
+    with app.app_context():
+        return fn(user_id)
+
+def submit_home_sections(user_id, sections):
+    """
+    Start sections on the shared pool.
+
+    Returns:
+        {name: (future, deadline)}; future is None fr a section shed bc the backlog is full
+    """
+    app = current_app._get_current_object()
+    futures = {}
+    for name, (fn, deadline) in sections.items():
+        if not _section_slots.acquire(blocking=False):
+            print(f"home section {name} shed fr user {user_id}: section backlog full")
+            futures[name] = (None, deadline)
+            continue
+        future = _section_executor.submit(_run_section, app, fn, user_id)
+        #~ slot freed when section finishes / is cancelled, nt when the request stops waiting
+        future.add_done_callback(_release_section_slot)
+        futures[name] = (future, deadline)
+    return futures
+
+def run_home_sections(user_id, sections):
+    """
+    Run sections concurrently, waiting on each no longer than its deadline (frm submit).
+
+    Returns:
+        (results, timed_out, failed) - results maps name to value (None if timed out / failed),
+        timed_out & failed list the sections that missed their deadline (or were shed) / raised
+    """
+    started = time.monotonic()
+    futures = submit_home_sections(user_id, sections)
+    results, timed_out, failed = {}, [], []
+    for name, (future, deadline) in futures.items():
+        if future is None:
+            timed_out.append(name)
+            results[name] = None
+            continue
+        try:
+            results[name] = future.result(timeout=max(0, deadline - (time.monotonic() - started)))
+        except FuturesTimeout:
+            #~ drop it if still queued; a running one cant be interrupted & keeps its slot till done
+            future.cancel()
+            timed_out.append(name)
+            results[name] = None
+        except Exception as e:
+            print(f"home section {name} failed fr user {user_id}: {e}")
+            failed.append(name)
+            results[name] = None
+    return results, timed_out, failed
+
+def _welcome_message(user):
+    #& display_name if avail, else fallback email
+    if user.display_name and user.display_name.strip():
+        welcome_name = user.display_name
+    else:
+        welcome_name = user.email.split('@')[0]
+    return f'Hi there, {welcome_name}! Scroll down to learn more about your music taste ⬇️'
+
 @home_bp.route('/data', methods=['GET'])
+@conditional_get(HOURLY)  #~ percentile moves w other users' plays
 def home_data():
     """
     API Endpoint to return aggregated data for Home pg
+    Query params:
+        user_id: User ID
+        fields: Optional comma-separated payload fields, e.g. welcome_message,top_songs.1_month;
+                sections not requested are never computed
     """
     user_id = request.args.get('user_id')
     if not user_id:
@@ -316,43 +384,120 @@ def home_data():
         return jsonify({'error': 'Invalid user_id'}), 400
     
     #& retrieve user record to access display name fr personalized greeting
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        sections = select_home_sections(fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     user = User.query.get(user_id)
     if not user:
         return jsonify({'error': 'user not found'}), 404
     
-    #& time frames (days)
-    time_frames = {
-        '1_month': 30,
-        '3_months': 90,
-        '6_months': 180,
-        '1_year': 365
-    }
-
-    top_songs = {}
-    top_artists = {}
-    for label, days in time_frames.items():
-        songs, artists = get_time_frame_data(user_id, days)
-        top_songs[label] = songs
-        top_artists[label] = artists
-
-    longest_streak = get_longest_listening_streak(user_id)
-    favorite_genres = get_favorite_genres_evolution(user_id)
-    top_listeners = {
-        'percentile_ranking': get_top_listeners_percentile(user_id)
-    }
-    
-    #& display_name if avail, else fallback email
-    if user.display_name and user.display_name.strip():
-        welcome_name = user.display_name
-    else:
-        welcome_name = user.email.split('@')[0]
+    #& sections run concurrently; any that overrun their deadline come back as None
+    results, timed_out, failed = run_home_sections(user_id, sections)
+    top_songs, top_artists = results.get('top_lists') or (None, None)
+    #~ percentile errors / unfinished leaderboards still come back as a "successful" section
+    percentile_provisional = is_percentile_provisional((results.get('top_listeners') or {}).get('percentile_ranking'))
     
     data = {
         'top_songs': top_songs,
         'top_artists': top_artists,
-        'longest_listening_streak': longest_streak,
-        'favorite_genres_evolution': favorite_genres,
-        'top_listeners': top_listeners,
-        'welcome_message': f'Hi there, {welcome_name}! Scroll down to learn more about your music taste ⬇️'
+        'longest_listening_streak': results.get('longest_listening_streak'),
+        'favorite_genres_evolution': results.get('favorite_genres_evolution'),
+        'top_listeners': results.get('top_listeners'),
+        'welcome_message': _welcome_message(user),
+        'partial': bool(timed_out or failed or percentile_provisional),
+        'timed_out': timed_out,
+        'failed': failed
     }
-    return jsonify(data)
\ No newline at end of file
+    response = jsonify(prune(data, fields, always=('partial', 'timed_out', 'failed')))
+    if data['partial']:
+        #~ partial payload must not be revalidated as if complete
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
+#& sse event names per home section
+HOME_SECTION_EVENTS = {
+    'top_lists': ('top_songs', 'top_artists'),
+    'longest_listening_streak': ('streak',),
+    'favorite_genres_evolution': ('genres',),
+    'top_listeners': ('percentile',)
+}
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+@home_bp.route('/data/stream', methods=['GET'])
+def home_data_stream():
+    """
+    Streaming variant of /home/data as Server-Sent Events (accepts same fields param).
+    Emits welcome, then each section (top_songs, top_artists, streak, genres, percentile)
+    as soon as it's ready - cache-served sections finish 1st so go out 1st - then 'done'
+    w the partial / timed_out / failed flags once every section has landed or hit its deadline.
+    """
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'user_id is required'}), 400
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid user_id'}), 400
+    
+    fields = parse_fields(request.args.get('fields'))
+    try:
+        sections = select_home_sections(fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'user not found'}), 404
+    welcome_message = _welcome_message(user)
+    
+    started = time.monotonic()
+    futures = submit_home_sections(user_id, sections)
+    
+    def generate():
+        if wants(fields, 'welcome_message'):
+            yield _sse('welcome', {'welcome_message': welcome_message})
+        pending = {future: name for name, (future, _) in futures.items() if future is not None}
+        timed_out = [name for name, (future, _) in futures.items() if future is None]
+        failed = []
+        while pending:
+            #~ wake on next completion or next deadline, whichever 1st
+            elapsed = time.monotonic() - started
+            for future, name in list(pending.items()):
+                if futures[name][1] <= elapsed:
+                    future.cancel()
+                    timed_out.append(name)
+                    del pending[future]
+            if not pending:
+                break
+            next_deadline = min(futures[name][1] for name in pending.values())
+            done, _ = wait(pending, timeout=next_deadline - elapsed, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    print(f"home section {name} failed fr user {user_id}: {e}")
+                    failed.append(name)
+                    continue
+                events = HOME_SECTION_EVENTS[name]
+                values = value if len(events) > 1 else (value,)
+                for event, payload in zip(events, values):
+                    #~ top_lists computes songs & artists together, only send what was asked fr
+                    if name == 'top_lists' and not wants(fields, event):
+                        continue
+                    yield _sse(event, payload)
+        yield _sse('done', {'partial': bool(timed_out or failed), 'timed_out': timed_out, 'failed': failed})
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'}  #~ no proxy buffering
+    )
+    #~ client gone bef every section landed: drop whatever is still queued
+    response.call_on_close(lambda: [future.cancel() for future, _ in futures.values() if future is not None])
+    return response
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
 import requests
 from server.model import User
+from server.services import spotify_service
+from server.services.spotify_service import SpotifyAPIError
 
 spotify_bp = Blueprint('spotify', __name__)
 
@@ -204,22 +206,17 @@ def get_top_artists():
     except ValueError:
         limit = 10
 
-    headers = {'Authorization': f'Bearer {user.oauth_token}'}
-    params = {
-        'limit': limit,
-        'time_range': time_range
-    }
-    spotify_url = 'https://api.spotify.com/v1/me/top/artists'
-    response = requests.get(spotify_url, headers=headers, params=params)
-    if response.status_code != 200:
+    #~ served frm shared per-user/time_range cache (also used by analytics)
+    try:
+        items = spotify_service.get_top_artists(user, time_range, limit=limit)
+    except SpotifyAPIError as e:
         return jsonify({
             'error': 'failed to fetch top artists from spotify',
-            'details': response.json()
-        }), response.status_code
+            'details': e.details
+        }), e.status_code
 
-    data = response.json()
     artists = []
-    for item in data.get('items', []):
+    for item in items:
         artist_url = item.get('external_urls', {}).get('spotify')
         images = item.get('images', [])
         image_url = images[0].get('url') if images else None
@@ -1,12 +1,42 @@
-from sqlalchemy import func, extract
 from datetime import datetime, timedelta, timezone
-from server.extensions import db
-from server.model import ListeningHistory, User
-import requests
-from collections import defaultdict
-import itertools
+from server.model import User
+from server.services.spotify_service import get_top_artists
+from server.services.listening_snapshot import load_snapshot
+from server.services.listening_streak import get_streak
+from server.redis_client import versioned_cache, versioned_key, get_data_version, batch_get, set_cached, VERSIONED_CACHE_GC_TTL
+from collections import defaultdict, Counter
+import numpy as np
 import colorsys
 
+#& sections the analytics bundle can compute in one pass
+BUNDLE_SECTIONS = ('trends', 'heatmap', 'genres', 'matrix', 'streak', 'percentile', 'earliest')
+
+def _get_authenticated_user(user_id):
+    #& fetch user frm database
+    user = User.query.get(user_id)
+    if not user or not user.oauth_token:
+        raise Exception('User not found or not authenticated')
+    return user
+
+def compute_listening_trends(snapshot, time_frame='daily', days=30):
+    """Trends frm an already-loaded snapshot; see get_listening_trends"""
+    #~ calculate date range
+    end_date = datetime.now(timezone.utc)
+    start_date = end_date - timedelta(days=days)
+    
+    if time_frame == 'daily':
+        #~ continuous date range, missing dates filled w zeros
+        return snapshot.daily_trends(start_date, end_date)
+    elif time_frame == 'weekly':
+        #~ grp by week starting monday
+        return snapshot.weekly_trends(start_date, end_date)
+    elif time_frame == 'monthly':
+        #~ fetch a bit more fr complete months
+        return snapshot.monthly_trends(start_date - timedelta(days=60), end_date)
+    
+    return []
+
+@versioned_cache('analytics_trends', per_day=True)
 def get_listening_trends(user_id, time_frame='daily', days=30):
     """
     Aggregate listening history data into time series format.
@@ -19,165 +49,19 @@ def get_listening_trends(user_id, time_frame='daily', days=30):
     Returns:
         List of data points for charting
     """
+    #& computed frm user's columnar snapshot instead of per-request sql
+    return compute_listening_trends(load_snapshot(user_id), time_frame, days)
+
+def compute_listening_heatmap(snapshot, days=90):
+    """Heatmap frm an already-loaded snapshot; see get_listening_heatmap"""
     #~ calculate date range
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
     
-    #~ base query filtering by user & date range
-    base_query = db.session.query(
-        ListeningHistory.played_at,
-        ListeningHistory.duration
-    ).filter(
-        ListeningHistory.user_id == user_id,
-        ListeningHistory.played_at >= start_date,
-        ListeningHistory.played_at <= end_date
-    )
-    
-    #~ format according to time frame
-    if time_frame == 'daily':
-        #~ grp by day
-        query = db.session.query(
-            func.date(ListeningHistory.played_at).label('day'),
-            func.count(ListeningHistory.id).label('track_count'),
-            func.sum(ListeningHistory.duration).label('total_seconds')
-        ).filter(
-            ListeningHistory.user_id == user_id,
-            ListeningHistory.played_at >= start_date,
-            ListeningHistory.played_at <= end_date
-        ).group_by(
-            func.date(ListeningHistory.played_at)
-        ).order_by('day')
-        
-        results = query.all()
-        
-        for row in results:
-            print(f"DEBUG: Date={row.day}, Tracks={row.track_count}, Total seconds={row.total_seconds}, Hours={row.total_seconds/3600:.2f}")
-            
-            #& Special check fr suspicious days w extremely high listening times
-            if row.total_seconds > 24 * 3600:  #~ more than 24h
-                print(f"ANOMALY DETECTED: Investigating {row.day} with {row.total_seconds/3600:.2f} hours of listening time")
-                
-                #~ Check fr duplicated played_at timestamps (same exact time)
-                raw_records = db.session.query(
-                    ListeningHistory.played_at,
-                    func.count(ListeningHistory.id).label('count')
-                ).filter(
-                    ListeningHistory.user_id == user_id,
-                    func.date(ListeningHistory.played_at) == row.day
-                ).group_by(ListeningHistory.played_at
-                ).having(func.count(ListeningHistory.id) > 1).all()
-                
-                if raw_records:
-                    print(f"Found {len(raw_records)} timestamps with duplicate entries on {row.day}")
-            
-        data_points = []
-        
-        #& generate continuous date range & fill missing dates
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-        date_mapping = {row.day: (row.track_count, row.total_seconds) for row in results}
-        
-        while current_date <= end_date_only:
-            date_str = current_date.isoformat()
-            if current_date in date_mapping:
-                track_count, total_seconds = date_mapping[current_date]
-            else:
-                track_count, total_seconds = 0, 0
-                
-            #~ convert frm secs to mins directly (s/60)
-            minutes_value = round(total_seconds / 60, 1)
-            
-            data_points.append({
-                'date': date_str,
-                'trackCount': track_count,
-                'minutes': minutes_value
-            })
-            
-            current_date += timedelta(days=1)
-            
-        return data_points
-    
-    elif time_frame == 'weekly':
-        #~ First get all listening history data within the date range
-        raw_data = db.session.query(
-            ListeningHistory.played_at,
-            ListeningHistory.id,
-            ListeningHistory.duration
-        ).filter(
-            ListeningHistory.user_id == user_id,
-            ListeningHistory.played_at >= start_date,
-            ListeningHistory.played_at <= end_date
-        ).all()
-        
-        #~ Group by week in Python (more portable across databases)
-        weekly_data = {}
-        for item in raw_data:
-            played_at = item.played_at
-            #~ Get ISO calendar week (year, week number, weekday)
-            year, week, _ = played_at.isocalendar()
-            #~ Use the first day of the week as the key
-            week_start = played_at - timedelta(days=played_at.weekday())
-            week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            key = week_start.isoformat()
-            
-            if key not in weekly_data:
-                weekly_data[key] = {'count': 0, 'seconds': 0}
-                
-            weekly_data[key]['count'] += 1
-            weekly_data[key]['seconds'] += item.duration
-        
-        #~ Convert to the format expected by the frontend
-        data_points = []
-        for date_str, data in sorted(weekly_data.items()):
-            data_points.append({
-                'date': date_str,
-                'trackCount': data['count'],
-                'minutes': round(data['seconds'] / 60, 1)
-            })
-        
-        return data_points
-    
-    elif time_frame == 'monthly':
-        #~ First get all listening history data within the date range
-        raw_data = db.session.query(
-            ListeningHistory.played_at,
-            ListeningHistory.id,
-            ListeningHistory.duration
-        ).filter(
-            ListeningHistory.user_id == user_id,
-            ListeningHistory.played_at >= start_date - timedelta(days=60),  #~ fetch a bit more fr complete months
-            ListeningHistory.played_at <= end_date
-        ).all()
-        
-        #~ Group by month in Python (more portable across databases)
-        monthly_data = {}
-        for item in raw_data:
-            played_at = item.played_at
-            #~ First day of the month
-            month_start = played_at.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            key = month_start.isoformat()
-            
-            if key not in monthly_data:
-                monthly_data[key] = {'count': 0, 'seconds': 0}
-                
-            monthly_data[key]['count'] += 1
-            monthly_data[key]['seconds'] += item.duration
-        
-        #~ Convert to the format expected by the frontend
-        data_points = []
-        for date_str, data in sorted(monthly_data.items()):
-            data_points.append({
-                'date': date_str,
-                'trackCount': data['count'],
-                'minutes': round(data['seconds'] / 60, 1)
-            })
-        
-        return data_points
-    
-    return []
+    #~ rows are day of week (0=Sunday), cols are hour
+    return snapshot.heatmap(start_date, end_date)
 
+@versioned_cache('analytics_heatmap', per_day=True)
 def get_listening_heatmap(user_id, days=90):
     """
     Generate data for a heatmap showing listening activity by day of week and hour.
@@ -189,116 +73,64 @@ def get_listening_heatmap(user_id, days=90):
     Returns:
         A 2D array suitable for a heatmap visualization
     """
-    #~ calculate date range
-    end_date = datetime.now(timezone.utc)
-    start_date = end_date - timedelta(days=days)
-    
-    #~ query fr day of week (0=Monday, 6=Sunday) & hour
-    query = db.session.query(
-        extract('dow', ListeningHistory.played_at).label('day_of_week'),
-        extract('hour', ListeningHistory.played_at).label('hour'),
-        func.count(ListeningHistory.id).label('count')
-    ).filter(
-        ListeningHistory.user_id == user_id,
-        ListeningHistory.played_at >= start_date,
-        ListeningHistory.played_at <= end_date
-    ).group_by(
-        'day_of_week',
-        'hour'
-    ).order_by(
-        'day_of_week',
-        'hour'
-    )
-    
-    results = query.all()
-    
-    #~ init 2D array w zeros
-    heatmap_data = []
-    for day in range(7):  #~ 7d
-        day_data = []
-        for hour in range(24):  #~ 24h
-            day_data.append(0)
-        heatmap_data.append(day_data)
-    
-    #~ fill w actual data
-    for row in results:
-        day = int(row.day_of_week)
-        hour = int(row.hour)
-        count = row.count
-        heatmap_data[day][hour] = count
-    
-    return {
-        'data': heatmap_data,
-        'maxValue': max([max(day_data) for day_data in heatmap_data])
-    }
-    
-def get_genre_distribution(user_id, time_range='medium_term'):
+    return compute_listening_heatmap(load_snapshot(user_id), days)
+
+def _artist_listen_totals(snapshot, artists):
     """
-    Process listening history to get genre distribution data.
-    
-    Args:
-        user_id: User ID
-        time_range: 'short_term', 'medium_term', or 'long_term'
-        
+    Listen counts & seconds fr each artist name frm the snapshot.
+
+    Matches the previous per-artist `ILIKE '%name%'` semantics, so featured-artist
+    rows ("A, B") count towards both A and B.
+
     Returns:
-        List of genre objects with listening minutes and track counts
+        Tuple of NumPy arrays (counts, seconds) aligned w `artists`
     """
-    #& fetch user frm database
-    user = User.query.get(user_id)
-    if not user or not user.oauth_token:
-        raise Exception('User not found or not authenticated')
-    
-    #todo refresh token if need (implement token refresh logic here)
-    
-    #& call spotify api fr top artists w genres
-    headers = {'Authorization': f'Bearer {user.oauth_token}'}
-    response = requests.get(
-        f'https://api.spotify.com/v1/me/top/artists?limit=50&time_range={time_range}', 
-        headers=headers
-    )
-    
-    if response.status_code != 200:
-        #~ handle token refresh if need
-        raise Exception(f'Failed to fetch data from Spotify: {response.json()}')
-    
-    artists_data = response.json().get('items', [])
-    
+    counts = np.zeros(len(artists), dtype=np.int64)
+    seconds = np.zeros(len(artists), dtype=np.int64)
+    if not artists or not len(snapshot):
+        return counts, seconds
+
+    #~ per-vocab-artist totals, then vectorised substring match over the vocab
+    vocab_counts = np.bincount(snapshot.plays['artist'], minlength=len(snapshot.artists))
+    vocab_seconds = np.bincount(snapshot.plays['artist'], weights=snapshot.plays['duration'], minlength=len(snapshot.artists))
+    vocab_names = np.array([(name or '').lower() for name in snapshot.artists])
+    for i, name in enumerate(artists):
+        mask = np.char.find(vocab_names, name.lower()) >= 0
+        counts[i] = vocab_counts[mask].sum()
+        seconds[i] = vocab_seconds[mask].sum()
+    return counts, seconds
+
+def compute_genre_distribution(snapshot, artists_data):
+    """Genre distribution frm a snapshot & top-artist payload; see get_genre_distribution"""
     #& process genres frm artists
     genre_stats = defaultdict(lambda: {'minutes': 0, 'trackCount': 0})
-    artist_to_genres = {}  #~ mapping artist name to their genres
     
     #& first pass: collect genres fr each artist
+    artist_names = []
+    artist_genres = []
     for artist in artists_data:
         artist_name = artist.get('name')
-        artist_genres = artist.get('genres', [])
+        genres = artist.get('genres', [])
         
-        if artist_name and artist_genres:
-            artist_to_genres[artist_name] = artist_genres
-    
-    #& second pass: query listening history fr these artists & distribute stats across genres
-    for artist_name, genres in artist_to_genres.items():
-        if not genres:
+        if artist_name and genres:
+            artist_names.append(artist_name)
+            artist_genres.append(genres)
+    
+    #& second pass: listening totals fr all these artists at once, distribute stats across genres
+    track_counts, seconds = _artist_listen_totals(snapshot, artist_names)
+    for genres, track_count, artist_seconds in zip(artist_genres, track_counts, seconds):
+        if not track_count:
             continue
-            
-        #& get listening history fr this artist
-        artist_history = ListeningHistory.query.filter(
-            ListeningHistory.user_id == user_id,
-            ListeningHistory.artist.ilike(f'%{artist_name}%')  #~ case-insensitive partial match
-        ).all()
         
-        if not artist_history:
-            continue
-            
-        minutes_listened = sum(h.duration for h in artist_history) / 60  #~ convert secs to mins
-        track_count = len(artist_history)
+        minutes_listened = artist_seconds / 60  #~ convert secs to mins
         
         #& distribute listening time across genres
         per_genre_minutes = minutes_listened / len(genres)
         per_genre_tracks = track_count / len(genres)
         
         for genre in genres:
-            genre_stats[genre]['minutes'] += per_genre_minutes
-            genre_stats[genre]['trackCount'] += per_genre_tracks
+            genre_stats[genre]['minutes'] += float(per_genre_minutes)
+            genre_stats[genre]['trackCount'] += float(per_genre_tracks)
     
     #& convert format needed by visualization
     genre_data = []
@@ -315,107 +147,209 @@ def get_genre_distribution(user_id, time_range='medium_term'):
     #& limit top genres (adjust limit as needed)
     return genre_data[:20]  #~ return top 20 genres
 
-def get_artist_genre_matrix(user_id, time_range='medium_term', limit=10):
+@versioned_cache('analytics_genres')
+def get_genre_distribution(user_id, time_range='medium_term'):
     """
-    Generate matrix data for chord diagram visualization.
+    Process listening history to get genre distribution data.
     
     Args:
         user_id: User ID
         time_range: 'short_term', 'medium_term', or 'long_term'
-        limit: Maximum number of artists to include
         
     Returns:
-        Dictionary with matrix data, names, and colors
+        List of genre objects with listening minutes and track counts
     """
-    #& fetch user frm database
-    user = User.query.get(user_id)
-    if not user or not user.oauth_token:
-        raise Exception('User not found or not authenticated')
-    
-    #& call spotify api fr top artists
-    headers = {'Authorization': f'Bearer {user.oauth_token}'}
-    response = requests.get(
-        f'https://api.spotify.com/v1/me/top/artists?limit={limit}&time_range={time_range}', 
-        headers=headers
-    )
+    user = _get_authenticated_user(user_id)
     
-    if response.status_code != 200:
-        raise Exception(f'Failed to fetch data from Spotify: {response.json()}')
+    #todo refresh token if need (implement token refresh logic here)
     
-    artists_data = response.json().get('items', [])
+    #& top artists w genres, served frm per-user/time_range cache
+    artists_data = get_top_artists(user, time_range, limit=50)
+    return compute_genre_distribution(load_snapshot(user_id), artists_data)
+
+def _artist_colistening_matrix(snapshot, artists):
+    """
+    Artist-artist weights: number of days the user played both artists.
+
+    Returns:
+        Symmetric NumPy float array (len(artists) x len(artists)) w zero diagonal
+    """
+    size = len(artists)
+    if size == 0 or not len(snapshot):
+        return np.zeros((size, size))
+
+    #~ precomputed index map fr days; artist/day incidence matrix
+    days, day_codes = np.unique(snapshot.plays['played_at'] // 86400, return_inverse=True)
+    vocab_names = np.array([(name or '').lower() for name in snapshot.artists])
+    incidence = np.zeros((size, len(days)), dtype=np.float64)
+    for i, name in enumerate(artists):
+        vocab_codes = np.nonzero(np.char.find(vocab_names, name.lower()) >= 0)[0]
+        played = np.isin(snapshot.plays['artist'], vocab_codes)
+        incidence[i, day_codes[played]] = 1
+
+    #~ B @ B.T counts shared listening days fr every artist pair
+    matrix = incidence @ incidence.T
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+def compute_artist_genre_matrix(snapshot, artists_data, mode='genre', max_genres=15):
+    """Chord matrix frm a snapshot & top-artist payload; see get_artist_genre_matrix"""
+    #& co-listening mode: artist nodes only, no genres needed
+    if mode == 'colistening':
+        artists_list = [artist.get('name') for artist in artists_data if artist.get('name')]
+        matrix = _artist_colistening_matrix(snapshot, artists_list)
+        return {
+            'matrix': matrix.tolist(),
+            'names': artists_list,
+            'colors': generate_colors(len(artists_list))
+        }
     
     #& extract artists & their genres
-    artists = []
-    genres = set()
-    artist_genres = {}
-    
+    artists_list = []
+    artist_genres = []
     for artist in artists_data:
         name = artist.get('name')
         artist_genre_list = artist.get('genres', [])
-        
         if name and artist_genre_list:
-            artists.append(name)
-            artist_genres[name] = artist_genre_list
-            genres.update(artist_genre_list)
-    
-    #& limit most common genres if too many
-    if len(genres) > 15:
-        #~ count genre occurrences
-        genre_counts = defaultdict(int)
-        for artist_genre_list in artist_genres.values():
-            for genre in artist_genre_list:
-                genre_counts[genre] += 1
-        
-        #~ keep only top genres
-        top_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:15]
-        genres = {genre for genre, _ in top_genres}
+            artists_list.append(name)
+            artist_genres.append(artist_genre_list)
+    
+    #& keep most common genres, ties broken by first appearance
+    genre_counts = Counter(genre for genre_list in artist_genres for genre in genre_list)
+    genres_list = [genre for genre, _ in genre_counts.most_common(max_genres)]
+    
+    #& precomputed index maps replace list.index lookups
+    genre_index = {genre: j for j, genre in enumerate(genres_list)}
+    num_artists = len(artists_list)
+    num_genres = len(genres_list)
+    
+    #& artist x genre incidence matrix
+    incidence = np.zeros((num_artists, num_genres), dtype=np.float64)
+    for i, genre_list in enumerate(artist_genres):
+        cols = [genre_index[genre] for genre in genre_list if genre in genre_index]
+        incidence[i, cols] = 1
+    
+    #& listening counts fr all artists in one pass
+    listen_counts = _artist_listen_totals(snapshot, artists_list)[0].astype(np.float64)
+    listen_counts[listen_counts == 0] = 10  #~ default weight if no listening data
+    
+    #& distribute each artist's listening count evenly across its genres
+    genres_per_artist = incidence.sum(axis=1)
+    weights = np.divide(
+        listen_counts, genres_per_artist,
+        out=np.zeros(num_artists), where=genres_per_artist > 0
+    )
+    artist_to_genre = incidence * weights[:, None]
     
-    #& convert to lists fr consistent ordering
-    artists_list = artists[:limit]  #~ limit number of artists
-    genres_list = list(genres)
+    #& symmetric adjacency matrix over artists + genres
+    matrix = np.zeros((num_artists + num_genres, num_artists + num_genres))
+    matrix[:num_artists, num_artists:] = artist_to_genre
+    matrix[num_artists:, :num_artists] = artist_to_genre.T
     
-    #& create names list fr all nodes (artists + genres)
     names = artists_list + genres_list
+    return {
+        'matrix': matrix.tolist(),
+        'names': names,
+        'colors': generate_colors(len(names))
+    }
+
+@versioned_cache('analytics_matrix')
+def get_artist_genre_matrix(user_id, time_range='medium_term', limit=10, mode='genre', max_genres=15):
+    """
+    Generate matrix data for chord diagram visualization.
     
-    #& generate colors fr nodes
-    colors = generate_colors(len(names))
-    
-    #& create adjacency matrix
-    matrix_size = len(names)
-    matrix = [[0 for _ in range(matrix_size)] for _ in range(matrix_size)]
-    
-    #& fill matrix w connection weights
-    for i, artist in enumerate(artists_list):
-        artist_genre_list = artist_genres.get(artist, [])
-        artist_genre_list = [g for g in artist_genre_list if g in genres_list]
-        
-        if not artist_genre_list:
-            continue
-            
-        #& get listening counts fr this artist
-        listen_count = ListeningHistory.query.filter(
-            ListeningHistory.user_id == user_id,
-            ListeningHistory.artist.ilike(f'%{artist}%')
-        ).count()
-        
-        if listen_count == 0:
-            listen_count = 10  #~ default weight if no listening data
-        
-        #& distribute listening count across genres
-        weight_per_genre = listen_count / len(artist_genre_list)
+    Args:
+        user_id: User ID
+        time_range: 'short_term', 'medium_term', or 'long_term'
+        limit: Maximum number of artists to include (max 50)
+        mode: 'genre' fr artist-genre edges, 'colistening' fr artist-artist edges
+              weighted by days both were played
+        max_genres: Maximum number of genre nodes in 'genre' mode
         
-        for genre in artist_genre_list:
-            j = len(artists_list) + genres_list.index(genre)
-            
-            #& add directed connections frm artist to genre and vice versa
-            matrix[i][j] = weight_per_genre
-            matrix[j][i] = weight_per_genre
+    Returns:
+        Dictionary with matrix data, names, and colors
+    """
+    user = _get_authenticated_user(user_id)
     
-    return {
-        'matrix': matrix,
-        'names': names,
-        'colors': colors
+    #& top artists, served frm per-user/time_range cache
+    artists_data = get_top_artists(user, time_range, limit=limit)
+    return compute_artist_genre_matrix(load_snapshot(user_id), artists_data, mode, max_genres)
+
+def get_analytics_bundle(user_id, sections, time_frame='daily', days=30, heatmap_days=90,
+                         time_range='medium_term', limit=10, mode='genre'):
+    """
+    Compute several analytics sections frm one snapshot load & one top-artists lookup.
+
+    Sections already cached (same entries as the single-chart endpoints) are read w one
+    batched lookup; only the rest are computed. 'percentile' is left to the caller.
+
+    Args:
+        user_id: User ID
+        sections: Iterable of section names frm BUNDLE_SECTIONS
+        time_frame, days: Options fr 'trends'
+        heatmap_days: Option fr 'heatmap'
+        time_range: Options fr 'genres' & 'matrix'
+        limit, mode: Options fr 'matrix'
+
+    Returns:
+        Dict mapping section name to its payload, plus 'errors' fr sections that failed
+    """
+    version = get_data_version(user_id)
+    #~ section -> cache key, keys match the ones used by the single-chart endpoints
+    cache_keys = {
+        'trends': get_listening_trends.cache_key(user_id, time_frame, days, version=version),
+        'heatmap': get_listening_heatmap.cache_key(user_id, heatmap_days, version=version),
+        'genres': get_genre_distribution.cache_key(user_id, time_range, version=version),
+        'matrix': get_artist_genre_matrix.cache_key(user_id, time_range, limit, mode, version=version),
+        'streak': versioned_key('streak', user_id, version=version)
+    }
+    wanted = [section for section in sections if section in cache_keys]
+    cached_values = batch_get([cache_keys[section] for section in wanted])
+    bundle = {section: value for section, value in zip(wanted, cached_values) if value is not None}
+
+    #& lazily load shared inputs only if some section actually needs computing
+    shared = {}
+    def snapshot():
+        if 'snapshot' not in shared:
+            shared['snapshot'] = load_snapshot(user_id)
+        return shared['snapshot']
+    def top_artists(count):
+        if 'top_artists' not in shared:
+            #~ full page once, sliced per section
+            shared['top_artists'] = get_top_artists(_get_authenticated_user(user_id), time_range, limit=50)
+        return shared['top_artists'][:count]
+
+    compute = {
+        'trends': lambda: compute_listening_trends(snapshot(), time_frame, days),
+        'heatmap': lambda: compute_listening_heatmap(snapshot(), heatmap_days),
+        'genres': lambda: compute_genre_distribution(snapshot(), top_artists(50)),
+        'matrix': lambda: compute_artist_genre_matrix(snapshot(), top_artists(limit), mode),
+        'streak': lambda: snapshot().listening_summary()
     }
+    errors = {}
+    for section in wanted:
+        if section in bundle:
+            continue
+        #~ 1 failing section (e.g. spotify down fr genres) shldnt sink the whole bundle
+        try:
+            bundle[section] = compute[section]()
+        except Exception as e:
+            errors[section] = str(e)
+            continue
+        set_cached(cache_keys[section], bundle[section], ex=VERSIONED_CACHE_GC_TTL)
+
+    if 'streak' in bundle:
+        #~ streak days depend on today, so they're merged after caching, not stored w summary
+        try:
+            bundle['streak'] = {**bundle['streak'], **get_streak(user_id)}
+        except Exception as e:
+            errors['streak'] = str(e)
+    if 'earliest' in sections:
+        earliest = snapshot().earliest_played_at()
+        bundle['earliest'] = {'earliest_date': earliest.isoformat() if earliest else None}
+    if errors:
+        bundle['errors'] = errors
+    return bundle
 
 def generate_colors(count):
     """
@@ -0,0 +1,239 @@
+import base64
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+import requests
+from sqlalchemy.dialects.postgresql import insert
+
+from server.extensions import db
+from server.model import Artist
+from server.redis_client import (
+    batch_get,
+    get_cached,
+    set_cached,
+    set_negative_cached,
+    is_negative_cached
+)
+
+SPOTIFY_CLIENT_ID = os.environ.get('SPOTIFY_CLIENT_ID')
+SPOTIFY_CLIENT_SECRET = os.environ.get('SPOTIFY_CLIENT_SECRET')
+
+#& redis is only hot layer now; catalog table is source of truth fr genres
+ARTIST_GENRE_CACHE_TTL = timedelta(days=1)
+#~ catalog rows older than this get picked up by bg refresh job
+ARTIST_STALE_AFTER = timedelta(days=30)
+#~ spotify /v1/artists accepts max 50 ids per call
+SPOTIFY_ARTIST_BATCH_SIZE = 50
+
+def _genre_cache_key(artist_id):
+    return f'artist_genre:{artist_id}'
+
+def _join_genres(genres):
+    #~ listening_history.genre stores comma-joined genre string
+    return ', '.join(genres or [])
+
+def _cache_artist_genres(artist_id, genres):
+    #~ artists w no genres get negative-cache sentinel so they stay hits on next sync
+    if genres:
+        set_cached(_genre_cache_key(artist_id), _join_genres(genres), ex=ARTIST_GENRE_CACHE_TTL)
+    else:
+        set_negative_cached(_genre_cache_key(artist_id))
+
+def fetch_spotify_artists(artist_ids, headers):
+    """
+    Fetch full artist objects from Spotify in batches of 50.
+
+    Args:
+        artist_ids: Iterable of Spotify artist IDs
+        headers: Spotify auth headers
+
+    Returns:
+        List of Spotify artist objects (missing / failed ids are skipped)
+    """
+    artist_ids = list(artist_ids)
+    artists = []
+    for i in range(0, len(artist_ids), SPOTIFY_ARTIST_BATCH_SIZE):
+        artists.extend(_fetch_artist_chunk(artist_ids[i:i + SPOTIFY_ARTIST_BATCH_SIZE], headers) or [])
+    return artists
+
+def _fetch_artist_chunk(chunk, headers):
+    #~ None when the call failed, vs [] when spotify answered w only unknown ids
+    response = requests.get(
+        'https://api.spotify.com/v1/artists',
+        headers=headers,
+        params={'ids': ','.join(chunk)}
+    )
+    if response.status_code != 200:
+        logging.warning(f"failed to fetch {len(chunk)} artists from spotify: {response.status_code}")
+        return None
+    #~ spotify returns null fr unknown ids
+    return [a for a in response.json().get('artists', []) if a]
+
+def upsert_artists(artists_data):
+    """
+    Insert or refresh catalog rows from Spotify artist objects.
+
+    Args:
+        artists_data: List of Spotify artist objects (full or simplified w genres)
+
+    Returns:
+        Dict mapping artist id to genre list fr the upserted artists
+    """
+    now = datetime.now(timezone.utc)
+    rows = {}
+    for artist in artists_data:
+        artist_id = artist.get('id')
+        if not artist_id:
+            continue
+        images = artist.get('images') or []
+        rows[artist_id] = {
+            'spotify_id': artist_id,
+            'name': artist.get('name'),
+            'genres': artist.get('genres') or [],
+            'image_url': images[0].get('url') if images else None,
+            'popularity': artist.get('popularity'),
+            'refreshed_at': now
+        }
+    if not rows:
+        return {}
+
+    stmt = insert(Artist).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Artist.spotify_id],
+        set_={
+            'name': stmt.excluded.name,
+            'genres': stmt.excluded.genres,
+            'image_url': stmt.excluded.image_url,
+            'popularity': stmt.excluded.popularity,
+            'refreshed_at': stmt.excluded.refreshed_at
+        }
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+    return {artist_id: row['genres'] for artist_id, row in rows.items()}
+
+def resolve_artist_genres(artist_ids, headers):
+    """
+    Resolve genre strings fr artists: redis hot cache -> artist catalog -> Spotify.
+
+    In steady state every artist is in the catalog, so no Spotify calls are made.
+
+    Args:
+        artist_ids: Iterable of Spotify artist IDs
+        headers: Spotify auth headers, only used fr artists missing frm catalog
+
+    Returns:
+        Dict mapping artist id to comma-joined genre string ('' when artist has no genres)
+    """
+    artist_ids = [artist_id for artist_id in set(artist_ids) if artist_id]
+    if not artist_ids:
+        return {}
+
+    #& 1st tier: redis / local hot cache
+    cached_values = batch_get([_genre_cache_key(artist_id) for artist_id in artist_ids])
+    resolved = {}
+    missing = []
+    for artist_id, value in zip(artist_ids, cached_values):
+        if value is None:
+            missing.append(artist_id)
+        elif is_negative_cached(value):
+            resolved[artist_id] = ''
+        else:
+            resolved[artist_id] = value
+    logging.info(f"artist genre cache: {len(artist_ids) - len(missing)} hits, {len(missing)} misses")
+
+    #& 2nd tier: catalog table
+    from_catalog = {}
+    if missing:
+        catalog_rows = db.session.query(Artist.spotify_id, Artist.genres).filter(
+            Artist.spotify_id.in_(missing)
+        ).all()
+        from_catalog = {row.spotify_id: row.genres or [] for row in catalog_rows}
+        missing = [artist_id for artist_id in missing if artist_id not in from_catalog]
+
+    #& last resort: spotify, then persist to catalog
+    from_spotify = {}
+    if missing:
+        from_spotify = upsert_artists(fetch_spotify_artists(missing, headers))
+        logging.info(f"artist catalog: fetched {len(from_spotify)} of {len(missing)} uncatalogued artists from spotify")
+
+    #~ warm hot cache fr everything not already in it
+    for artist_id, genres in {**from_catalog, **from_spotify}.items():
+        resolved[artist_id] = _join_genres(genres)
+        _cache_artist_genres(artist_id, genres)
+
+    return resolved
+
+def get_app_access_token():
+    """
+    Get a Spotify client-credentials token fr background jobs not tied to a user.
+    Token is cached until shortly before it expires.
+    """
+    cache_key = 'spotify_app_token'
+    token = get_cached(cache_key)
+    if token:
+        return token
+
+    auth_str = f'{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}'
+    b64_auth_str = base64.b64encode(auth_str.encode()).decode()
+    response = requests.post(
+        'https://accounts.spotify.com/api/token',
+        headers={
+            'Authorization': f'Basic {b64_auth_str}',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        },
+        data={'grant_type': 'client_credentials'}
+    )
+    if response.status_code != 200:
+        logging.error("spotify client credentials request failed: %s", response.text)
+        return None
+
+    token_info = response.json()
+    token = token_info.get('access_token')
+    #~ expire cache 1 min early so never hand out token abt to lapse
+    set_cached(cache_key, token, ex=max(token_info.get('expires_in', 3600) - 60, 60))
+    return token
+
+def refresh_stale_artists(batch_size=SPOTIFY_ARTIST_BATCH_SIZE, max_batches=10):
+    """
+    Re-fetch the oldest catalog entries from Spotify, a batch at a time.
+
+    Args:
+        batch_size: Artists per Spotify call (max 50)
+        max_batches: Cap on Spotify calls per run so job stays low-impact
+
+    Returns:
+        Number of artists refreshed
+    """
+    stale_before = datetime.now(timezone.utc) - ARTIST_STALE_AFTER
+    token = get_app_access_token()
+    if not token:
+        return 0
+    headers = {'Authorization': f'Bearer {token}'}
+
+    refreshed = 0
+    for _ in range(max_batches):
+        stale_ids = [
+            row.spotify_id for row in db.session.query(Artist.spotify_id).filter(
+                Artist.refreshed_at < stale_before
+            ).order_by(Artist.refreshed_at).limit(min(batch_size, SPOTIFY_ARTIST_BATCH_SIZE)).all()
+        ]
+        if not stale_ids:
+            break
+        artists_data = _fetch_artist_chunk(stale_ids, headers)
+        if artists_data is None:
+            break  #~ spotify failing, try again next run
+        genres_by_artist = upsert_artists(artists_data)
+        #~ ids spotify no longer returns still get stamped so they dont block the queue
+        #~ (incl. a batch where every id came back null)
+        gone_ids = [artist_id for artist_id in stale_ids if artist_id not in genres_by_artist]
+        if gone_ids:
+            db.session.query(Artist).filter(Artist.spotify_id.in_(gone_ids)).update(
+                {Artist.refreshed_at: datetime.now(timezone.utc)}, synchronize_session=False
+            )
+            db.session.commit()
+        for artist_id, genres in genres_by_artist.items():
+            _cache_artist_genres(artist_id, genres)
+        refreshed += len(genres_by_artist)
+    return refreshed
@@ -0,0 +1,266 @@
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+
+from redis.exceptions import LockError, WatchError
+from sqlalchemy import func
+
+from server.extensions import db
+from server.model import ListeningHistory, User
+from server.redis_client import redis_client
+
+#& per-artist listener leaderboards: zset member = user id, score = user's plays credited to artist
+#& + hyperloglogs of distinct listeners per artist & per artist-month (~12kb each, 0.81% std error)
+#~ maintained by ZINCRBY / PFADD at ingest; built once frm listening_history in bg on 1st read,
+#~ until then reads serve whatever ingest has recorded & flag 'building'
+REBUILD_LOCK_TTL = 600
+REBUILD_ATTEMPTS = 3
+
+def normalize_artist(name):
+    """Leaderboard identity fr an artist name (case-insensitive, trimmed)"""
+    return (name or '').strip().lower()
+
+def split_artists(artist_field):
+    #~ listening_history.artist is comma-joined credited artists
+    return [name for name in (part.strip() for part in (artist_field or '').split(',')) if name]
+
+def _leaderboard_key(artist):
+    return f'artist_listeners:{normalize_artist(artist)}'
+
+def _hll_key(artist, month=None):
+    #~ month as 'YYYY-MM'; no month = all-time
+    key = f'artist_hll:{normalize_artist(artist)}'
+    return f'{key}:{month}' if month else key
+
+def _months_key(artist):
+    #~ zset of months w a per-month hll, scored YYYYMM so earliest is ZRANGE 0 0
+    return f'artist_hll_months:{normalize_artist(artist)}'
+
+def _month_score(month):
+    return int(month.replace('-', ''))
+
+def _built_key(artist):
+    #~ v2: builds also fill the months index, so older builds get redone once
+    return f'artist_listeners_built:v2:{normalize_artist(artist)}'
+
+def record_plays(user_id, plays):
+    """
+    Add newly ingested plays to artist leaderboards & listener counts in 1 round trip.
+
+    Args:
+        user_id: User the plays belong to
+        plays: Iterable of dicts w listening_history 'artist' & 'played_at', 1 per play
+    """
+    counts = Counter()
+    months = set()
+    for play in plays:
+        month = play['played_at'].strftime('%Y-%m')
+        for name in split_artists(play['artist']):
+            artist = normalize_artist(name)
+            counts[artist] += 1
+            months.add((artist, month))
+    if not counts:
+        return
+    pipe = redis_client.pipeline(transaction=False)
+    for artist, play_count in counts.items():
+        pipe.zincrby(_leaderboard_key(artist), play_count, user_id)
+        pipe.pfadd(_hll_key(artist), user_id)
+    for artist, month in months:
+        pipe.pfadd(_hll_key(artist, month), user_id)
+        pipe.zadd(_months_key(artist), {month: _month_score(month)})
+    pipe.execute()
+
+def _rebuild_lock_key(artist):
+    return f'artist_listeners_rebuild:{normalize_artist(artist)}'
+
+def _read_listener_counts(target):
+    #~ (user_id -> plays, 'YYYY-MM' -> user ids) fr normalized artist, frm listening_history
+    year = func.extract('year', ListeningHistory.played_at)
+    month = func.extract('month', ListeningHistory.played_at)
+    #~ trigram-indexed ilike narrows rows, exact credited-artist match done here
+    rows = db.session.query(
+        ListeningHistory.user_id,
+        ListeningHistory.artist,
+        year.label('year'),
+        month.label('month'),
+        func.count(ListeningHistory.id).label('plays')
+    ).filter(
+        ListeningHistory.artist.ilike(f"%{target}%")
+    ).group_by(
+        ListeningHistory.user_id, ListeningHistory.artist, year, month
+    ).all()
+
+    scores = Counter()
+    monthly_listeners = {}
+    for row in rows:
+        if target in (normalize_artist(name) for name in split_artists(row.artist)):
+            scores[row.user_id] += row.plays
+            monthly_listeners.setdefault(f'{int(row.year):04d}-{int(row.month):02d}', set()).add(row.user_id)
+    return scores, monthly_listeners
+
+def rebuild_leaderboard(artist):
+    """
+    Rebuild an artist's leaderboard & listener counts frm listening_history.
+    Cross-user scan, so run it frm rebuild_artist_leaderboard_task, nt a request.
+
+    Built into a scratch key & RENAMEd over the live one under WATCH: an ingest ZINCRBY
+    landing between the sql read & the swap aborts the swap (retried) instead of being wiped.
+
+    Returns:
+        Number of listeners on the rebuilt leaderboard, None if another rebuild holds the
+        lock or ingest kept racing every attempt
+    """
+    target = normalize_artist(artist)
+    lock = redis_client.lock(_rebuild_lock_key(target), timeout=REBUILD_LOCK_TTL, blocking=False, thread_local=False)
+    if not lock.acquire():
+        return None
+    key = _leaderboard_key(target)
+    scratch_key = f'{key}:rebuild'
+    try:
+        with redis_client.pipeline() as pipe:
+            for _ in range(REBUILD_ATTEMPTS):
+                try:
+                    pipe.watch(key)
+                    scores, monthly_listeners = _read_listener_counts(target)
+                    staging = redis_client.pipeline(transaction=False)
+                    staging.delete(scratch_key)
+                    if scores:
+                        staging.zadd(scratch_key, {str(user_id): plays for user_id, plays in scores.items()})
+                        #~ hlls are union-only, so re-adding every listener is idempotent & needs no swap
+                        staging.pfadd(_hll_key(target), *scores.keys())
+                    for month_label, user_ids in monthly_listeners.items():
+                        staging.pfadd(_hll_key(target, month_label), *user_ids)
+                        staging.zadd(_months_key(target), {month_label: _month_score(month_label)})
+                    staging.execute()
+                    pipe.multi()
+                    if scores:
+                        pipe.rename(scratch_key, key)
+                    else:
+                        pipe.delete(key)
+                    pipe.set(_built_key(target), 1)
+                    pipe.execute()
+                    logging.info(f"rebuilt listener leaderboard fr '{target}' w {len(scores)} listeners")
+                    return len(scores)
+                except WatchError:
+                    continue
+        redis_client.delete(scratch_key)
+        logging.warning(f"listener leaderboard rebuild fr '{target}' kept racing ingest, retry next schedule")
+        return None
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass  #~ outlived lock ttl; nothing to release
+
+def schedule_rebuild(artist):
+    """Enqueue a leaderboard rebuild fr artist, at most 1 queued across workers"""
+    target = normalize_artist(artist)
+    if not redis_client.set(f'{_rebuild_lock_key(target)}:queued', '1', nx=True, ex=REBUILD_LOCK_TTL):
+        return
+    from server.tasks.sync_tasks import rebuild_artist_leaderboard_task
+    rebuild_artist_leaderboard_task.delay(target)
+
+def _ensure_leaderboard(artist):
+    """True if artist's leaderboard is built; else schedules a rebuild & returns False"""
+    if redis_client.exists(_built_key(artist)):
+        return True
+    try:
+        schedule_rebuild(artist)
+    except Exception as e:
+        logging.warning(f"failed to schedule listener leaderboard rebuild fr '{artist}': {e}")
+    return False
+
+def get_listener_rank(artist, user_id):
+    """
+    User's standing among an artist's listeners, O(log n) on the zset.
+
+    Returns:
+        Dict w 'listens' (user's score), 'rank' (1 = top, None if not a listener),
+        'below' (listeners strictly below user), 'total_listeners' & 'building'
+        (True while leaderboard is still being backfilled)
+    """
+    building = not _ensure_leaderboard(artist)
+    key = _leaderboard_key(artist)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zscore(key, user_id)
+    pipe.zcard(key)
+    score, total = pipe.execute()
+    score = int(score or 0)
+    if not score:
+        return {'listens': 0, 'rank': None, 'below': 0, 'total_listeners': int(total), 'building': building}
+    #~ ZCOUNT instead of ZRANK so tied users share a rank rather than being ordered by member id
+    pipe.zcount(key, f'({score}', '+inf')
+    pipe.zcount(key, '-inf', f'({score}')
+    above, below = pipe.execute()
+    return {
+        'listens': score, 'rank': int(above) + 1, 'below': int(below),
+        'total_listeners': int(total), 'building': building
+    }
+
+def get_leaderboard(artist, limit=10):
+    """
+    Top listeners of an artist.
+
+    Returns:
+        Dict w 'total_listeners', 'leaders' (rank, user_id, display_name, listens) & 'building'
+    """
+    building = not _ensure_leaderboard(artist)
+    key = _leaderboard_key(artist)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrange(key, 0, limit - 1, withscores=True)
+    pipe.zcard(key)
+    top, total = pipe.execute()
+
+    user_ids = [int(member) for member, _ in top]
+    names = dict(
+        db.session.query(User.id, User.display_name).filter(User.id.in_(user_ids)).all()
+    ) if user_ids else {}
+    leaders = []
+    previous_score, rank = None, 0
+    for position, (member, score) in enumerate(top, start=1):
+        if score != previous_score:
+            rank, previous_score = position, score
+        leaders.append({
+            'rank': rank,
+            'user_id': int(member),
+            'display_name': names.get(int(member)),
+            'listens': int(score)
+        })
+    return {'total_listeners': int(total), 'leaders': leaders, 'building': building}
+
+def _months_between(start_month, end_month):
+    year, month = map(int, start_month.split('-'))
+    end_year, end_month_num = map(int, end_month.split('-'))
+    months = []
+    while (year, month) <= (end_year, end_month_num):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def count_listeners(artist, start_month=None, end_month=None):
+    """
+    Approximate distinct listeners of an artist, constant time & memory via PFCOUNT.
+
+    Args:
+        artist: Artist name
+        start_month, end_month: Optional inclusive 'YYYY-MM' bounds; a missing start means
+            frm the earliest recorded month, a missing end means up to the current month
+
+    Returns:
+        Estimated number of distinct listeners
+    """
+    _ensure_leaderboard(artist)
+    if not start_month and not end_month:
+        return int(redis_client.pfcount(_hll_key(artist)))
+    earliest = redis_client.zrange(_months_key(artist), 0, 0)
+    if not earliest:
+        return 0
+    #~ months bef the 1st recorded one have no hll, so never walk past it
+    start_month = max(start_month or earliest[0], earliest[0])
+    if not end_month:
+        end_month = datetime.now(timezone.utc).strftime('%Y-%m')
+    months = _months_between(start_month, end_month)
+    if not months:
+        return 0
+    #~ multi-key PFCOUNT returns cardinality of the union, so listeners spanning months count once
+    return int(redis_client.pfcount(*[_hll_key(artist, month) for month in months]))
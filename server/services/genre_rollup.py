@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from server.extensions import db
+from server.model import ListeningHistory, UserGenreMonthly
+from server.services.listening_snapshot import UNKNOWN_GENRE
+
+#& stream graph keeps each month's top genres, everything else folds into 1 bucket
+GENRE_EVOLUTION_TOP_N = 8
+OTHER_GENRE = 'other'
+
+def _rollup_genre(genre):
+    return genre or UNKNOWN_GENRE
+
+def _upsert_rollup_rows(rows, accumulate):
+    stmt = insert(UserGenreMonthly).values(rows)
+    seconds = UserGenreMonthly.seconds + stmt.excluded.seconds if accumulate else stmt.excluded.seconds
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserGenreMonthly.user_id, UserGenreMonthly.month, UserGenreMonthly.genre],
+        set_={'seconds': seconds}
+    )
+    db.session.execute(stmt)
+
+def add_plays_to_rollup(user_id, plays):
+    """
+    Add new plays to the user's monthly genre rollup in the current transaction.
+    Caller commits, so rollup & listening_history land together.
+
+    Args:
+        user_id: User the plays belong to
+        plays: Iterable of dicts w played_at, genre & duration (secs)
+    """
+    seconds = defaultdict(int)
+    for play in plays:
+        seconds[(play['played_at'].strftime('%Y-%m'), _rollup_genre(play.get('genre')))] += play.get('duration') or 0
+    if not seconds:
+        return
+    _upsert_rollup_rows([
+        {'user_id': user_id, 'month': month, 'genre': genre, 'seconds': secs}
+        for (month, genre), secs in seconds.items()
+    ], accumulate=True)
+
+def rebuild_genre_rollup(user_id):
+    """
+    Recompute user's rollup frm full listening history (repair / backfill).
+
+    Returns:
+        Number of (month, genre) rows written
+    """
+    month_expr = func.to_char(ListeningHistory.played_at, 'YYYY-MM')
+    genre_data = (
+        db.session.query(
+            month_expr.label('month'),
+            ListeningHistory.genre,
+            func.sum(ListeningHistory.duration).label('total_duration')
+        )
+        .filter(ListeningHistory.user_id == user_id)
+        .group_by(month_expr, ListeningHistory.genre)
+        .all()
+    )
+    seconds = defaultdict(int)
+    for row in genre_data:
+        #~ NULL & '' both fold into unknown
+        seconds[(row.month, _rollup_genre(row.genre))] += row.total_duration or 0
+
+    UserGenreMonthly.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    if seconds:
+        _upsert_rollup_rows([
+            {'user_id': user_id, 'month': month, 'genre': genre, 'seconds': secs}
+            for (month, genre), secs in seconds.items()
+        ], accumulate=False)
+    db.session.commit()
+    return len(seconds)
+
+def get_genre_evolution(user_id, top_n=GENRE_EVOLUTION_TOP_N):
+    """
+    Hours per genre per month frm the rollup, top_n genres per month + 'other'.
+
+    Returns:
+        [{ month: '2025-01', genres: { Pop: hours, ..., other: hours } }, ...] oldest 1st
+    """
+    rows = (
+        db.session.query(UserGenreMonthly.month, UserGenreMonthly.genre, UserGenreMonthly.seconds)
+        .filter(UserGenreMonthly.user_id == user_id)
+        .order_by(UserGenreMonthly.month, UserGenreMonthly.seconds.desc())
+        .all()
+    )
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[row.month].append(row)
+
+    evolution = []
+    for month, month_rows in by_month.items():
+        #~ rows already sorted by secs desc within month
+        genres = {row.genre: round(row.seconds / 3600, 2) for row in month_rows[:top_n]}
+        other_seconds = sum(row.seconds for row in month_rows[top_n:])
+        if other_seconds:
+            genres[OTHER_GENRE] = round(genres.get(OTHER_GENRE, 0) + other_seconds / 3600, 2)
+        evolution.append({'month': month, 'genres': genres})
+    return evolution
@@ -0,0 +1,326 @@
+import calendar
+import glob
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from server.extensions import db
+from server.model import ListeningHistory
+from server.redis_client import redis_binary_client, get_data_version
+
+#* Columnar per-user listening snapshot
+#& one row per play, sorted by played_at; strings are replaced by integer codes into vocab lists
+SNAPSHOT_DTYPE = np.dtype([
+    ('played_at', '<i8'),  #~ epoch secs (utc)
+    ('duration', '<i4'),   #~ secs
+    ('artist', '<i4'),     #~ index into vocab['artists']
+    ('track', '<i4'),      #~ index into vocab['tracks']
+    ('genre', '<i4')       #~ index into vocab['genres'], -1 when unknown
+])
+SECONDS_PER_DAY = 86400
+#~ snapshots of inactive users drop out of redis, rebuilt on next read
+SNAPSHOT_REDIS_TTL = timedelta(days=7)
+SNAPSHOT_DIR = os.environ.get(
+    'LISTENING_SNAPSHOT_DIR',
+    os.path.join(tempfile.gettempdir(), 'rewrapped_snapshots')
+)
+UNKNOWN_GENRE = 'unknown'
+
+def _snapshot_key(user_id):
+    return f'listening_snapshot:{user_id}'
+
+def _to_epoch(dt):
+    #~ naive timestamps frm db are utc
+    return calendar.timegm(dt.utctimetuple())
+
+def _epoch_to_date(epoch_day):
+    return (datetime(1970, 1, 1) + timedelta(days=int(epoch_day))).date()
+
+class ListeningSnapshot:
+    """
+    Compact columnar copy of a user's listening history.
+
+    Analytics are computed w vectorised NumPy over `plays` instead of per-endpoint SQL.
+    """
+
+    def __init__(self, user_id, plays, vocab, generation):
+        self.user_id = user_id
+        self.plays = plays
+        self.artists = vocab['artists']
+        self.tracks = vocab['tracks']  #~ [track_id, track_name, artist, artwork_url]
+        self.genres = vocab['genres']
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.plays)
+
+    def vocab(self):
+        return {'artists': self.artists, 'tracks': self.tracks, 'genres': self.genres}
+
+    def window(self, start=None, end=None):
+        """Plays w start <= played_at <= end (datetimes), via binary search on sorted column"""
+        played_at = self.plays['played_at']
+        lo = 0 if start is None else np.searchsorted(played_at, _to_epoch(start), side='left')
+        hi = len(played_at) if end is None else np.searchsorted(played_at, _to_epoch(end), side='right')
+        return self.plays[lo:hi]
+
+    def earliest_played_at(self):
+        if not len(self.plays):
+            return None
+        return datetime(1970, 1, 1) + timedelta(seconds=int(self.plays['played_at'][0]))
+
+    def daily_trends(self, start, end):
+        """Per-day track counts & minutes, w every day in range present"""
+        plays = self.window(start, end)
+        start_day = _to_epoch(start) // SECONDS_PER_DAY
+        end_day = _to_epoch(end) // SECONDS_PER_DAY
+        num_days = end_day - start_day + 1
+        day_idx = plays['played_at'] // SECONDS_PER_DAY - start_day
+        track_counts = np.bincount(day_idx, minlength=num_days)
+        total_seconds = np.bincount(day_idx, weights=plays['duration'], minlength=num_days)
+        return [
+            {
+                'date': _epoch_to_date(start_day + i).isoformat(),
+                'trackCount': int(track_counts[i]),
+                'minutes': round(float(total_seconds[i]) / 60, 1)
+            }
+            for i in range(num_days)
+        ]
+
+    def _bucketed_trends(self, plays, bucket_starts):
+        #~ bucket_starts: datetime64[D] per play; only non-empty buckets returned
+        buckets, inverse = np.unique(bucket_starts, return_inverse=True)
+        track_counts = np.bincount(inverse, minlength=len(buckets))
+        total_seconds = np.bincount(inverse, weights=plays['duration'], minlength=len(buckets))
+        return [
+            {
+                'date': datetime.combine(bucket.astype(object), datetime.min.time()).isoformat(),
+                'trackCount': int(track_counts[i]),
+                'minutes': round(float(total_seconds[i]) / 60, 1)
+            }
+            for i, bucket in enumerate(buckets)
+        ]
+
+    def weekly_trends(self, start, end):
+        """Track counts & minutes grouped by ISO week (Monday start)"""
+        plays = self.window(start, end)
+        days = plays['played_at'] // SECONDS_PER_DAY
+        #~ 1970-01-01 was a Thursday (weekday 3 w Monday=0)
+        week_start = (days - (days + 3) % 7).astype('datetime64[D]')
+        return self._bucketed_trends(plays, week_start)
+
+    def monthly_trends(self, start, end):
+        """Track counts & minutes grouped by calendar month"""
+        plays = self.window(start, end)
+        month_start = plays['played_at'].astype('datetime64[s]').astype('datetime64[M]').astype('datetime64[D]')
+        return self._bucketed_trends(plays, month_start)
+
+    def heatmap(self, start, end):
+        """7x24 play counts, rows are day of week (0=Sunday) to match postgres dow"""
+        plays = self.window(start, end)
+        played_at = plays['played_at']
+        dow = (played_at // SECONDS_PER_DAY + 4) % 7  #~ day 0 was a Thursday
+        hour = (played_at % SECONDS_PER_DAY) // 3600
+        counts = np.bincount(dow * 24 + hour, minlength=7 * 24).reshape(7, 24)
+        return {
+            'data': counts.tolist(),
+            'maxValue': int(counts.max())
+        }
+
+    def top_artists(self, start=None, limit=10):
+        """Most played artists since start"""
+        plays = self.window(start)
+        counts = np.bincount(plays['artist'], minlength=len(self.artists))
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return [
+            {'artist': self.artists[i], 'play_count': int(counts[i])}
+            for i in order if counts[i] > 0
+        ]
+
+    def _month_labels(self):
+        months = self.plays['played_at'].astype('datetime64[s]').astype('datetime64[M]')
+        unique_months, month_idx = np.unique(months, return_inverse=True)
+        return [str(month) for month in unique_months], month_idx
+
+    def listening_summary(self):
+        """Same payload as get_longest_listening_streak: totals, biggest day, monthly hours"""
+        plays = self.plays
+        total_duration = int(plays['duration'].sum())
+        biggest_listening_day = None
+        monthly_hours = {}
+        if len(plays):
+            days, day_idx = np.unique(plays['played_at'] // SECONDS_PER_DAY, return_inverse=True)
+            per_day = np.bincount(day_idx, weights=plays['duration'])
+            biggest_listening_day = _epoch_to_date(days[int(per_day.argmax())]).isoformat()
+            month_labels, month_idx = self._month_labels()
+            per_month = np.bincount(month_idx, weights=plays['duration'])
+            monthly_hours = {month: round(float(per_month[i]) / 3600, 2) for i, month in enumerate(month_labels)}
+        return {
+            'total_minutes': total_duration // 60,
+            'biggest_listening_day': biggest_listening_day,
+            'total_tracks': int(len(plays)),
+            'monthly_hours': monthly_hours
+        }
+
+    def streak_state(self):
+        """
+        Consecutive-day streaks via gaps & islands over distinct utc listening days.
+        Days are epoch days; returns None when there are no plays.
+        """
+        if not len(self.plays):
+            return None
+        days = np.unique(self.plays['played_at'] // SECONDS_PER_DAY)
+        #~ day - position is constant within a run of consecutive days
+        island_starts = np.flatnonzero(np.diff(days) != 1) + 1
+        starts = np.concatenate(([0], island_starts))
+        lengths = np.diff(np.concatenate((starts, [len(days)])))
+        best = int(lengths.argmax())  #~ earliest island wins ties
+        return {
+            'last_day': int(days[-1]),
+            'current_start': int(days[starts[-1]]),
+            'current_length': int(lengths[-1]),
+            'best_start': int(days[starts[best]]),
+            'best_length': int(lengths[best])
+        }
+
+def build_snapshot(user_id, generation=None):
+    """
+    Build a snapshot frm listening_history w a single query.
+
+    Args:
+        user_id: User ID
+        generation: Snapshot generation this build corresponds to (read frm redis if None)
+    """
+    if generation is None:
+        generation = current_generation(user_id)
+    rows = db.session.query(
+        ListeningHistory.played_at,
+        ListeningHistory.duration,
+        ListeningHistory.artist,
+        ListeningHistory.track_id,
+        ListeningHistory.track_name,
+        ListeningHistory.artwork_url,
+        ListeningHistory.genre
+    ).filter(
+        ListeningHistory.user_id == user_id
+    ).order_by(
+        ListeningHistory.played_at
+    ).all()
+
+    #& dictionary-encode string columns
+    artist_codes, track_codes, genre_codes = {}, {}, {}
+    records = []
+    for row in rows:
+        track_key = (row.track_id, row.track_name, row.artist, row.artwork_url)
+        records.append((
+            _to_epoch(row.played_at),
+            row.duration or 0,
+            artist_codes.setdefault(row.artist, len(artist_codes)),
+            track_codes.setdefault(track_key, len(track_codes)),
+            genre_codes.setdefault(row.genre, len(genre_codes)) if row.genre is not None else -1
+        ))
+    plays = np.array(records, dtype=SNAPSHOT_DTYPE)
+    vocab = {
+        'artists': list(artist_codes),
+        'tracks': [list(track_key) for track_key in track_codes],
+        'genres': list(genre_codes)
+    }
+    return ListeningSnapshot(user_id, plays, vocab, generation)
+
+def current_generation(user_id):
+    """Snapshot generation is the user data version, bumped after every sync that adds plays"""
+    return get_data_version(user_id)
+
+def invalidate_snapshot(user_id):
+    """Drop stored snapshot; call after bump_data_version so readers rebuild"""
+    redis_binary_client.delete(_snapshot_key(user_id))
+
+def save_snapshot(snapshot):
+    """Store snapshot in redis (binary npy + vocab json) unless a newer generation exists"""
+    if current_generation(snapshot.user_id) != snapshot.generation:
+        return False  #~ sync landed mid-build; let next read rebuild
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(snapshot.plays), allow_pickle=False)
+    key = _snapshot_key(snapshot.user_id)
+    pipe = redis_binary_client.pipeline()
+    pipe.hset(key, mapping={
+        'generation': str(snapshot.generation),
+        'plays': buffer.getvalue(),
+        'vocab': json.dumps(snapshot.vocab())
+    })
+    pipe.expire(key, int(SNAPSHOT_REDIS_TTL.total_seconds()))
+    pipe.execute()
+    _write_local(snapshot.user_id, snapshot.generation, buffer.getvalue(), snapshot.vocab())
+    return True
+
+def _local_paths(user_id, generation):
+    base = os.path.join(SNAPSHOT_DIR, f'{user_id}-{generation}')
+    return f'{base}.npy', f'{base}.json'
+
+def _write_local(user_id, generation, plays_bytes, vocab):
+    #~ local memmap copy; older generations fr this user are removed
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        npy_path, vocab_path = _local_paths(user_id, generation)
+        for stale in glob.glob(os.path.join(SNAPSHOT_DIR, f'{user_id}-*')):
+            if stale not in (npy_path, vocab_path):
+                os.remove(stale)
+        #~ write-then-rename so concurrent readers never see partial file
+        tmp_path = f'{npy_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(plays_bytes)
+        os.replace(tmp_path, npy_path)
+        tmp_path = f'{vocab_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(vocab, f)
+        os.replace(tmp_path, vocab_path)
+    except OSError as e:
+        logging.warning(f"failed to write local listening snapshot fr user {user_id}: {e}")
+
+def _read_local(user_id, generation):
+    npy_path, vocab_path = _local_paths(user_id, generation)
+    if not (os.path.exists(npy_path) and os.path.exists(vocab_path)):
+        return None
+    try:
+        plays = np.load(npy_path, mmap_mode='r', allow_pickle=False)
+        with open(vocab_path) as f:
+            vocab = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return ListeningSnapshot(user_id, plays, vocab, generation)
+
+def load_snapshot(user_id):
+    """
+    Get an up-to-date snapshot: local memmap -> redis -> rebuild frm db.
+
+    Returns:
+        ListeningSnapshot
+    """
+    try:
+        generation = current_generation(user_id)
+    except Exception as e:
+        logging.warning(f"redis unavailable, building listening snapshot frm db: {e}")
+        return build_snapshot(user_id, generation=-1)
+
+    snapshot = _read_local(user_id, generation)
+    if snapshot is not None:
+        return snapshot
+
+    stored = redis_binary_client.hgetall(_snapshot_key(user_id))
+    if stored and int(stored.get(b'generation', -1)) == generation:
+        vocab = json.loads(stored[b'vocab'])
+        _write_local(user_id, generation, stored[b'plays'], vocab)
+        snapshot = _read_local(user_id, generation)
+        if snapshot is not None:
+            return snapshot
+        plays = np.load(io.BytesIO(stored[b'plays']), allow_pickle=False)
+        return ListeningSnapshot(user_id, plays, vocab, generation)
+
+    snapshot = build_snapshot(user_id, generation)
+    save_snapshot(snapshot)
+    return snapshot
@@ -0,0 +1,124 @@
+import logging
+import time
+from datetime import timezone
+
+from redis.exceptions import WatchError
+
+from server.redis_client import redis_client, data_version_key, get_data_version
+from server.services.listening_snapshot import load_snapshot, _epoch_to_date, SECONDS_PER_DAY
+
+#& per-user streak state in a redis hash, advanced at ingest so reads are O(1)
+#~ fields are epoch days (utc): last_day, current_start, current_length, best_start, best_length
+STREAK_FIELDS = ('last_day', 'current_start', 'current_length', 'best_start', 'best_length')
+#~ keys get_streak adds to the streak payload
+STREAK_RESULT_FIELDS = (
+    'longest_streak_days', 'longest_streak_start', 'longest_streak_end',
+    'current_streak_days', 'current_streak_start'
+)
+
+def _streak_key(user_id):
+    return f'listening_streak:{user_id}'
+
+def _epoch_day(played_at):
+    #~ naive timestamps are stored as utc
+    if played_at.tzinfo is None:
+        played_at = played_at.replace(tzinfo=timezone.utc)
+    return int(played_at.timestamp()) // SECONDS_PER_DAY
+
+def rebuild_streak_state(user_id):
+    """
+    Recompute streak state frm the user's snapshot (1 vectorised pass) & store it.
+
+    Stored under the same WATCH/MULTI guard as ingest, also watching the data version: if
+    ingest touched either while the snapshot was read, or the snapshot predates the current
+    version, the result is returned but nt written so it cant clobber fresher state.
+    """
+    key = _streak_key(user_id)
+    with redis_client.pipeline() as pipe:
+        pipe.watch(key, data_version_key(user_id))
+        snapshot = load_snapshot(user_id)
+        state = snapshot.streak_state()
+        if state is None or snapshot.generation != get_data_version(user_id):
+            return state
+        try:
+            pipe.multi()
+            pipe.hset(key, mapping=state)
+            pipe.execute()
+        except WatchError:
+            logging.info(f"user {user_id} streak changed mid-rebuild, nt storing rebuilt state")
+    return state
+
+def _advance(state, new_days):
+    """
+    Apply new listening days to streak state.
+
+    Returns:
+        Updated state, or None if a day lands before the current streak (needs rebuild)
+    """
+    state = dict(state)
+    for day in new_days:
+        if day <= state['last_day']:
+            if day >= state['current_start']:
+                continue  #~ already inside current streak
+            return None
+        if day == state['last_day'] + 1:
+            state['current_length'] += 1
+        else:
+            state['current_start'], state['current_length'] = day, 1
+        state['last_day'] = day
+        if state['current_length'] > state['best_length']:
+            state['best_start'], state['best_length'] = state['current_start'], state['current_length']
+    return state
+
+def record_play_days(user_id, played_ats):
+    """
+    Advance the user's streak state w newly ingested plays.
+
+    Optimistic WATCH/MULTI so concurrent syncs of same user cant lose an update;
+    state that cant be advanced (missing, or late plays before current streak) is dropped
+    & rebuilt on next read.
+    """
+    new_days = sorted({_epoch_day(played_at) for played_at in played_ats})
+    if not new_days:
+        return
+    key = _streak_key(user_id)
+    with redis_client.pipeline() as pipe:
+        for _ in range(3):
+            try:
+                pipe.watch(key)
+                raw = pipe.hgetall(key)
+                state = {field: int(raw[field]) for field in STREAK_FIELDS} if raw else None
+                updated = _advance(state, new_days) if state else None
+                pipe.multi()
+                if updated:
+                    pipe.hset(key, mapping=updated)
+                else:
+                    pipe.delete(key)
+                pipe.execute()
+                return
+            except WatchError:
+                continue
+    logging.warning(f"user {user_id} streak state contended, dropping fr rebuild")
+    redis_client.delete(key)
+
+def get_streak(user_id):
+    """
+    Longest & current listening streaks, read frm stored state.
+
+    Returns:
+        Dict w longest_streak_days/start/end & current_streak_days/start
+        (current streak is 0 once a full utc day passes w no plays)
+    """
+    raw = redis_client.hgetall(_streak_key(user_id))
+    state = {field: int(raw[field]) for field in STREAK_FIELDS} if raw else rebuild_streak_state(user_id)
+    if not state:
+        return {field: 0 if field.endswith('_days') else None for field in STREAK_RESULT_FIELDS}
+    today = int(time.time()) // SECONDS_PER_DAY
+    alive = state['last_day'] >= today - 1
+    return {
+        'longest_streak_days': state['best_length'],
+        'longest_streak_start': _epoch_to_date(state['best_start']).isoformat(),
+        'longest_streak_end': _epoch_to_date(state['best_start'] + state['best_length'] - 1).isoformat(),
+        'current_streak_days': state['current_length'] if alive else 0,
+        'current_streak_start': _epoch_to_date(state['current_start']).isoformat() if alive else None
+    }
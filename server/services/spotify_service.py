@@ -0,0 +1,94 @@
+import logging
+import time
+from datetime import timedelta
+
+import requests
+
+from server.redis_client import redis_client, get_cached, set_cached
+
+#& spotify only recomputes top lists ~daily, so serve cached payload & refresh in bg once it ages
+TOP_ARTISTS_CACHE_TTL = timedelta(days=2)  #~ hard expiry, entry gone after this
+TOP_ARTISTS_REFRESH_AFTER = timedelta(hours=12)  #~ soft expiry, bg refresh triggered after this
+#~ always fetch max page so every caller limit is served frm same entry
+SPOTIFY_TOP_ARTISTS_LIMIT = 50
+TIME_RANGES = ('short_term', 'medium_term', 'long_term')
+
+class SpotifyAPIError(Exception):
+    """Raised when Spotify responds w non-200; keeps status & body fr route error responses"""
+    def __init__(self, status_code, details):
+        super().__init__(f'Failed to fetch data from Spotify: {details}')
+        self.status_code = status_code
+        self.details = details
+
+def _top_artists_cache_key(user_id, time_range):
+    return f'spotify_top_artists:{user_id}:{time_range}'
+
+def fetch_top_artists(access_token, time_range='medium_term'):
+    """
+    Call Spotify /v1/me/top/artists fr a full page of the user's top artists.
+
+    Raises:
+        SpotifyAPIError: if Spotify responds w non-200
+    """
+    response = requests.get(
+        'https://api.spotify.com/v1/me/top/artists',
+        headers={'Authorization': f'Bearer {access_token}'},
+        params={'limit': SPOTIFY_TOP_ARTISTS_LIMIT, 'time_range': time_range}
+    )
+    if response.status_code != 200:
+        try:
+            details = response.json()
+        except ValueError:
+            details = response.text
+        raise SpotifyAPIError(response.status_code, details)
+    return response.json().get('items', [])
+
+def refresh_top_artists_cache(user, time_range='medium_term'):
+    """
+    Fetch top artists frm Spotify & overwrite the cached payload.
+
+    Returns:
+        List of Spotify artist objects
+    """
+    items = fetch_top_artists(user.oauth_token, time_range)
+    set_cached(
+        _top_artists_cache_key(user.id, time_range),
+        {'items': items, 'fetched_at': time.time()},
+        ex=TOP_ARTISTS_CACHE_TTL
+    )
+    return items
+
+def _schedule_refresh(user_id, time_range):
+    #~ only 1 bg refresh per user/time_range in flight across workers
+    lock_key = f'{_top_artists_cache_key(user_id, time_range)}:refreshing'
+    if not redis_client.set(lock_key, '1', nx=True, ex=300):
+        return
+    from server.tasks.sync_tasks import refresh_top_artists_task
+    refresh_top_artists_task.delay(user_id, time_range)
+
+def get_top_artists(user, time_range='medium_term', limit=SPOTIFY_TOP_ARTISTS_LIMIT):
+    """
+    Get the user's Spotify top artists, served frm cache where possible.
+
+    Args:
+        user: User w a valid oauth_token
+        time_range: 'short_term', 'medium_term', or 'long_term'
+        limit: Number of artists to return (max 50)
+
+    Returns:
+        List of Spotify artist objects, best first
+
+    Raises:
+        SpotifyAPIError: on cache miss if Spotify responds w non-200
+    """
+    cached = get_cached(_top_artists_cache_key(user.id, time_range))
+    if isinstance(cached, dict) and 'items' in cached:
+        age = time.time() - cached.get('fetched_at', 0)
+        if age > TOP_ARTISTS_REFRESH_AFTER.total_seconds():
+            try:
+                _schedule_refresh(user.id, time_range)
+            except Exception as e:
+                logging.warning(f"failed to schedule top artists refresh fr user {user.id}: {e}")
+        return cached['items'][:limit]
+
+    return refresh_top_artists_cache(user, time_range)[:limit]
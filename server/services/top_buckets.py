@@ -0,0 +1,262 @@
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import WatchError
+from sqlalchemy import func
+
+from server.extensions import db
+from server.model import ListeningHistory
+from server.redis_client import redis_client
+
+#& per-user daily play-count zsets fr tracks & artists, plus running monthly totals
+#~ window top-k = ZUNIONSTORE over whole months inside window + leftover edge days, no postgres
+BUCKET_KINDS = ('tracks', 'artists')
+#~ longest home window is 365 days; buckets outlive it a little then expire on their own
+BUCKET_RETENTION = timedelta(days=370)
+PRIME_LOCK_TTL = 600
+PRIME_ATTEMPTS = 3
+
+def _day_key(kind, user_id, day):
+    return f'top_{kind}_day:{user_id}:{day:%Y%m%d}'
+
+def _month_key(kind, user_id, month_start):
+    return f'top_{kind}_month:{user_id}:{month_start:%Y%m}'
+
+def _primed_key(user_id):
+    return f'top_buckets_primed:{user_id}'
+
+def _writes_key(user_id):
+    #~ bumped by every ingest write to the user's buckets; prime WATCHes it instead of 100s of bucket keys
+    return f'top_buckets_writes:{user_id}'
+
+def _track_meta_key(user_id, month_start):
+    #~ track_id -> json {track_name, artist, artwork_url} fr tracks user played that month;
+    #~ expires w the month bucket so metadata never outlives the counts it labels
+    return f'top_track_meta:{user_id}:{month_start:%Y%m}'
+
+def _utc_day(played_at):
+    #~ naive timestamps are stored as utc
+    if played_at.tzinfo:
+        played_at = played_at.astimezone(timezone.utc)
+    return played_at.date()
+
+def _expire_at(day):
+    expiry = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + BUCKET_RETENTION
+    return int(expiry.timestamp())
+
+def _add_to_buckets(pipe, user_id, day, track_counts, artist_counts, track_meta):
+    month_start = day.replace(day=1)
+    if track_counts:
+        meta_key = _track_meta_key(user_id, month_start)
+        pipe.hset(meta_key, mapping={track_id: track_meta[track_id] for track_id in track_counts})
+        pipe.expireat(meta_key, _expire_at(month_start))
+    for kind, counts in (('tracks', track_counts), ('artists', artist_counts)):
+        if not counts:
+            continue
+        day_key = _day_key(kind, user_id, day)
+        month_key = _month_key(kind, user_id, month_start)
+        for member, plays in counts.items():
+            pipe.zincrby(day_key, plays, member)
+            pipe.zincrby(month_key, plays, member)
+        pipe.expireat(day_key, _expire_at(day))
+        pipe.expireat(month_key, _expire_at(month_start))
+
+def record_plays(user_id, plays):
+    """
+    Add newly ingested plays to the user's daily & monthly buckets in 1 round trip.
+
+    Args:
+        user_id: User the plays belong to
+        plays: Iterable of dicts w track_id, track_name, artist, artwork_url & played_at
+    """
+    by_day = {}
+    track_meta = {}
+    for play in plays:
+        day = _utc_day(play['played_at'])
+        track_counts, artist_counts = by_day.setdefault(day, (Counter(), Counter()))
+        if play.get('track_id'):
+            track_counts[play['track_id']] += 1
+            track_meta[play['track_id']] = json.dumps({
+                'track_name': play.get('track_name'),
+                'artist': play.get('artist'),
+                'artwork_url': play.get('artwork_url')
+            })
+        if play.get('artist'):
+            artist_counts[play['artist']] += 1
+    if not by_day:
+        return
+
+    pipe = redis_client.pipeline(transaction=False)
+    #~ sent 1st so any ZINCRBY that lands during a prime has already tripped its WATCH
+    pipe.incr(_writes_key(user_id))
+    pipe.expire(_writes_key(user_id), BUCKET_RETENTION)
+    for day, (track_counts, artist_counts) in by_day.items():
+        _add_to_buckets(pipe, user_id, day, track_counts, artist_counts, track_meta)
+    pipe.execute()
+
+def is_primed(user_id):
+    return bool(redis_client.exists(_primed_key(user_id)))
+
+def _read_bucket_counts(user_id, today):
+    #~ ({day: (track Counter, artist Counter)}, track_id -> meta json, groups read) frm the last year
+    since = today - timedelta(days=365)
+    day_expr = func.date(ListeningHistory.played_at)
+    rows = db.session.query(
+        day_expr.label('day'),
+        ListeningHistory.track_id,
+        ListeningHistory.track_name,
+        ListeningHistory.artist,
+        ListeningHistory.artwork_url,
+        func.count(ListeningHistory.id).label('plays')
+    ).filter(
+        ListeningHistory.user_id == user_id,
+        ListeningHistory.played_at >= datetime(since.year, since.month, 1, tzinfo=timezone.utc)
+    ).group_by(
+        day_expr, ListeningHistory.track_id, ListeningHistory.track_name,
+        ListeningHistory.artist, ListeningHistory.artwork_url
+    ).all()
+
+    by_day = {}
+    track_meta = {}
+    for row in rows:
+        #~ postgres returns date, sqlite returns 'YYYY-MM-DD'
+        day = row.day if hasattr(row.day, 'year') else datetime.strptime(row.day, '%Y-%m-%d').date()
+        track_counts, artist_counts = by_day.setdefault(day, (Counter(), Counter()))
+        if row.track_id:
+            track_counts[row.track_id] += row.plays
+            track_meta[row.track_id] = json.dumps({
+                'track_name': row.track_name,
+                'artist': row.artist,
+                'artwork_url': row.artwork_url
+            })
+        if row.artist:
+            artist_counts[row.artist] += row.plays
+    return by_day, track_meta, len(rows)
+
+def prime_buckets(user_id):
+    """
+    Backfill the user's buckets frm the last year of listening_history.
+
+    Rewritten under WATCH on the user's ingest write counter: a record_plays landing between
+    the sql read & the rewrite aborts it (retried w a fresh read) instead of being wiped by
+    the DEL or re-added on top of counts the read already included.
+
+    Returns:
+        Number of (day, track) groups written, None if ingest kept racing every attempt
+    """
+    today = datetime.now(timezone.utc).date()
+    with redis_client.pipeline() as pipe:
+        for _ in range(PRIME_ATTEMPTS):
+            try:
+                pipe.watch(_writes_key(user_id))
+                by_day, track_meta, groups = _read_bucket_counts(user_id, today)
+                #~ drop whatever partial state exists, then rebuild atomically
+                months = {day.replace(day=1) for day in by_day}
+                stale_keys = [
+                    key for kind in BUCKET_KINDS
+                    for key in [_day_key(kind, user_id, day) for day in by_day] + [_month_key(kind, user_id, month) for month in months]
+                ] + [_track_meta_key(user_id, month) for month in months]
+                pipe.multi()
+                if stale_keys:
+                    pipe.delete(*stale_keys)
+                for day, (track_counts, artist_counts) in by_day.items():
+                    _add_to_buckets(pipe, user_id, day, track_counts, artist_counts, track_meta)
+                pipe.set(_primed_key(user_id), int(datetime.now(timezone.utc).timestamp()))
+                pipe.execute()
+                logging.info(f"primed top buckets fr user {user_id}: {groups} groups over {len(by_day)} days")
+                return groups
+            except WatchError:
+                continue
+    logging.warning(f"top bucket prime fr user {user_id} kept racing ingest, retry next schedule")
+    return None
+
+def schedule_prime(user_id):
+    """Enqueue a bucket backfill fr user, at most 1 in flight across workers"""
+    if not redis_client.set(f'{_primed_key(user_id)}:priming', '1', nx=True, ex=PRIME_LOCK_TTL):
+        return
+    from server.tasks.sync_tasks import prime_top_buckets_task
+    prime_top_buckets_task.delay(user_id)
+
+def _window_keys(kind, user_id, today, days):
+    #~ whole months starting inside window come frm monthly totals, edge days frm daily buckets
+    start = today - timedelta(days=days - 1)
+    first_month = start.replace(day=1)
+    if first_month < start:
+        first_month = (first_month + timedelta(days=32)).replace(day=1)
+    keys = []
+    month = first_month
+    while month <= today:
+        keys.append(_month_key(kind, user_id, month))
+        month = (month + timedelta(days=32)).replace(day=1)
+    day = start
+    while day < first_month and day <= today:
+        keys.append(_day_key(kind, user_id, day))
+        day += timedelta(days=1)
+    return keys
+
+def _track_metas(user_id, track_ids, today, days):
+    """Metadata fr top-k track ids frm the month meta hashes in window, newest month wins"""
+    meta_by_id = {track_id: {} for track_id in track_ids}
+    if not track_ids:
+        return meta_by_id
+    start = today - timedelta(days=days - 1)
+    month_keys = []
+    month = today.replace(day=1)
+    while month >= start.replace(day=1):
+        month_keys.append(_track_meta_key(user_id, month))
+        month = (month - timedelta(days=1)).replace(day=1)
+    pipe = redis_client.pipeline(transaction=False)
+    for key in month_keys:
+        pipe.hmget(key, track_ids)
+    for metas in pipe.execute():
+        for track_id, meta in zip(track_ids, metas):
+            if meta and not meta_by_id[track_id]:
+                meta_by_id[track_id] = json.loads(meta)
+    return meta_by_id
+
+def get_window_top_data(user_id, time_frames, limit=10):
+    """
+    Top songs & artists fr every time frame (label -> days), served entirely frm redis.
+
+    Windows are whole utc days ending today.
+
+    Returns:
+        (top_songs, top_artists) in the same shape as get_multi_window_top_data
+    """
+    today = datetime.now(timezone.utc).date()
+    labels = list(time_frames)
+    #~ MULTI so concurrent requests fr same user cant clobber each other's scratch keys
+    pipe = redis_client.pipeline()
+    for kind in BUCKET_KINDS:
+        for label in labels:
+            dest = f'top_{kind}_window:{user_id}:{label}'
+            pipe.zunionstore(dest, _window_keys(kind, user_id, today, time_frames[label]))
+            pipe.zrevrange(dest, 0, limit - 1, withscores=True)
+            pipe.delete(dest)
+    results = pipe.execute()
+    #~ each window contributed (zunionstore, zrevrange, delete) replies
+    ranked = results[1::3]
+    track_ranked, artist_ranked = ranked[:len(labels)], ranked[len(labels):]
+
+    track_ids = list({member for window in track_ranked for member, _ in window})
+    meta_by_id = _track_metas(user_id, track_ids, today, max(time_frames.values(), default=0))
+
+    top_songs = {
+        label: [
+            {
+                'track_id': track_id,
+                'track_name': meta_by_id[track_id].get('track_name'),
+                'artist': meta_by_id[track_id].get('artist'),
+                'artwork_url': meta_by_id[track_id].get('artwork_url'),
+                'play_count': int(plays)
+            } for track_id, plays in window
+        ] for label, window in zip(labels, track_ranked)
+    }
+    top_artists = {
+        label: [
+            {'artist': artist, 'play_count': int(plays)} for artist, plays in window
+        ] for label, window in zip(labels, artist_ranked)
+    }
+    return top_songs, top_artists
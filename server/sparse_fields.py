@@ -0,0 +1,44 @@
+#& sparse fieldsets: ?fields=welcome_message,top_songs.1_month
+#~ top-level name selects a whole section, name.sub selects keys inside it
+
+def parse_fields(param):
+    """
+    Parse a fields query param.
+
+    Returns:
+        None if param absent/blank (everything), else dict of top-level name ->
+        set of sub-keys (None when whole section wanted)
+    """
+    if not param or not param.strip():
+        return None
+    fields = {}
+    for item in param.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, sub = item.partition('.')
+        if not sub:
+            fields[name] = None
+        elif name not in fields or fields[name] is not None:
+            fields.setdefault(name, set()).add(sub)
+    return fields
+
+def unknown_fields(fields, allowed):
+    """Top-level names in fields not in allowed"""
+    return sorted(name for name in (fields or {}) if name not in allowed)
+
+def wants(fields, name):
+    return fields is None or name in fields
+
+def prune(data, fields, always=()):
+    """Keep only requested fields (+ always-included keys) of a dict payload"""
+    if fields is None:
+        return data
+    pruned = {}
+    for key, value in data.items():
+        if key in always:
+            pruned[key] = value
+        elif key in fields:
+            sub = fields[key]
+            pruned[key] = {k: v for k, v in value.items() if k in sub} if sub and isinstance(value, dict) else value
+    return pruned
@@ -1,12 +1,19 @@
 from celery import shared_task
 import requests
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 import logging
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from server.extensions import db
 from server.model import ListeningHistory, AggregatedStats, Event, User
-from server.redis_client import redis_client, batch_get, set_cached
+from server.services.artist_catalog import resolve_artist_genres, refresh_stale_artists, upsert_artists
+from server.services.spotify_service import refresh_top_artists_cache, SpotifyAPIError
+from server.services.listening_snapshot import invalidate_snapshot, build_snapshot, save_snapshot
+from server.services.artist_listeners import record_plays, rebuild_leaderboard
+from server.services.listening_streak import record_play_days
+from server.services.genre_rollup import add_plays_to_rollup, rebuild_genre_rollup
+from server.services.top_buckets import prime_buckets, record_plays as record_top_bucket_plays
+from server.redis_client import bump_data_version
 from server.tasks.auth_tasks import refresh_user_token
 
 @shared_task
@@ -62,7 +69,7 @@ def fetch_listening_history(user_id):
 
     history_data = response.json().get('items', [])
 
-    #& begin batch caching of artist genres
+    #& resolve genres fr all distinct primary artists up front (hot cache -> catalog -> spotify)
     distinct_artist_ids = set()
     for item in history_data:
         track = item.get('track', {})
@@ -71,18 +78,9 @@ def fetch_listening_history(user_id):
             artist_id = primary_artist.get('id')
             if artist_id:
                 distinct_artist_ids.add(artist_id)
-    #~ build keys + perform single mget req using batch_get utility
-    cached_keys = [f'artist_genre:{artist_id}' for artist_id in distinct_artist_ids]
-    cached_values = batch_get(cached_keys)  #~ use local cache where possible bef Redis
-    artist_genre_cache = {}
-    for i, key in enumerate(cached_keys):
-        #~ store cached value fr this artist id
-        artist_id = key.split(':')[1]
-        artist_genre_cache[artist_id] = cached_values[i]
-    #~ init pipeline to batch writes fr missing keys
-    pipeline = redis_client.pipeline()
-    #~ end batch caching
+    artist_genre_cache = resolve_artist_genres(distinct_artist_ids, headers)
 
+    new_plays = []
     for item in history_data:
         track = item.get('track', {})
         try:
@@ -105,25 +103,10 @@ def fetch_listening_history(user_id):
 
         genres = None
         if track.get('artists'):
-            primary_artist = track['artists'][0]
-            artist_id = primary_artist.get('id')
+            artist_id = track['artists'][0].get('id')
             if artist_id:
                 genres = artist_genre_cache.get(artist_id)
-                if genres is None:
-                    artist_url = f'https://api.spotify.com/v1/artists/{artist_id}'
-                    artist_response = requests.get(artist_url, headers=headers)
-                    if artist_response.status_code == 200:
-                        artist_data = artist_response.json()
-                        genres_list = artist_data.get('genres', [])
-                        try:
-                            genres = ', '.join(genres_list)
-                        except Exception:
-                            genres = ''
-                        #~ update local cache + queue setex call via pipeline
-                        artist_genre_cache[artist_id] = genres
-                        #~ using set_cached to update both local & redis caches
-                        set_cached(f'artist_genre:{artist_id}', genres, ex=timedelta(days=1))
-        
+
         new_history = ListeningHistory(
             user_id=user.id,
             track_id=track_id,
@@ -135,15 +118,47 @@ def fetch_listening_history(user_id):
             played_at=played_at
         )
         db.session.add(new_history)
-    pipeline.execute()
+        #~ plain values, so post-commit hooks dont reload each expired row
+        new_plays.append({
+            'played_at': played_at,
+            'track_id': track_id,
+            'track_name': new_history.track_name,
+            'artist': new_history.artist,
+            'artwork_url': new_history.artwork_url,
+            'genre': genres,
+            'duration': new_history.duration
+        })
     try:
+        #~ rollup upsert rides in same transaction as the plays (autoflush may raise IntegrityError here too)
+        add_plays_to_rollup(user.id, new_plays)
         db.session.commit()
-        return {'message': 'listening history synced successfully'}
     except IntegrityError as e:
         db.session.rollback()
         logging.info(f"Skipping duplicate entry: {str(e)}")
         return {'message': 'listening history synced (skipped duplicates)'}
 
+    #& new plays landed: bump data version (invalidates versioned caches), rebuild snapshot in bg
+    if new_plays:
+        try:
+            bump_data_version(user.id)
+            invalidate_snapshot(user.id)
+            build_listening_snapshot_task.delay(user.id)
+        except Exception as e:
+            logging.warning(f"user {user.id} data version bump failed: {e}")
+        try:
+            record_plays(user.id, new_plays)
+        except Exception as e:
+            logging.warning(f"user {user.id} artist listener stats update failed: {e}")
+        try:
+            record_top_bucket_plays(user.id, new_plays)
+        except Exception as e:
+            logging.warning(f"user {user.id} top bucket update failed: {e}")
+        try:
+            record_play_days(user.id, [play['played_at'] for play in new_plays])
+        except Exception as e:
+            logging.warning(f"user {user.id} streak state update failed: {e}")
+    return {'message': 'listening history synced successfully'}
+
 @shared_task
 def aggregate_listening_history_task(user_id):
     db.engine.dispose()  #~ dispose stale connections
@@ -253,4 +268,55 @@ def update_event_statuses():
             event.status = new_status
             updated_count += 1
     db.session.commit()
-    return f"updated {updated_count} event statuses at {now}"
\ No newline at end of file
+    return f"updated {updated_count} event statuses at {now}"
+
+@shared_task
+def refresh_stale_artists_task():
+    db.engine.dispose()
+    refreshed = refresh_stale_artists()
+    return {'message': f'refreshed {refreshed} stale artist catalog entries'}
+
+@shared_task
+def refresh_top_artists_task(user_id, time_range='medium_term'):
+    db.engine.dispose()
+    user = User.query.get(user_id)
+    if not user or not user.oauth_token:
+        return {'error': 'user not found / not authenticated'}
+    try:
+        items = refresh_top_artists_cache(user, time_range)
+    except SpotifyAPIError as e:
+        logging.warning(f"user {user_id} top artists refresh failed: {e.details}")
+        return {'error': 'failed to refresh top artists', 'details': e.details}
+    #~ top-artist objects carry genres, image & popularity, so keep catalog warm fr free
+    #~ (only here, nt on request path: upsert commits & a failure must nt poison request's session)
+    try:
+        upsert_artists(items)
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"failed to upsert top artists into catalog: {e}")
+    return {'message': f'cached {len(items)} top artists ({time_range})'}
+
+@shared_task
+def build_listening_snapshot_task(user_id):
+    db.engine.dispose()
+    snapshot = build_snapshot(user_id)
+    saved = save_snapshot(snapshot)
+    return {'message': f'listening snapshot built ({len(snapshot)} plays, saved={saved})'}
+
+@shared_task
+def prime_top_buckets_task(user_id):
+    db.engine.dispose()
+    groups = prime_buckets(user_id)
+    return {'message': f'top buckets primed fr user {user_id} ({groups} groups)'}
+
+@shared_task
+def rebuild_artist_leaderboard_task(artist):
+    db.engine.dispose()
+    listeners = rebuild_leaderboard(artist)
+    return {'message': f"listener leaderboard fr '{artist}' rebuilt ({listeners} listeners)"}
+
+@shared_task
+def rebuild_genre_rollup_task(user_id):
+    db.engine.dispose()
+    rows = rebuild_genre_rollup(user_id)
+    return {'message': f'genre rollup rebuilt fr user {user_id} ({rows} rows)'}
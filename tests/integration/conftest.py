@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+import threading
+import time
+
+import pytest
+from redis.exceptions import LockError, WatchError
+
+#& in-memory redis stand-in fr service tests; covers only the commands the services use
+#~ keys carry a version bumped on every write so WATCH / MULTI conflicts can be simulated
+class FakeRedis:
+    def __init__(self, decode_responses=True):
+        self.decode_responses = decode_responses
+        self.data = {}
+        self.expires_at = {}
+        self.versions = {}
+        self.published = []
+        self.round_trips = 0
+        self._mutex = threading.RLock()
+
+    def _norm(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if self.decode_responses:
+            return value.decode() if isinstance(value, bytes) else value
+        return value.encode() if isinstance(value, str) else value
+
+    def _alive(self, key):
+        expires_at = self.expires_at.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return key in self.data
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key):
+        with self._mutex:
+            return self.data[key] if self._alive(key) else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        with self._mutex:
+            if nx and self._alive(key):
+                return None
+            self.data[key] = self._norm(value)
+            self.expires_at.pop(key, None)
+            if ex or px:
+                self.expires_at[key] = time.time() + (ex if ex else px / 1000)
+            self._touch(key)
+            return True
+
+    def setex(self, key, seconds, value):
+        return self.set(key, value, ex=int(getattr(seconds, 'total_seconds', lambda: seconds)()))
+
+    def delete(self, *keys):
+        with self._mutex:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self.data.pop(key, None)
+                self.expires_at.pop(key, None)
+                self._touch(key)
+            return removed
+
+    def exists(self, *keys):
+        with self._mutex:
+            return sum(1 for key in keys if self._alive(key))
+
+    def incr(self, key, amount=1):
+        with self._mutex:
+            value = int(self.get(key) or 0) + amount
+            expires_at = self.expires_at.get(key)
+            self.set(key, value)
+            if expires_at is not None:
+                self.expires_at[key] = expires_at
+            return value
+
+    def ttl(self, key):
+        with self._mutex:
+            if not self._alive(key):
+                return -2
+            expires_at = self.expires_at.get(key)
+            return -1 if expires_at is None else max(int(expires_at - time.time()), 1)
+
+    def expire(self, key, seconds):
+        with self._mutex:
+            if not self._alive(key):
+                return False
+            self.expires_at[key] = time.time() + int(getattr(seconds, 'total_seconds', lambda: seconds)())
+            return True
+
+    def expireat(self, key, when):
+        with self._mutex:
+            if not self._alive(key):
+                return False
+            self.expires_at[key] = when
+            return True
+
+    def rename(self, src, dst):
+        with self._mutex:
+            self.data[dst] = self.data.pop(src)
+            self.expires_at.pop(dst, None)
+            if src in self.expires_at:
+                self.expires_at[dst] = self.expires_at.pop(src)
+            self._touch(src)
+            self._touch(dst)
+            return True
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self._mutex:
+            self._alive(key)
+            hash_ = self.data.setdefault(key, {})
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            for f, v in items.items():
+                hash_[self._norm(f)] = self._norm(v)
+            self._touch(key)
+            return len(items)
+
+    def hsetnx(self, key, field, value):
+        with self._mutex:
+            if self.hget(key, field) is not None:
+                return 0
+            return self.hset(key, field, value)
+
+    def hget(self, key, field):
+        with self._mutex:
+            return self.data[key].get(self._norm(field)) if self._alive(key) else None
+
+    def hmget(self, key, keys, *args):
+        #~ redis-py takes a list or varargs fields
+        fields = list(keys) + list(args) if isinstance(keys, (list, tuple)) else [keys, *args]
+        return [self.hget(key, field) for field in fields]
+
+    def hgetall(self, key):
+        with self._mutex:
+            return dict(self.data[key]) if self._alive(key) else {}
+
+    def hincrby(self, key, field, amount=1):
+        with self._mutex:
+            value = int(self.hget(key, field) or 0) + amount
+            self.hset(key, field, value)
+            return value
+
+    def zadd(self, key, mapping):
+        with self._mutex:
+            self._alive(key)
+            zset = self.data.setdefault(key, {})
+            for member, score in mapping.items():
+                zset[self._norm(member)] = float(score)
+            self._touch(key)
+            return len(mapping)
+
+    def zincrby(self, key, amount, member):
+        with self._mutex:
+            self._alive(key)
+            zset = self.data.setdefault(key, {})
+            member = self._norm(member)
+            zset[member] = zset.get(member, 0) + amount
+            self._touch(key)
+            return zset[member]
+
+    def zscore(self, key, member):
+        with self._mutex:
+            return self.data[key].get(self._norm(member)) if self._alive(key) else None
+
+    def zrange(self, key, start, end):
+        with self._mutex:
+            zset = self.data[key] if self._alive(key) else {}
+            ordered = sorted(zset, key=lambda member: (zset[member], member))
+            return ordered[start:None if end == -1 else end + 1]
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self._mutex:
+            zset = self.data[key] if self._alive(key) else {}
+            ordered = sorted(zset, key=lambda member: (-zset[member], member))
+            ordered = ordered[start:None if end == -1 else end + 1]
+            return [(member, zset[member]) for member in ordered] if withscores else ordered
+
+    def zunionstore(self, dest, keys):
+        #~ sum aggregate, weights 1; empty union leaves no dest key (like redis)
+        with self._mutex:
+            union = {}
+            for key in keys:
+                for member, score in (self.data[key] if self._alive(key) else {}).items():
+                    union[member] = union.get(member, 0) + score
+            self.delete(dest)
+            if union:
+                self.data[dest] = union
+                self._touch(dest)
+            return len(union)
+
+    def zcard(self, key):
+        with self._mutex:
+            return len(self.data[key]) if self._alive(key) else 0
+
+    def zcount(self, key, low, high):
+        def bound(value):
+            value = str(value)
+            exclusive = value.startswith('(')
+            return float(value.lstrip('(')), exclusive
+        (low, low_ex), (high, high_ex) = bound(low), bound(high)
+        with self._mutex:
+            scores = self.data[key].values() if self._alive(key) else []
+            return sum(
+                1 for score in scores
+                if (score > low if low_ex else score >= low) and (score < high if high_ex else score <= high)
+            )
+
+    def pfadd(self, key, *members):
+        with self._mutex:
+            self._alive(key)
+            hll = self.data.setdefault(key, set())
+            before = len(hll)
+            hll.update(self._norm(member) for member in members)
+            self._touch(key)
+            return int(len(hll) > before)
+
+    def pfcount(self, *keys):
+        #~ exact union; real hll is approx but tests use tiny sets
+        with self._mutex:
+            members = set()
+            for key in keys:
+                if self._alive(key):
+                    members |= self.data[key]
+            return len(members)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def lock(self, name, timeout=None, blocking=True, thread_local=True, **kwargs):
+        return FakeLock(self, name, timeout)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakeLock:
+    def __init__(self, client, name, timeout):
+        self.client = client
+        self.name = name
+        self.timeout = timeout
+        self.token = None
+
+    def acquire(self, blocking=None):
+        token = f'{id(self)}:{time.time()}'
+        if self.client.set(self.name, token, nx=True, ex=self.timeout):
+            self.token = self.client._norm(token)
+            return True
+        return False
+
+    def release(self):
+        with self.client._mutex:
+            if self.token is None or self.client.get(self.name) != self.token:
+                raise LockError("cannot release a lock that's no longer owned")
+            self.client.delete(self.name)
+            self.token = None
+
+class FakePipeline:
+    #~ buffers commands until execute (1 round trip); watch / reads bef multi run immediately
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+        self.watched = {}
+        self.buffering = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def reset(self):
+        self.ops = []
+        self.watched = {}
+        self.buffering = True
+
+    def watch(self, *keys):
+        self.watched = {key: self.client.versions.get(key, 0) for key in keys}
+        self.buffering = False
+
+    def multi(self):
+        self.buffering = True
+
+    def execute(self):
+        with self.client._mutex:
+            self.client.round_trips += 1
+            if any(self.client.versions.get(key, 0) != version for key, version in self.watched.items()):
+                self.reset()
+                raise WatchError('watched key changed')
+            results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+        self.reset()
+        return results
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        def call(*args, **kwargs):
+            if not self.buffering:
+                return method(*args, **kwargs)
+            self.ops.append((name, args, kwargs))
+            return self
+        return call
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Swap redis_client.redis_client / redis_binary_client fr in-memory fakes (text, binary)"""
+    import server.redis_client as rc
+    text_client = FakeRedis(decode_responses=True)
+    binary_client = FakeRedis(decode_responses=False)
+    monkeypatch.setattr(rc, 'redis_client', text_client)
+    monkeypatch.setattr(rc, 'redis_binary_client', binary_client)
+    monkeypatch.setattr(rc, 'local_cache', rc.LocalCache())
+    return text_client, binary_client
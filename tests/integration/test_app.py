@@ -177,4 +177,331 @@ def test_get_current_user_authenticated(client):
     data = response.get_json()
     #~ verify returned user match session data
     assert 'user' in data
-    assert data['user'].get('username') == "testuser"
\ No newline at end of file
+    assert data['user'].get('username') == "testuser"
+
+#& minimal redis stand-in fr cache utility tests: records round trips (pipeline executes)
+class FakeRedisPipelineClient:
+    def __init__(self, store):
+        self.store = store
+        self.round_trips = 0
+        self.published = []
+    def pipeline(self, transaction=True):
+        client = self
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+            def get(self, key):
+                self.ops.append(lambda: client.store.get(key))
+            def mget(self, keys):
+                self.ops.append(lambda: [client.store.get(key) for key in keys])
+            def ttl(self, key):
+                self.ops.append(lambda: 60 if key in client.store else -2)
+            def setex(self, key, seconds, value):
+                self.ops.append(lambda: client.store.__setitem__(key, value))
+            def set(self, key, value):
+                self.ops.append(lambda: client.store.__setitem__(key, value))
+            def delete(self, key):
+                self.ops.append(lambda: client.store.pop(key, None))
+            def publish(self, channel, message):
+                self.ops.append(lambda: client.published.append((channel, message)))
+            def execute(self):
+                client.round_trips += 1
+                return [op() for op in self.ops]
+        return Pipeline()
+
+#& test fr negative-cache sentinel; empty / negative values shld count as hits, nt misses
+def test_get_cached_negative_sentinel(monkeypatch):
+    import server.redis_client as rc
+    store = {'artist_genre:empty': rc.NEGATIVE_CACHE_SENTINEL, 'artist_genre:blank': ''}
+    monkeypatch.setattr(rc, 'redis_binary_client', FakeRedisPipelineClient(store))
+    monkeypatch.setattr(rc, 'local_cache', rc.LocalCache())
+    #~ sentinel recognised, blank string returned as-is, real miss falls back to default
+    assert rc.is_negative_cached(rc.get_cached('artist_genre:empty'))
+    assert rc.get_cached('artist_genre:blank', default='miss') == ''
+    assert rc.get_cached('artist_genre:unknown', default='miss') == 'miss'
+
+#& test fr analytics bundle endpoint w missing user_id / unknown section
+def test_analytics_bundle_validation(client):
+    response = client.get('/analytics/user/bundle')
+    assert response.status_code == 400
+    response = client.get('/analytics/user/bundle?user_id=1&sections=trends,bogus')
+    assert response.status_code == 400
+    #~ verify err names the unknown section
+    assert 'bogus' in response.get_json().get('error')
+
+#& test fr conditional get: matching etag short-circuits to 304 w/o running view
+def test_conditional_get_not_modified(client, monkeypatch):
+    import server.http_cache as http_cache
+    import server.routes.analytics as analytics_routes
+    monkeypatch.setattr(http_cache, 'get_data_version_info', lambda user_id: (3, 1700000000))
+    calls = []
+    class DummySnapshot:
+        def earliest_played_at(self):
+            calls.append(1)
+            return None
+    monkeypatch.setattr(analytics_routes, 'load_snapshot', lambda user_id: DummySnapshot())
+    response = client.get('/analytics/user/earliest-listening-date?user_id=1')
+    assert response.status_code == 200
+    etag = response.headers.get('ETag')
+    assert etag and response.headers.get('Last-Modified')
+    response = client.get('/analytics/user/earliest-listening-date?user_id=1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    #~ verify view only ran fr the 1st request
+    assert len(calls) == 1
+
+#& test fr home data sparse fieldset validation
+def test_home_data_fields_validation(client):
+    response = client.get('/home/data?user_id=1&fields=welcome_message,bogus')
+    assert response.status_code == 400
+    assert 'bogus' in response.get_json().get('error')
+    #~ verify unknown time frame under a top list is rejected
+    response = client.get('/home/data?user_id=1&fields=top_songs.2_days')
+    assert response.status_code == 400
+
+#& test fr bounded local cache: lru eviction, ttl expiry & counters
+def test_local_cache_bounds(monkeypatch):
+    from server.local_cache import LocalCache
+    import server.local_cache as local_cache_module
+    cache = LocalCache(max_entries=2, max_bytes=100)
+    cache.set('a', 1, 60, size=10)
+    cache.set('b', 2, 60, size=10)
+    assert cache.get('a') == 1  #~ a now most recently used
+    cache.set('c', 3, 60, size=10)
+    assert cache.get('b') is None and cache.get('c') == 3
+    #~ byte bound evicts too
+    cache.set('d', 4, 60, size=95)
+    assert len(cache) == 1 and cache.stats()['bytes'] == 95
+    #~ expired entries are dropped on access
+    now = local_cache_module.time.time()
+    monkeypatch.setattr(local_cache_module.time, 'time', lambda: now + 120)
+    assert cache.get('d') is None
+    stats = cache.stats()
+    assert stats['evictions'] == 3 and stats['expirations'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 2
+
+#& test fr local cache writes that arent kept (no ttl / oversized): earlier value is dropped, nt left stale
+def test_local_cache_set_replaces_even_when_not_stored():
+    from server.local_cache import LocalCache
+    cache = LocalCache(max_entries=10, max_bytes=100)
+    cache.set('a', 'old', 60, size=10)
+    cache.set('a', 'new', 0, size=10)
+    assert cache.get('a') is None
+    cache.set('b', 'old', 60, size=10)
+    cache.set('b', 'huge', 60, size=500)
+    assert cache.get('b') is None
+    assert len(cache) == 0 and cache.stats()['bytes'] == 0
+
+#& test fr batch_get: values & ttls fetched in a single round trip
+def test_batch_get_single_round_trip(monkeypatch):
+    import server.redis_client as rc
+    fake = FakeRedisPipelineClient({'k1': '{"a": 1}', 'k2': 'plain'})
+    monkeypatch.setattr(rc, 'redis_binary_client', fake)
+    monkeypatch.setattr(rc, 'local_cache', rc.LocalCache())
+    assert rc.batch_get(['k1', 'k2', 'k3']) == [{'a': 1}, 'plain', None]
+    assert fake.round_trips == 1
+    #~ verify hits now served frm local tier w/o touching redis
+    assert rc.batch_get(['k1', 'k2']) == [{'a': 1}, 'plain']
+    assert fake.round_trips == 1
+
+#& test fr cross-worker invalidation: writes & deletes broadcast the key in the same round trip
+def test_set_cached_publishes_invalidation(monkeypatch):
+    import server.redis_client as rc
+    fake = FakeRedisPipelineClient({})
+    monkeypatch.setattr(rc, 'redis_client', fake)
+    monkeypatch.setattr(rc, 'redis_binary_client', fake)
+    monkeypatch.setattr(rc, 'local_cache', rc.LocalCache())
+    rc.set_cached('k1', {'a': 1}, ex=600)
+    assert rc.cache_codec.decode(fake.store['k1']) == {'a': 1} and fake.round_trips == 1
+    rc.delete_cached('k1')
+    assert 'k1' not in fake.store and rc.get_cached('k1') is None
+    channels = {channel for channel, _ in fake.published}
+    keys = [message.split(' ', 1)[1] for _, message in fake.published]
+    assert channels == {rc.INVALIDATION_CHANNEL} and keys == ['k1', 'k1']
+
+#& test fr cache codec: versioned header, compression above threshold, legacy entries still decode
+def test_cache_codec_round_trip():
+    from server import cache_codec
+    small = {'rank': 3, 'artists': ['a', 'b']}
+    large = {'tracks': [{'name': f'track {i}', 'plays': i} for i in range(500)]}
+    for codec in cache_codec._CODEC_IDS:
+        assert cache_codec.decode(cache_codec.encode(small, codec=codec)) == small
+        encoded = cache_codec.encode(large, codec=codec)
+        assert encoded[3] == 1 and cache_codec.decode(encoded) == large
+    #~ compressed msgpack much smaller than the json it replaces
+    assert len(cache_codec.encode(large)) < len(json.dumps(large)) / 4
+    assert cache_codec.decode(b'{"a": 1}') == {'a': 1} and cache_codec.decode(b'pop, rock') == 'pop, rock'
+    with pytest.raises(cache_codec.CacheCodecError):
+        cache_codec.decode(b'\x00\x09\x01\x00body')
+
+#& test fr cache metrics: hits split by tier & namespace, exposed on metrics endpoint
+def test_cache_metrics_per_namespace(client, monkeypatch):
+    import server.redis_client as rc
+    from server.cache_metrics import CacheMetrics
+    fake = FakeRedisPipelineClient({'artist_genre:1': 'pop'})
+    monkeypatch.setattr(rc, 'redis_binary_client', fake)
+    monkeypatch.setattr(rc, 'local_cache', rc.LocalCache())
+    monkeypatch.setattr(rc, 'cache_metrics', CacheMetrics())
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secret')
+    assert rc.batch_get(['artist_genre:1', 'artist_genre:2']) == ['pop', None]
+    assert rc.get_cached('artist_genre:1') == 'pop'
+    stats = client.get('/metrics/cache', headers={'Authorization': 'Bearer secret'}).get_json()['namespaces']['artist_genre']
+    assert (stats['redis_hits'], stats['local_hits'], stats['misses']) == (1, 1, 1)
+    assert stats['bytes_read'] == 3 and stats['round_trips'] == 1
+
+#& test fr metrics endpoint access: off w/o a token, bearer token required, memory sampling rate limited
+def test_cache_metrics_access(client, monkeypatch, fake_redis):
+    import server.app as app_module
+    import server.cache_metrics as cache_metrics_module
+    text_client, _ = fake_redis
+    monkeypatch.setattr(app_module, 'redis_client', text_client)
+    samples = []
+    monkeypatch.setattr(cache_metrics_module, 'sample_memory_usage', lambda client, max_keys: samples.append(max_keys) or {})
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    assert client.get('/metrics/cache').status_code == 404
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secret')
+    assert client.get('/metrics/cache').status_code == 401
+    assert client.get('/metrics/cache', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    headers = {'Authorization': 'Bearer secret'}
+    assert client.get('/metrics/cache', headers=headers).status_code == 200
+    #~ 1st sample runs (sample size capped), 2nd inside the interval is refused
+    response = client.get('/metrics/cache?memory=1&sample=50000', headers=headers)
+    assert response.status_code == 200 and response.get_json()['memory'] == {}
+    response = client.get('/metrics/cache?memory=1', headers=headers)
+    assert response.status_code == 429 and int(response.headers['Retry-After']) > 0
+    assert samples == [2000]
+
+#& test fr analytics bundle w failed sections: marked no-store, so never revalidated to a 304
+def test_analytics_bundle_errors_not_revalidated(client, monkeypatch):
+    import server.http_cache as http_cache
+    import server.routes.analytics as analytics_routes
+    monkeypatch.setattr(http_cache, 'get_data_version_info', lambda user_id: (3, 1700000000))
+    bundles = [{'trends': [], 'errors': {'heatmap': 'boom'}}, {'trends': [], 'heatmap': {}}]
+    monkeypatch.setattr(analytics_routes, 'get_analytics_bundle', lambda user_id, sections, **kwargs: dict(bundles.pop(0)))
+    url = '/analytics/user/bundle?user_id=1&sections=trends,heatmap'
+    response = client.get(url)
+    assert response.status_code == 200 and response.get_json()['errors'] == {'heatmap': 'boom'}
+    assert 'ETag' not in response.headers and response.headers['Cache-Control'] == 'no-store'
+    #~ next request recomputes & only the complete payload gets validators
+    response = client.get(url)
+    assert response.status_code == 200 and 'errors' not in response.get_json()
+    assert response.headers.get('ETag')
+    #~ swallowed percentile failure counts as an error too
+    monkeypatch.setattr(analytics_routes, 'get_analytics_bundle', lambda user_id, sections, **kwargs: {})
+    monkeypatch.setattr(analytics_routes, 'get_top_listeners_percentile', lambda user_id: {'percentile_confidence': 'error'})
+    response = client.get('/analytics/user/bundle?user_id=1&sections=percentile')
+    assert 'ETag' not in response.headers and response.headers['Cache-Control'] == 'no-store'
+
+#& test fr home sections past the backlog: shed & reported as timed out, slot freed once work ends
+def test_home_sections_shed_when_backlog_full(monkeypatch):
+    import threading
+    import server.routes.home as home_routes
+    monkeypatch.setattr(home_routes, '_section_slots', threading.BoundedSemaphore(1))
+    release = threading.Event()
+    def slow(user_id):
+        release.wait(5)
+        return 'late'
+    def broken(user_id):
+        raise RuntimeError('boom')
+    with app.app_context():
+        results, timed_out, failed = home_routes.run_home_sections(1, {'slow': (slow, 0.1), 'broken': (broken, 5)})
+    #~ slow section held the only slot, so broken was never started
+    assert timed_out == ['slow', 'broken'] and failed == []
+    assert results == {'slow': None, 'broken': None}
+    release.set()
+    assert home_routes._section_slots.acquire(timeout=5)
+    home_routes._section_slots.release()
+    with app.app_context():
+        _, timed_out, failed = home_routes.run_home_sections(1, {'broken': (broken, 5)})
+    assert timed_out == [] and failed == ['broken']
+
+#& test fr home data stream: 1 event per section as it lands, then done w partial / timed_out / failed
+def test_home_data_stream_events(client, monkeypatch):
+    import threading
+    from types import SimpleNamespace
+    import server.routes.home as home_routes
+    user = SimpleNamespace(display_name='Ana', email='ana@example.com')
+    monkeypatch.setattr(home_routes, 'User', SimpleNamespace(query=SimpleNamespace(get=lambda user_id: user)))
+    release = threading.Event()
+    def slow(user_id):
+        release.wait(5)
+        return {'percentile_ranking': 99}
+    def broken(user_id):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(home_routes, 'HOME_SECTIONS', {
+        'top_lists': (lambda user_id: (['song'], ['artist']), 3.0),
+        'longest_listening_streak': (lambda user_id: {'streak': 4}, 3.0),
+        'favorite_genres_evolution': (broken, 3.0),
+        'top_listeners': (slow, 0.2)
+    })
+    try:
+        response = client.get('/home/data/stream?user_id=1')
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-store'
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    finally:
+        release.set()
+    names = [name for name, _ in events]
+    #~ welcome 1st, done last, each finished section exactly once in between
+    assert names[0] == 'welcome' and names[-1] == 'done'
+    assert sorted(names[1:-1]) == ['streak', 'top_artists', 'top_songs']
+    payloads = dict(events)
+    assert payloads['top_songs'] == ['song'] and payloads['top_artists'] == ['artist']
+    assert payloads['streak'] == {'streak': 4}
+    assert payloads['done'] == {
+        'partial': True, 'timed_out': ['top_listeners'], 'failed': ['favorite_genres_evolution']
+    }
+
+#& test fr home data w a swallowed percentile failure: partial & no-store, so never revalidated to a 304
+def test_home_data_percentile_error_not_revalidated(client, monkeypatch):
+    from types import SimpleNamespace
+    import server.http_cache as http_cache
+    import server.routes.home as home_routes
+    monkeypatch.setattr(http_cache, 'get_data_version_info', lambda user_id: (3, 1700000000))
+    user = SimpleNamespace(display_name='Ana', email='ana@example.com')
+    monkeypatch.setattr(home_routes, 'User', SimpleNamespace(query=SimpleNamespace(get=lambda user_id: user)))
+    def broken_snapshot(user_id):
+        raise RuntimeError('snapshot unavailable')
+    monkeypatch.setattr(home_routes, 'load_snapshot', broken_snapshot)
+    url = '/home/data?user_id=1&fields=top_listeners'
+    response = client.get(url)
+    body = response.get_json()
+    assert response.status_code == 200 and body['partial'] is True
+    assert body['top_listeners']['percentile_ranking']['percentile_confidence'] == home_routes.PERCENTILE_ERROR
+    assert 'ETag' not in response.headers and response.headers['Cache-Control'] == 'no-store'
+    #~ once ranking works again the complete payload gets validators
+    monkeypatch.setattr(home_routes, 'get_top_listeners_percentile', lambda user_id: {'percentile_confidence': 'high'})
+    response = client.get(url)
+    assert response.get_json()['partial'] is False and response.headers.get('ETag')
+
+#& test fr percentile read while the artist leaderboard is still backfilling: low confidence & never cached
+def test_percentile_while_leaderboard_building(client, monkeypatch):
+    from types import SimpleNamespace
+    import server.http_cache as http_cache
+    import server.routes.home as home_routes
+    monkeypatch.setattr(http_cache, 'get_data_version_info', lambda user_id: (3, 1700000000))
+    class DummySnapshot:
+        def top_artists(self, limit):
+            return [{'artist': 'Solo Artist', 'play_count': 12}]
+    class DummyQuery:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+        def scalar(self):
+            return 0
+    monkeypatch.setattr(home_routes, 'load_snapshot', lambda user_id: DummySnapshot())
+    monkeypatch.setattr(home_routes, 'db', SimpleNamespace(session=SimpleNamespace(query=lambda *args: DummyQuery())))
+    standing = {'listens': 12, 'rank': 1, 'below': 0, 'total_listeners': 60, 'building': True}
+    monkeypatch.setattr(home_routes, 'get_listener_rank', lambda artist, user_id: dict(standing))
+    result = home_routes.get_top_listeners_percentile(1)
+    assert result['percentile_confidence'] == 'low' and result['leaderboard_building'] is True
+    assert home_routes.is_percentile_provisional(result)
+    response = client.get('/analytics/user/top-listeners-percentile?user_id=1')
+    assert 'ETag' not in response.headers and response.headers['Cache-Control'] == 'no-store'
+    #~ backfill done: same standing is confident & cacheable again
+    standing['building'] = False
+    result = home_routes.get_top_listeners_percentile(1)
+    assert result['percentile_confidence'] == 'high' and not home_routes.is_percentile_provisional(result)
+    response = client.get('/analytics/user/top-listeners-percentile?user_id=1')
+    assert response.headers.get('ETag')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from server.app import app
+from server.extensions import db
+from server.model import Artist
+import server.services.artist_catalog as ac
+
+#~ ci runs on postgres; lets the catalog table also be created when tests run on sqlite
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kwargs):
+    return 'JSON'
+
+class FakeSpotify:
+    """Stands in fr requests.get on /v1/artists; records every batch of ids asked fr"""
+    def __init__(self, genres_by_id, status_code=200):
+        self.genres_by_id = genres_by_id
+        self.status_code = status_code
+        self.calls = []
+
+    def __call__(self, url, headers=None, params=None):
+        ids = params['ids'].split(',')
+        self.calls.append(ids)
+        artists = [
+            {'id': artist_id, 'name': artist_id.title(), 'genres': self.genres_by_id[artist_id]}
+            if artist_id in self.genres_by_id else None
+            for artist_id in ids
+        ]
+        return type('Response', (), {'status_code': self.status_code, 'json': lambda self: {'artists': artists}})()
+
+@pytest.fixture
+def catalog(fake_redis, monkeypatch):
+    with app.app_context():
+        db.metadata.create_all(bind=db.engine, tables=[Artist.__table__])
+        Artist.query.delete()
+        db.session.commit()
+        yield db.session
+        db.session.rollback()
+        Artist.query.delete()
+        db.session.commit()
+
+def _add_artists(session, rows):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    session.add_all([
+        Artist(spotify_id=spotify_id, name=spotify_id, genres=genres, refreshed_at=now - timedelta(days=age_days))
+        for spotify_id, genres, age_days in rows
+    ])
+    session.commit()
+
+#& test fr genre lookup order: redis hot cache, then catalog table, then spotify (persisted to catalog)
+def test_resolve_artist_genres_lookup_order(catalog, monkeypatch):
+    #~ catalog disagrees w cache fr 'hot' & spotify disagrees w catalog fr 'cat1', so the tier used shows
+    _add_artists(catalog, [('hot', ['stale'], 1), ('cat1', ['rock'], 1), ('cat0', [], 1)])
+    ac._cache_artist_genres('hot', ['pop'])
+    ac._cache_artist_genres('neg', [])
+    spotify = FakeSpotify({'cat1': ['wrong'], 'new1': ['jazz', 'soul']})
+    monkeypatch.setattr(ac.requests, 'get', spotify)
+
+    resolved = ac.resolve_artist_genres(['hot', 'neg', 'cat1', 'cat0', 'new1', 'ghost', None], headers={})
+    assert resolved == {'hot': 'pop', 'neg': '', 'cat1': 'rock', 'cat0': '', 'new1': 'jazz, soul'}
+    #~ only ids missing frm both cache & catalog reach spotify, in 1 batch
+    assert [sorted(ids) for ids in spotify.calls] == [['ghost', 'new1']]
+    assert Artist.query.filter_by(spotify_id='new1').one().genres == ['jazz', 'soul']
+
+    #~ 2nd lookup is served frm the warmed cache alone
+    monkeypatch.setattr(ac.db.session, 'query', lambda *args: pytest.fail('catalog queried on cache hit'))
+    spotify.calls.clear()
+    assert ac.resolve_artist_genres(['hot', 'neg', 'cat1', 'cat0', 'new1'], headers={}) == resolved
+    assert spotify.calls == []
+
+#& test fr stale refresh: oldest rows 1st, updated frm spotify, vanished ids stamped so they dont block the queue
+def test_refresh_stale_artists(catalog, monkeypatch):
+    _add_artists(catalog, [('old1', ['a'], 60), ('gone', ['b'], 50), ('old2', ['c'], 40), ('fresh', ['d'], 1)])
+    monkeypatch.setattr(ac, 'get_app_access_token', lambda: 'token')
+    spotify = FakeSpotify({'old1': ['new-a'], 'old2': [], 'fresh': ['never']})
+    monkeypatch.setattr(ac.requests, 'get', spotify)
+
+    assert ac.refresh_stale_artists(batch_size=2, max_batches=5) == 2
+    assert spotify.calls == [['old1', 'gone'], ['old2']]
+    rows = {artist.spotify_id: artist for artist in Artist.query.all()}
+    assert rows['old1'].genres == ['new-a'] and rows['old2'].genres == []
+    assert rows['gone'].genres == ['b']  #~ kept, just re-stamped
+    stale_before = datetime.now(timezone.utc).replace(tzinfo=None) - ac.ARTIST_STALE_AFTER
+    assert all(row.refreshed_at > stale_before for row in rows.values())
+    #~ refreshed genres go straight to the hot cache
+    assert ac.resolve_artist_genres(['old1', 'old2'], headers={}) == {'old1': 'new-a', 'old2': ''}
+    assert len(spotify.calls) == 2
+
+#& test fr stale refresh edge cases: all-null batch still advances, spotify failure stops w/o touching rows
+def test_refresh_stale_artists_null_and_failed_batches(catalog, monkeypatch):
+    _add_artists(catalog, [('gone1', ['a'], 60), ('gone2', ['b'], 50), ('gone3', ['c'], 40)])
+    monkeypatch.setattr(ac, 'get_app_access_token', lambda: 'token')
+    spotify = FakeSpotify({})
+    monkeypatch.setattr(ac.requests, 'get', spotify)
+    assert ac.refresh_stale_artists(batch_size=2, max_batches=5) == 0
+    assert spotify.calls == [['gone1', 'gone2'], ['gone3']]
+
+    _add_artists(catalog, [('old', ['x'], 90)])
+    failing = FakeSpotify({'old': ['y']}, status_code=503)
+    monkeypatch.setattr(ac.requests, 'get', failing)
+    assert ac.refresh_stale_artists(batch_size=2, max_batches=5) == 0
+    assert failing.calls == [['old']]
+    assert Artist.query.filter_by(spotify_id='old').one().refreshed_at < datetime.now(timezone.utc).replace(tzinfo=None) - ac.ARTIST_STALE_AFTER
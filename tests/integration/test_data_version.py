@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+import time
+
+import server.redis_client as rc
+
+#& test fr data version: seeded frm the clock, bumped by 1, carried into versioned keys
+def test_data_version_seed_and_bump(fake_redis):
+    before = int(time.time() * 1000)
+    version = rc.get_data_version(1)
+    assert version >= before and rc.get_data_version(1) == version
+    assert rc.get_data_version_info(1)[0] == version
+    assert rc.bump_data_version(1) == version + 1
+    assert rc.versioned_key('analytics_trends', 1, 'daily', 30) == f'analytics_trends:1:v{version + 1}:daily:30'
+    assert rc.versioned_key('streak', 1, version=5) == 'streak:1:v5'
+
+#& test fr a lost counter (eviction / flush): versions are never handed out twice
+def test_data_version_not_reused_after_loss(fake_redis):
+    text_client, _ = fake_redis
+    seen = {rc.get_data_version(1)}
+    for _ in range(3):
+        seen.add(rc.bump_data_version(1))
+    old_key = rc.versioned_key('analytics_trends', 1)
+    time.sleep(0.01)  #~ seed is ms clock; 3 bumps in <1ms would otherwise outrun it
+    text_client.delete(rc.data_version_key(1))
+    #~ bump on a missing counter must nt restart frm 1 either
+    version = rc.bump_data_version(1)
+    assert version > max(seen)
+    assert rc.versioned_key('analytics_trends', 1) != old_key
+    assert rc.get_data_version_info(1)[1] is not None
+
+#& test fr versioned_cache: result reused until the version moves, incl. after the counter is lost
+def test_versioned_cache_follows_version(fake_redis):
+    text_client, _ = fake_redis
+    calls = []
+    @rc.versioned_cache('test_versioned')
+    def compute(user_id, days):
+        calls.append(days)
+        return {'days': days, 'call': len(calls)}
+
+    assert compute(1, 30) == {'days': 30, 'call': 1}
+    assert compute(1, 30) == {'days': 30, 'call': 1}
+    assert compute.cache_key(1, 30) == f'test_versioned:1:v{rc.get_data_version(1)}:30'
+    rc.bump_data_version(1)
+    assert compute(1, 30) == {'days': 30, 'call': 2}
+    time.sleep(0.01)
+    text_client.delete(rc.data_version_key(1))
+    assert compute(1, 30) == {'days': 30, 'call': 3}
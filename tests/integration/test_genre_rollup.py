@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+from datetime import datetime
+
+import pytest
+
+from server.app import app
+from server.extensions import db
+from server.model import UserGenreMonthly
+from server.services.genre_rollup import (
+    add_plays_to_rollup,
+    get_genre_evolution,
+    GENRE_EVOLUTION_TOP_N,
+    OTHER_GENRE
+)
+
+USER_ID = 1  #~ seeded by ci bef integration tests
+
+@pytest.fixture
+def rollup_session():
+    with app.app_context():
+        db.metadata.create_all(bind=db.engine, tables=[UserGenreMonthly.__table__])
+        UserGenreMonthly.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+        yield db.session
+        db.session.rollback()
+        UserGenreMonthly.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+
+def _rows():
+    return {
+        (row.month, row.genre): row.seconds
+        for row in UserGenreMonthly.query.filter_by(user_id=USER_ID).all()
+    }
+
+#& test fr ingest upsert: repeated syncs accumulate into the same (month, genre) row
+def test_rollup_accumulates_across_ingests(rollup_session):
+    add_plays_to_rollup(USER_ID, [
+        {'played_at': datetime(2025, 1, 3), 'genre': 'pop', 'duration': 200},
+        {'played_at': datetime(2025, 1, 9), 'genre': 'pop', 'duration': 100},
+        {'played_at': datetime(2025, 1, 9), 'genre': None, 'duration': 50},
+    ])
+    rollup_session.commit()
+    add_plays_to_rollup(USER_ID, [
+        {'played_at': datetime(2025, 1, 20), 'genre': 'pop', 'duration': 300},
+        {'played_at': datetime(2025, 2, 1), 'genre': 'rock', 'duration': 400},
+        {'played_at': datetime(2025, 2, 2), 'genre': '', 'duration': None},
+    ])
+    rollup_session.commit()
+    assert _rows() == {
+        ('2025-01', 'pop'): 600,
+        ('2025-01', 'unknown'): 50,
+        ('2025-02', 'rock'): 400,
+        ('2025-02', 'unknown'): 0,
+    }
+
+#& test fr evolution shape: months oldest 1st, top n genres per month + everything else in 'other'
+def test_genre_evolution_folds_other(rollup_session):
+    january = [
+        {'played_at': datetime(2025, 1, 1), 'genre': f'genre {i}', 'duration': (20 - i) * 360}
+        for i in range(GENRE_EVOLUTION_TOP_N + 2)
+    ]
+    february = [{'played_at': datetime(2025, 2, 1), 'genre': 'pop', 'duration': 5400}]
+    add_plays_to_rollup(USER_ID, february + january)
+    rollup_session.commit()
+
+    evolution = get_genre_evolution(USER_ID)
+    assert [entry['month'] for entry in evolution] == ['2025-01', '2025-02']
+    genres = evolution[0]['genres']
+    assert len(genres) == GENRE_EVOLUTION_TOP_N + 1
+    assert genres['genre 0'] == 2.0 and f'genre {GENRE_EVOLUTION_TOP_N}' not in genres
+    #~ last 2 genres (12 + 11 tenths of an hour) fold into other
+    assert genres[OTHER_GENRE] == 2.3
+    assert evolution[1] == {'month': '2025-02', 'genres': {'pop': 1.5}}
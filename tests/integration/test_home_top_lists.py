@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func
+
+from server.app import app
+from server.extensions import db
+from server.model import ListeningHistory
+from server.routes.home import get_multi_window_top_data, TIME_FRAMES
+
+USER_ID = 1  #~ seeded by ci bef integration tests
+
+@pytest.fixture
+def history_session():
+    with app.app_context():
+        db.metadata.create_all(bind=db.engine, tables=[ListeningHistory.__table__])
+        ListeningHistory.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+        yield db.session
+        db.session.rollback()
+        ListeningHistory.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+
+def _seed_plays(session, count=3000, seed=7):
+    #~ skewed random plays over ~13 months, so windows have different leaders & overlapping top ranks
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    session.add_all([
+        ListeningHistory(
+            user_id=USER_ID,
+            track_id=f'track-{track}',
+            track_name=f'Track {track}',
+            artist=f'Artist {track % 15}',
+            played_at=now - timedelta(days=rng.uniform(0, 400), seconds=i)
+        )
+        for i, track in enumerate(int(rng.paretovariate(1.2)) % 60 for _ in range(count))
+    ])
+    session.commit()
+
+def _naive_counts(group_column, days):
+    #~ plain per-window GROUP BY, every group w its play count
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    return dict(
+        db.session.query(group_column, func.count(ListeningHistory.id))
+        .filter(ListeningHistory.user_id == USER_ID, ListeningHistory.played_at >= start)
+        .group_by(group_column)
+        .all()
+    )
+
+def _naive_top(counts, limit):
+    #~ GROUP BY / ORDER BY / LIMIT; only the counts are compared since ties may order either way
+    return sorted(counts.values(), reverse=True)[:limit]
+
+#& test fr 1-scan multi-window top lists: every window matches its own group by / order by / limit
+def test_multi_window_top_data_matches_per_window_query(history_session):
+    _seed_plays(history_session)
+    top_songs, top_artists = get_multi_window_top_data(USER_ID, limit=10)
+    assert set(top_songs) == set(top_artists) == set(TIME_FRAMES)
+    for label, days in TIME_FRAMES.items():
+        for rows, key, column in (
+            (top_songs[label], 'track_id', ListeningHistory.track_id),
+            (top_artists[label], 'artist', ListeningHistory.artist)
+        ):
+            counts = _naive_counts(column, days)
+            assert len(rows) == min(10, len(counts))
+            assert [row['play_count'] for row in rows] == _naive_top(counts, 10)
+            assert all(counts[row[key]] == row['play_count'] for row in rows)
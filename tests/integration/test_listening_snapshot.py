@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+import server.services.listening_snapshot as ls
+
+#& fixed plays (utc) w hand-computed aggregates
+#~ 2024-01-01 is a Monday; listening days 1, 2, 4, 8, 9 jan -> islands [1-2], [4], [8-9]
+PLAYS = [
+    (datetime(2024, 1, 1, 10, 0), 120),
+    (datetime(2024, 1, 1, 10, 30), 60),
+    (datetime(2024, 1, 2, 23, 0), 180),
+    (datetime(2024, 1, 4, 0, 15), 240),
+    (datetime(2024, 1, 8, 12, 0), 300),
+    (datetime(2024, 1, 9, 12, 0), 60),
+]
+
+def _epoch_day(day):
+    return (day - date(1970, 1, 1)).days
+
+def make_snapshot(user_id=1, generation=1):
+    plays = np.array(
+        [(ls._to_epoch(played_at), duration, 0, 0, 0) for played_at, duration in PLAYS],
+        dtype=ls.SNAPSHOT_DTYPE
+    )
+    vocab = {'artists': ['A'], 'tracks': [['t1', 'Track', 'A', None]], 'genres': ['pop']}
+    return ls.ListeningSnapshot(user_id, plays, vocab, generation)
+
+#& test fr daily trends: every day in range present, empty days zero-filled
+def test_daily_trends():
+    trends = make_snapshot().daily_trends(datetime(2024, 1, 1), datetime(2024, 1, 4, 23, 59, 59))
+    assert [t['date'] for t in trends] == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04']
+    assert [t['trackCount'] for t in trends] == [2, 1, 0, 1]
+    assert [t['minutes'] for t in trends] == [3.0, 3.0, 0.0, 4.0]
+
+#& test fr weekly trends: buckets start on monday
+def test_weekly_trends():
+    trends = make_snapshot().weekly_trends(datetime(2024, 1, 1), datetime(2024, 1, 14))
+    assert trends == [
+        {'date': '2024-01-01T00:00:00', 'trackCount': 4, 'minutes': 10.0},
+        {'date': '2024-01-08T00:00:00', 'trackCount': 2, 'minutes': 6.0},
+    ]
+
+#& test fr heatmap: rows are postgres dow (0=sunday), cols utc hour
+def test_heatmap_dow_offset():
+    heatmap = make_snapshot().heatmap(datetime(2024, 1, 1), datetime(2024, 1, 14))
+    expected = np.zeros((7, 24), dtype=int)
+    expected[1][10] = 2  #~ mon 10:xx x2
+    expected[2][23] = 1  #~ tue 23:00
+    expected[4][0] = 1   #~ thu 00:15
+    expected[1][12] = 1  #~ mon 8 jan
+    expected[2][12] = 1  #~ tue 9 jan
+    assert heatmap == {'data': expected.tolist(), 'maxValue': 2}
+
+#& test fr streak state: gaps & islands, earliest island wins ties
+def test_streak_state():
+    assert make_snapshot().streak_state() == {
+        'last_day': _epoch_day(date(2024, 1, 9)),
+        'current_start': _epoch_day(date(2024, 1, 8)),
+        'current_length': 2,
+        'best_start': _epoch_day(date(2024, 1, 1)),
+        'best_length': 2
+    }
+
+@pytest.fixture
+def snapshot_store(fake_redis, monkeypatch, tmp_path):
+    _, binary_client = fake_redis
+    generation = {'value': 1}
+    monkeypatch.setattr(ls, 'redis_binary_client', binary_client)
+    monkeypatch.setattr(ls, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(ls, 'current_generation', lambda user_id: generation['value'])
+    return binary_client, generation
+
+#& test fr snapshot storage: local memmap 1st, redis fallback, generation checks
+def test_snapshot_save_and_load(snapshot_store, monkeypatch, tmp_path):
+    binary_client, generation = snapshot_store
+    builds = []
+    def build(user_id, generation=None):
+        builds.append(generation)
+        return make_snapshot(user_id, generation)
+    monkeypatch.setattr(ls, 'build_snapshot', build)
+
+    assert ls.save_snapshot(make_snapshot())
+    loaded = ls.load_snapshot(1)
+    assert isinstance(loaded.plays, np.memmap) and len(loaded) == len(PLAYS)
+
+    #~ local copy gone (e.g. other worker / restart): served frm redis & written locally again
+    for path in tmp_path.iterdir():
+        path.unlink()
+    loaded = ls.load_snapshot(1)
+    assert loaded.generation == 1 and len(loaded) == len(PLAYS) and any(tmp_path.iterdir())
+    assert builds == []
+
+    #~ stale generation is never saved, & a bump forces a rebuild
+    assert not ls.save_snapshot(make_snapshot(generation=0))
+    generation['value'] = 2
+    assert ls.load_snapshot(1).generation == 2 and builds == [2]
+    assert int(binary_client.hget(ls._snapshot_key(1), 'generation')) == 2
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import pytest
+
+import server.redis_client as rc
+import server.services.listening_streak as streak
+
+STATE = {'last_day': 100, 'current_start': 99, 'current_length': 2, 'best_start': 90, 'best_length': 5}
+
+class DummySnapshot:
+    def __init__(self, generation, on_load=None):
+        self.generation = generation
+        self.on_load = on_load
+    def streak_state(self):
+        if self.on_load:
+            self.on_load()
+        return dict(STATE)
+
+@pytest.fixture
+def streak_redis(fake_redis, monkeypatch):
+    text_client, _ = fake_redis
+    monkeypatch.setattr(streak, 'redis_client', text_client)
+    return text_client
+
+#& test fr streak rebuild: stored when nothing moved underneath it
+def test_rebuild_streak_state_stores(streak_redis, monkeypatch):
+    version = rc.bump_data_version(1)
+    monkeypatch.setattr(streak, 'load_snapshot', lambda user_id: DummySnapshot(generation=version))
+    assert streak.rebuild_streak_state(1) == STATE
+    assert streak_redis.hgetall(streak._streak_key(1)) == {field: str(value) for field, value in STATE.items()}
+
+#& test fr streak rebuild racing ingest: a version bump mid-rebuild / stale snapshot is never stored
+def test_rebuild_streak_state_skips_stale(streak_redis, monkeypatch):
+    version = rc.bump_data_version(1)
+    monkeypatch.setattr(streak, 'load_snapshot', lambda user_id: DummySnapshot(version, on_load=lambda: rc.bump_data_version(1)))
+    assert streak.rebuild_streak_state(1) == STATE
+    assert not streak_redis.exists(streak._streak_key(1))
+    #~ snapshot frm an older generation than current version
+    monkeypatch.setattr(streak, 'load_snapshot', lambda user_id: DummySnapshot(generation=version))
+    assert streak.rebuild_streak_state(1) == STATE
+    assert not streak_redis.exists(streak._streak_key(1))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+import threading
+import time
+
+import pytest
+
+import server.redis_client as rc
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+#& test fr single-flight: concurrent misses on 1 key run the fn once, every caller gets its result
+def test_redis_cache_one_recompute_under_contention(fake_redis):
+    calls = []
+    @rc.redis_cache('test', ttl=60)
+    def compute(user_id):
+        calls.append(user_id)
+        time.sleep(0.2)  #~ long enough that every thread misses while the lock is held
+        return {'user_id': user_id}
+
+    barrier = threading.Barrier(8)
+    results = []
+    def worker():
+        barrier.wait()
+        results.append(compute(1))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == [{'user_id': 1}] * 8
+    #~ different args => different key => own recompute
+    assert compute(2) == {'user_id': 2} and calls == [1, 2]
+
+#& test fr stale-while-revalidate: past fresh_until the old value is served while 1 bg refresh runs
+def test_redis_cache_serves_stale_after_fresh_until(fake_redis):
+    text_client, _ = fake_redis
+    release = threading.Event()
+    calls = []
+    @rc.redis_cache('test', ttl=60, stale_ttl=600)
+    def compute(user_id):
+        calls.append(user_id)
+        release.wait(5)
+        return 'new'
+
+    key = compute.cache_key(1)
+    rc.set_cached(key, {'value': 'old', 'fresh_until': time.time() - 1}, ex=600)
+    try:
+        assert compute(1) == 'old'
+        assert _wait_for(lambda: calls == [1])
+        #~ refresh still running: served stale again w/o a 2nd refresh
+        assert compute(1) == 'old' and calls == [1]
+    finally:
+        release.set()
+    assert _wait_for(lambda: not text_client.exists(f"{key}:lock"))
+    rc.local_cache.delete(key)
+    assert compute(1) == 'new' and calls == [1]
+
+#& test fr failing fn: exception propagates & lock is released so next call recomputes
+def test_redis_cache_releases_lock_on_error(fake_redis):
+    text_client, _ = fake_redis
+    calls = []
+    @rc.redis_cache('test', ttl=60, wait_timeout=0.2)
+    def compute(user_id):
+        calls.append(user_id)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return 'ok'
+
+    with pytest.raises(RuntimeError):
+        compute(1)
+    assert not text_client.exists(f"{compute.cache_key(1)}:lock")
+    #~ lock left behind would make this wait out wait_timeout instead of taking the lock
+    started = time.monotonic()
+    assert compute(1) == 'ok'
+    assert calls == [1, 1] and time.monotonic() - started < 0.2
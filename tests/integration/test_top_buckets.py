@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from server.app import app
+from server.extensions import db
+from server.model import ListeningHistory
+import server.services.top_buckets as tb
+
+USER_ID = 1  #~ seeded by ci bef integration tests
+WINDOWS = {'1_week': 7, '1_month': 30, '3_months': 90, '1_year': 365}
+
+@pytest.fixture
+def buckets_redis(fake_redis, monkeypatch):
+    text_client, _ = fake_redis
+    monkeypatch.setattr(tb, 'redis_client', text_client)
+    return text_client
+
+@pytest.fixture
+def history_session():
+    with app.app_context():
+        db.metadata.create_all(bind=db.engine, tables=[ListeningHistory.__table__])
+        ListeningHistory.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+        yield db.session
+        db.session.rollback()
+        ListeningHistory.query.filter_by(user_id=USER_ID).delete()
+        db.session.commit()
+
+def _plays(count=600, max_days=300, seed=3):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    plays = []
+    for i in range(count):
+        track = int(rng.paretovariate(1.3)) % 40
+        plays.append({
+            'track_id': f'track-{track}',
+            'track_name': f'Track {track}',
+            'artist': f'Artist {track % 12}',
+            'artwork_url': f'https://img/{track}',
+            'played_at': now - timedelta(days=rng.uniform(0, max_days), seconds=i)
+        })
+    return plays
+
+def _covered_days(keys, today):
+    #~ every day a set of window keys counts, w repeats if keys overlap
+    days = []
+    for key in keys:
+        stamp = key.rsplit(':', 1)[1]
+        if '_month:' in key:
+            day = date(int(stamp[:4]), int(stamp[4:]), 1)
+            month = day.month
+            while day.month == month and day <= today:
+                days.append(day)
+                day += timedelta(days=1)
+        else:
+            days.append(datetime.strptime(stamp, '%Y%m%d').date())
+    return days
+
+#& test fr window keys: whole months frm monthly totals, edge days frm daily buckets
+def test_window_keys_months_and_edge_days():
+    keys = tb._window_keys('tracks', USER_ID, date(2025, 3, 15), 30)
+    assert keys[0] == 'top_tracks_month:1:202503'
+    assert keys[1:] == [f'top_tracks_day:1:202502{day:02d}' for day in range(14, 29)]
+    #~ window starting on the 1st needs no edge days
+    assert tb._window_keys('artists', USER_ID, date(2025, 3, 31), 31) == ['top_artists_month:1:202503']
+    #~ window inside a single month is all edge days
+    assert tb._window_keys('tracks', USER_ID, date(2025, 3, 10), 3) == [
+        'top_tracks_day:1:20250308', 'top_tracks_day:1:20250309', 'top_tracks_day:1:20250310'
+    ]
+    #~ every window covers exactly its days, each once
+    for today in (date(2024, 2, 29), date(2024, 12, 31), date(2025, 1, 1), date(2025, 7, 16)):
+        for days in (1, 7, 28, 30, 31, 90, 180, 365):
+            covered = _covered_days(tb._window_keys('tracks', USER_ID, today, days), today)
+            expected = [today - timedelta(days=offset) for offset in range(days)]
+            assert sorted(covered) == sorted(expected)
+
+#& test fr window top-k: matches a naive count over the same plays
+def test_window_top_data_matches_naive_count(buckets_redis):
+    plays = _plays(max_days=400)
+    tb.record_plays(USER_ID, plays)
+    top_songs, top_artists = tb.get_window_top_data(USER_ID, WINDOWS, limit=10)
+    today = datetime.now(timezone.utc).date()
+    for label, days in WINDOWS.items():
+        start = today - timedelta(days=days - 1)
+        in_window = [play for play in plays if play['played_at'].date() >= start]
+        for rows, key in ((top_songs[label], 'track_id'), (top_artists[label], 'artist')):
+            counts = Counter(play[key] for play in in_window)
+            assert [row['play_count'] for row in rows] == sorted(counts.values(), reverse=True)[:10]
+            assert all(counts[row[key]] == row['play_count'] for row in rows)
+        for row in top_songs[label]:
+            track = row['track_id'].split('-')[1]
+            assert (row['track_name'], row['artwork_url']) == (f'Track {track}', f'https://img/{track}')
+    #~ window scratch keys are cleaned up
+    assert not [key for key in buckets_redis.data if '_window:' in key]
+
+def _bucket_state(client):
+    return {
+        key: value for key, value in client.data.items()
+        if key.startswith(('top_tracks_', 'top_artists_', 'top_track_meta:')) and client._alive(key)
+    }
+
+#& test fr prime: backfill frm sql leaves the same buckets as recording every play at ingest
+def test_prime_matches_incremental(buckets_redis, history_session, monkeypatch):
+    plays = _plays()
+    history_session.add_all([ListeningHistory(user_id=USER_ID, **play) for play in plays])
+    history_session.commit()
+    assert tb.prime_buckets(USER_ID) > 0 and tb.is_primed(USER_ID)
+    primed = _bucket_state(buckets_redis)
+
+    incremental = type(buckets_redis)(decode_responses=True)
+    monkeypatch.setattr(tb, 'redis_client', incremental)
+    tb.record_plays(USER_ID, plays)
+    #~ counts, track metadata & expiries all line up
+    assert primed and primed == _bucket_state(incremental)
+    assert all(buckets_redis.expires_at[key] == incremental.expires_at[key] for key in primed)
+
+#& test fr prime racing ingest: a record_plays between the sql read & the rewrite is neither lost nor doubled
+def test_prime_retries_when_ingest_lands(buckets_redis, history_session, monkeypatch):
+    plays = _plays(count=50)
+    history_session.add_all([ListeningHistory(user_id=USER_ID, **play) for play in plays])
+    history_session.commit()
+    late = dict(plays[0], track_id='track-late', track_name='Late', played_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    read_bucket_counts = tb._read_bucket_counts
+    reads = []
+    def racing_read(user_id, today):
+        result = read_bucket_counts(user_id, today)
+        if not reads:
+            #~ ingest commits & records a play after prime already read sql
+            history_session.add(ListeningHistory(user_id=USER_ID, **late))
+            history_session.commit()
+            tb.record_plays(USER_ID, [late])
+        reads.append(today)
+        return result
+    monkeypatch.setattr(tb, '_read_bucket_counts', racing_read)
+    assert tb.prime_buckets(USER_ID) is not None
+    assert len(reads) == 2
+    day_key = tb._day_key('tracks', USER_ID, late['played_at'].date())
+    assert buckets_redis.zscore(day_key, 'track-late') == 1